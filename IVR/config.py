@@ -13,6 +13,11 @@ def load_config():
         "TWILIO_AUTH_TOKEN": os.getenv("TWILIO_AUTH_TOKEN"),
         # Add more as needed
         "NGROK_BASE_URL": os.getenv("NGROK_BASE_URL"),
+        # Call histories are kept in the shared state backend (SHARED_STATE_URL) this long after the last turn
+        "IVR_HISTORY_TTL_SECONDS": float(os.getenv("IVR_HISTORY_TTL_SECONDS", "3600")),
+        # Deadline for one Gemini answer (queueing and retries included); the caller is on the line and
+        # Twilio gives up on a webhook after 15 seconds, so a late answer is replaced by a spoken apology
+        "IVR_LLM_DEADLINE_SECONDS": float(os.getenv("IVR_LLM_DEADLINE_SECONDS", "8")),
     }
 
 
@@ -5,8 +5,10 @@ from langchain.chains import ConversationChain
 from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
 from langchain.schema import HumanMessage, AIMessage
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Optional, Union
 from utils import extract_topic, estimate_confidence
+from config import load_config
+from backend.llm_gateway import LLMDeadlineExceeded, llm_gateway
 
 # Load environment variables
 load_dotenv()
@@ -18,6 +20,8 @@ if not GEMINI_API_KEY:
 
 genai.configure(api_key=GEMINI_API_KEY)
 
+LLM_DEADLINE_SECONDS = load_config()["IVR_LLM_DEADLINE_SECONDS"]
+
 PROMPT_TEMPLATE = PromptTemplate(
     input_variables=["chat_history", "question"],
 template = (
@@ -45,15 +49,33 @@ class GeminiChain:
         self.session_id = session_id
         self.temperature = 0.2
 
-    def ask(self, question: str) -> str:
-        """Process a question and return the response."""
+    @staticmethod
+    def _history_messages(history: Optional[List[Any]], question: str) -> List[Dict[str, Any]]:
+        """Gemini messages for the earlier turns of the call"""
+        turns = [(entry[1], entry[2]) for entry in history or []]
+        # The router records the question before asking it
+        if turns and turns[-1] == ("user", question):
+            turns.pop()
+        return [{"role": "user" if role == "user" else "model", "parts": [message]} for role, message in turns]
+
+    async def ask(self, question: str, history: Optional[List[Any]] = None) -> str:
+        """Process a question and return the response.
+
+        history: earlier turns of the call as (timestamp, role, message, ...) entries
+
+        Raises LLMDeadlineExceeded if there is no answer within IVR_LLM_DEADLINE_SECONDS.
+        """
         try:
             # Prepare the chat history with system message
-            messages = [{"role": "user", "parts": [question]}]
+            messages = self._history_messages(history, question) + [{"role": "user", "parts": [question]}]
             
-            # Get response from Gemini
-            response = self.model.generate_content(
+            # Get response from Gemini through the shared LLM gateway (async, so the
+            # event loop keeps serving other calls while this one waits)
+            response = await llm_gateway.generate(
+                self.model,
                 messages,
+                caller="ivr",
+                timeout=LLM_DEADLINE_SECONDS,
                 generation_config={
                     "temperature": self.temperature,
                 }
@@ -78,6 +100,9 @@ class GeminiChain:
                 "memory": self.memory
             }
             
+        except LLMDeadlineExceeded:
+            # The router tells the caller to ask again
+            raise
         except Exception as e:
             print(f"Error in GeminiChain: {str(e)}")
             return "I'm sorry, I encountered an error processing your request."
@@ -7,19 +7,42 @@ from utils import detect_human_request
 import os
 from tts import synthesize_speech
 import time
-from collections import defaultdict
 from config import load_config
-
-# In-memory conversation history: {session_id: [(timestamp, role, message), ...]}
-conversation_history = defaultdict(list)
+from backend.llm_gateway import LLMDeadlineExceeded
+from backend.shared_state import SharedLog, shared_state
 
 router = APIRouter()
 
 config = load_config()
+
+# Conversation history per call: {session_id: [[timestamp, role, message], ...]}, shared by all
+# workers when SHARED_STATE_URL points at SQLite or Redis, so any worker can take the next turn
+conversation_history = SharedLog(shared_state, "ivr:history", ttl_seconds=config["IVR_HISTORY_TTL_SECONDS"])
 print("Config loaded:", config)
 NGROK_BASE_URL = config.get("NGROK_BASE_URL") or "https://72cfe06833ea.ngrok-free.app"  # Fallback to current URL
 print("Using NGROK_BASE_URL:", NGROK_BASE_URL)
 
+# Said when Gemini does not answer within IVR_LLM_DEADLINE_SECONDS
+SLOW_ANSWER_APOLOGY = {
+    "hi-IN": "माफ़ कीजिए, उत्तर देने में देर हो रही है। कृपया अपना प्रश्न फिर से पूछें।",
+    "en-IN": "Sorry, that is taking longer than expected. Please ask your question again.",
+}
+
+def slow_answer_response(language: str) -> Response:
+    """Apologise for a late answer and listen for the question again"""
+    language = language if language in SLOW_ANSWER_APOLOGY else "en-IN"
+    resp = VoiceResponse()
+    gather = Gather(
+        input="speech",
+        action=f"{NGROK_BASE_URL}/ivr/process_input?language={language}",
+        method="POST",
+        language=language,
+        timeout=5
+    )
+    gather.say(SLOW_ANSWER_APOLOGY[language], language=language)
+    resp.append(gather)
+    return Response(content=str(resp), media_type="application/xml")
+
 # --- Answer Incoming Call ---
 @router.post("/answer")
 async def answer_call():
@@ -133,14 +156,17 @@ async def process_input(request: Request):
     if transcript:
         print("✅ Using Twilio's speech-to-text result:", transcript)
         # Add to conversation history
-        conversation_history[session_id].append((now, "user", transcript, language))
+        conversation_history.append(session_id, (now, "user", transcript, language))
         
         # Get response from Gemini
         gemini = GeminiChain(session_id)
-        gemini_response = gemini.ask(transcript)
+        try:
+            gemini_response = await gemini.ask(transcript)
+        except LLMDeadlineExceeded:
+            return slow_answer_response(language)
         
         # Add AI response to history
-        conversation_history[session_id].append((now, "assistant", gemini_response["response"], language))
+        conversation_history.append(session_id, (now, "assistant", gemini_response["response"], language))
         
         # Prepare TwiML response
         response = VoiceResponse()
@@ -191,7 +217,7 @@ async def process_input(request: Request):
                 # Process the transcript if available
                 if transcript:
                     # Add user message to history
-                    conversation_history[session_id].append((now, "user", transcript))
+                    conversation_history.append(session_id, (now, "user", transcript))
                     
                     # Check for human request
                     if detect_human_request(transcript):
@@ -200,18 +226,21 @@ async def process_input(request: Request):
                     
                     # Get response from Gemini
                     gemini = GeminiChain(session_id)
-                    gemini_result = gemini.ask(transcript, history=conversation_history[session_id])
+                    try:
+                        gemini_result = await gemini.ask(transcript, history=conversation_history.get(session_id))
+                    except LLMDeadlineExceeded:
+                        return slow_answer_response(detected_language)
                     response_text = gemini_result["response"]
                     
                     # Add agent response to history
-                    conversation_history[session_id].append((now, "agent", response_text))
+                    history_length = conversation_history.append(session_id, (now, "agent", response_text))
                     
                     # Convert response to speech
                     audio_url = synthesize_speech(response_text, lang=detected_language)
                     resp.play(audio_url)
                     
                     # Only show the initial prompt if this is the first message in the conversation
-                    if len(conversation_history[session_id]) <= 2:  # First interaction (user message + AI response)
+                    if history_length <= 2:  # First interaction (user message + AI response)
                         gather = Gather(
                             input="speech",
                             action=f"{NGROK_BASE_URL}/ivr/process_input?language={detected_language}",
@@ -289,25 +318,28 @@ async def process_input(request: Request):
         print("✅ Transcript from STT:", transcript)
 
         # Add user message to history
-        conversation_history[session_id].append((now, "user", transcript))
+        conversation_history.append(session_id, (now, "user", transcript))
 
         if detect_human_request(transcript):
             resp.redirect("/fallback/human", method="POST")
             return Response(content=str(resp), media_type="application/xml")
 
         gemini = GeminiChain(session_id)
-        gemini_result = gemini.ask(transcript, history=conversation_history[session_id])
+        try:
+            gemini_result = await gemini.ask(transcript, history=conversation_history.get(session_id))
+        except LLMDeadlineExceeded:
+            return slow_answer_response(language)
         response_text = gemini_result["response"]
         print("🤖 Gemini Response:", response_text)
 
         # Add agent response to history
-        conversation_history[session_id].append((now, "agent", response_text))
+        history_length = conversation_history.append(session_id, (now, "agent", response_text))
 
         audio_url = synthesize_speech(response_text, lang=language)
         resp.play(audio_url)
 
         # Only show the initial prompt if this is the first message in the conversation
-        if len(conversation_history[session_id]) <= 2:  # First interaction (user message + AI response)
+        if history_length <= 2:  # First interaction (user message + AI response)
             gather = Gather(
                 input="speech",
                 action=f"{NGROK_BASE_URL}/ivr/process_input?language={language}",
@@ -374,6 +406,9 @@ async def test_upload(file: UploadFile = File(...)):
         return JSONResponse({"ivr_response": "Transferring you to a human agent."})
 
     gemini = GeminiChain("test-session")
-    gemini_result = gemini.ask(transcript)
+    try:
+        gemini_result = await gemini.ask(transcript)
+    except LLMDeadlineExceeded:
+        return JSONResponse({"ivr_response": SLOW_ANSWER_APOLOGY.get(language, SLOW_ANSWER_APOLOGY["en-IN"])})
 
     return JSONResponse({"ivr_response": gemini_result["response"]})
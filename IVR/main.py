@@ -1,3 +1,11 @@
+import os
+import sys
+
+# The IVR service runs from this directory; put the repository root on the path once, here,
+# so the IVR modules can import the shared backend package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from ivr_router import router as ivr_router
@@ -5,9 +13,16 @@ from fallback import router as fallback_router
 from config import load_config
 from stt import router as stt_router
 from dotenv import load_dotenv
+from backend.loop_monitor import loop_monitor
 load_dotenv()
 
-app = FastAPI(title="Lexa AI IVR Legal Assistant")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+
+app = FastAPI(title="Lexa AI IVR Legal Assistant", lifespan=lifespan)
 
 config = load_config()
 
@@ -18,4 +33,8 @@ app.mount("/audio", StaticFiles(directory="audio"), name="audio")
 
 @app.get("/")
 def root():
-    return {"message": "Lexa AI IVR backend is running."} 
\ No newline at end of file
+    return {"message": "Lexa AI IVR backend is running."}
+
+@app.get("/loop_stats")
+def loop_stats():
+    return loop_monitor.stats() 
\ No newline at end of file
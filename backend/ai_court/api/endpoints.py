@@ -1,4 +1,5 @@
 import os
+import asyncio
 from fastapi import APIRouter, UploadFile, File, HTTPException, Body, Depends
 from typing import Optional, Dict, Any
 from pydantic import BaseModel
@@ -14,12 +15,21 @@ from backend.ai_court.models.api_models import DebateInput, DebateTurnResponse,
 from backend.ai_court.services.document_ingestion import ingest_document
 from backend.ai_court.services.debate_orchestrator import (
     conduct_debate_turn, 
+    stream_debate_turn,
     handle_turn_based_debate,
     start_new_case as orchestrator_start_new_case
 )
 from backend.ai_court.services.voice_service import voice_service
 from backend.ai_court.services.speech_recognition import speech_recognition_service
 from backend.ai_court.core.state_manager import state_manager, DebateState
+from backend.ai_court.core.embedding_cache import query_embedding_cache
+from backend.ai_court.core.retrieval_cache import retrieval_cache
+from backend.ai_court.core.startup import startup_registry
+from backend.chat_cache import chat_cache
+from backend.llm_gateway import llm_gateway
+from backend.loop_monitor import loop_monitor
+from backend.sse import sse_event
+from fastapi.responses import JSONResponse, StreamingResponse
 
 router = APIRouter()
 
@@ -91,29 +101,32 @@ async def start_debate(case_details: CaseDetails, practice_config: Dict[str, Any
         # Create a new debate state
         state = DebateState(
             session_id=response.session_id,
-            case_type=case_details.case_type,
-            specific_issue=case_details.issue,
-            case_summary=case_details.summary,
-            user_role=case_details.user_role,
+            case_type=case_details.caseType.value,
+            specific_issue=case_details.specificIssue,
+            case_summary=case_details.caseSummary,
+            user_role=case_details.userRole,
             judge_persona="an experienced High Court Judge with 20+ years of experience",
-            ai_lawyer_persona="a seasoned defense attorney with 15+ years of experience"
+            ai_lawyer_persona="a seasoned defense attorney with 15+ years of experience",
+            waiting_for="judge"  # The first turn is the judge's opening
         )
         
         # Save the initial state
         state_manager.sessions[response.session_id] = state
         
-        # Generate the judge's opening statement
-        judge_response = await handle_turn_based_debate(response.session_id)
+        # The orchestrator already generated the judge's opening statement; record it as the first turn
+        state_manager.add_message(response.session_id, "judge", response.judge_opening)
         
         return {
             "session_id": response.session_id,
             "initial_state": {
-                "judge_opening": judge_response["content"],
+                "judge_opening": response.judge_opening,
                 "waiting_for": "user",
                 "current_round": 1
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start debate: {str(e)}")
 
@@ -133,8 +146,8 @@ async def submit_turn(turn_request: DebateTurnRequest):
         )
         
         # Get the updated state
-        if turn_request.session_id in state_manager.sessions:
-            state = state_manager.sessions[turn_request.session_id]
+        state = state_manager.get_session(turn_request.session_id)
+        if state is not None:
             response.update({
                 "waiting_for": state.waiting_for,
                 "current_round": state.current_round,
@@ -152,10 +165,10 @@ async def submit_turn(turn_request: DebateTurnRequest):
 @router.get("/debate/state/{session_id}", response_model=DebateStateResponse, summary="Get the current state of a debate")
 async def get_debate_state(session_id: str):
     """Get the current state of a debate session"""
-    if session_id not in state_manager.sessions:
+    state = state_manager.get_session(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    state = state_manager.sessions[session_id]
     return {
         "session_id": session_id,
         "current_speaker": state.current_speaker,
@@ -181,6 +194,62 @@ async def debate_turn_endpoint(input: DebateInput):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred during debate turn: {str(e)}")
 
+@router.post("/debate_turn_stream", summary="Stream a debate turn as server-sent events")
+async def debate_turn_stream_endpoint(input: DebateInput, with_voice: bool = False):
+    """
+    Same turn as /debate_turn, streamed as server-sent events in this order:
+    `sources`, `lawyer_token`... `lawyer_done`, `judge_token`... `judge_done`,
+    `audio` (one per role, only with with_voice=true) and finally `done` with
+    the complete DebateTurnResponse. Failures are sent as an `error` event.
+
+    Speech for the AI lawyer is synthesized while the judge is still being
+    generated.
+    """
+    async def synthesize(role: str, text: str):
+        return role, await voice_service.synthesize_speech(text=text, role=role)
+
+    async def event_stream():
+        audio_tasks = []
+        try:
+            final_response = None
+            async for event, data in stream_debate_turn(input):
+                if event == "done":
+                    final_response = data
+                    continue
+                yield sse_event(event, data)
+                if with_voice and event == "lawyer_done":
+                    audio_tasks.append(asyncio.create_task(synthesize("lawyer", data["text"])))
+                elif with_voice and event == "judge_done":
+                    audio_tasks.append(asyncio.create_task(synthesize("judge", data["text"])))
+
+            for next_audio in asyncio.as_completed(audio_tasks):
+                try:
+                    role, audio_url = await next_audio
+                except Exception as e:
+                    print(f"Speech synthesis failed during stream: {e}")
+                    continue
+                if role == "lawyer":
+                    final_response["ai_lawyer_audio_url"] = audio_url
+                else:
+                    final_response["judge_audio_url"] = audio_url
+                yield sse_event("audio", {"role": role, "audio_url": audio_url})
+
+            yield sse_event("done", final_response)
+        except HTTPException as e:
+            yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            yield sse_event("error", {"status_code": 500, "detail": f"An unexpected error occurred during debate turn: {str(e)}"})
+        finally:
+            for task in audio_tasks:
+                if not task.done():
+                    task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/synthesize_speech", response_model=VoiceResponse, summary="Convert text to speech")
 async def synthesize_speech_endpoint(request: VoiceRequest):
     """
@@ -219,7 +288,7 @@ async def transcribe_audio_endpoint(file: UploadFile = File(..., description="Au
         print(f"🎤 Received audio file: {file.filename} ({file.content_type})")
         
         # Check if speech recognition service is available
-        if not DEEPGRAM_API_KEY and not speech_recognition_service.whisper_model:
+        if not DEEPGRAM_API_KEY and not speech_recognition_service.whisper_available:
             raise HTTPException(
                 status_code=503, 
                 detail="Speech recognition service is not available. No API key or fallback model found."
@@ -245,7 +314,7 @@ async def speech_status_endpoint():
     """
     try:
         status = {
-            "available": bool(DEEPGRAM_API_KEY or speech_recognition_service.whisper_model),
+            "available": bool(DEEPGRAM_API_KEY or speech_recognition_service.whisper_available),
             "model_name": "Deepgram" if DEEPGRAM_API_KEY else (
                 speech_recognition_service.whisper_model_name if speech_recognition_service.whisper_model else None
             ),
@@ -262,6 +331,50 @@ async def speech_status_endpoint():
             "error": str(e)
         }
 
+@router.get("/cache_stats", summary="Retrieval cache statistics")
+async def cache_stats_endpoint():
+    """
+    Hit/miss counters for the retrieval caches and the chat answer cache.
+    """
+    return {
+        "query_embeddings": query_embedding_cache.stats(),
+        "retrieval_results": retrieval_cache.stats(),
+        "chat_answers": chat_cache.stats()
+    }
+
+@router.get("/llm_stats", summary="LLM gateway statistics")
+async def llm_stats_endpoint():
+    """
+    Per-model queue depth and limits, and per-caller latency, token and error
+    counters of the LLM gateway.
+    """
+    return llm_gateway.metrics()
+
+@router.get("/loop_stats", summary="Event loop lag statistics")
+async def loop_stats_endpoint():
+    """
+    How late the event loop runs scheduled work, and how often and how long
+    it was blocked.
+    """
+    return loop_monitor.stats()
+
+@router.get("/ready", summary="Readiness of models and vector indexes")
+async def readiness_endpoint():
+    """
+    Returns 200 once every critical component (Gemini, embedding model,
+    vector indexes) has been initialized, 503 while warm-up is in progress
+    or a component failed.
+    """
+    readiness = startup_registry.readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
+@router.get("/startup_profile", summary="Startup cost per component")
+async def startup_profile_endpoint():
+    """
+    Load time, status and errors for each lazily initialized component.
+    """
+    return startup_registry.profile()
+
 @router.post("/debate_turn_with_voice", response_model=DebateTurnResponse, summary="Conduct debate turn with voice synthesis")
 async def debate_turn_with_voice_endpoint(input: DebateInput):
     """
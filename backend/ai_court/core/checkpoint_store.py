@@ -0,0 +1,173 @@
+import base64
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from backend.shared_state import StateBackend
+
+class StateBackendCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer on top of a StateBackend (backend/shared_state.py),
+    so workflow checkpoints live in process memory, SQLite or Redis like the
+    rest of the shared state.
+
+    Only the latest checkpoint of each thread and its pending writes are
+    kept: enough to resume a run that was cut short, without the history
+    LangGraph's time travel would need. Checkpoints expire `ttl_seconds`
+    after they were last written.
+    """
+    def __init__(self, backend: StateBackend, namespace: str = "checkpoint", ttl_seconds: Optional[float] = None):
+        super().__init__()
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    # --- Keys and encoding ---
+
+    def _key(self, thread_id: str, checkpoint_ns: str) -> str:
+        return f"{self.namespace}:{thread_id}:{checkpoint_ns}"
+
+    def _writes_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"{self.namespace}_writes:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
+
+    def _dump(self, value: Any) -> List[str]:
+        type_name, data = self.serde.dumps_typed(value)
+        return [type_name, base64.b64encode(data).decode()]
+
+    def _load(self, encoded: List[str]) -> Any:
+        return self.serde.loads_typed((encoded[0], base64.b64decode(encoded[1])))
+
+    @staticmethod
+    def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+    def _pending_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Tuple[str, str, Any]]:
+        # A retried task may write again: the first write of a regular (idx >= 0) slot wins,
+        # special writes (errors, interrupts; idx < 0) are replaced by the latest
+        stored: Dict[Tuple[str, int], Tuple[str, str, List[str], str]] = {}
+        for raw in self.backend.get_list(self._writes_key(thread_id, checkpoint_ns, checkpoint_id)):
+            task_id, idx, channel, value, task_path = json.loads(raw)
+            if idx >= 0 and (task_id, idx) in stored:
+                continue
+            stored[(task_id, idx)] = (task_id, channel, value, task_path)
+        ordered = sorted(stored.items(), key=lambda item: (item[1][3], item[0][0], item[0][1]))
+        return [(task_id, channel, self._load(value)) for _, (task_id, channel, value, _) in ordered]
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, record: Dict[str, Any]) -> CheckpointTuple:
+        return CheckpointTuple(
+            config=self._config(thread_id, checkpoint_ns, record["id"]),
+            checkpoint=self._load(record["checkpoint"]),
+            metadata=self._load(record["metadata"]),
+            parent_config=self._config(thread_id, checkpoint_ns, record["parent_id"]) if record["parent_id"] else None,
+            pending_writes=self._pending_writes(thread_id, checkpoint_ns, record["id"])
+        )
+
+    def _record(self, key: str) -> Optional[Dict[str, Any]]:
+        found = self.backend.get(key)
+        return json.loads(found[0]) if found else None
+
+    # --- BaseCheckpointSaver ---
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        record = self._record(self._key(thread_id, checkpoint_ns))
+        if record is None:
+            return None
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id and checkpoint_id != record["id"]:
+            return None  # Older checkpoints are not kept
+        return self._tuple(thread_id, checkpoint_ns, record)
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        if config:
+            thread_id = config["configurable"]["thread_id"]
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            prefix = self._key(thread_id, checkpoint_ns) if checkpoint_ns is not None else f"{self.namespace}:{thread_id}:"
+        else:
+            prefix = f"{self.namespace}:"
+        checkpoint_id = get_checkpoint_id(config) if config else None
+        before_id = get_checkpoint_id(before) if before else None
+        for key in self.backend.versions(prefix):
+            if limit is not None and limit <= 0:
+                return
+            record = self._record(key)
+            if record is None:
+                continue
+            if (checkpoint_id and record["id"] != checkpoint_id) or (before_id and record["id"] >= before_id):
+                continue
+            _, thread_id, checkpoint_ns = key.split(":", 2)
+            checkpoint_tuple = self._tuple(thread_id, checkpoint_ns, record)
+            if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield checkpoint_tuple
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key = self._key(thread_id, checkpoint_ns)
+        previous = self._record(key)
+        self.backend.set(key, json.dumps({
+            "id": checkpoint["id"],
+            "parent_id": config["configurable"].get("checkpoint_id"),
+            "checkpoint": self._dump(checkpoint),
+            "metadata": self._dump(get_checkpoint_metadata(config, metadata))
+        }), self.ttl_seconds)
+        # Writes pending against the replaced checkpoint are no longer needed to resume
+        if previous is not None and previous["id"] != checkpoint["id"]:
+            self.backend.delete(self._writes_key(thread_id, checkpoint_ns, previous["id"]))
+        return self._config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key = self._writes_key(thread_id, checkpoint_ns, config["configurable"]["checkpoint_id"])
+        for idx, (channel, value) in enumerate(writes):
+            item = [task_id, WRITES_IDX_MAP.get(channel, idx), channel, self._dump(value), task_path]
+            self.backend.append(key, json.dumps(item), self.ttl_seconds)
+
+    def delete_thread(self, thread_id: str) -> None:
+        for key in self.backend.versions(f"{self.namespace}:{thread_id}:"):
+            record = self._record(key)
+            if record is not None:
+                checkpoint_ns = key.split(":", 2)[2]
+                self.backend.delete(self._writes_key(thread_id, checkpoint_ns, record["id"]))
+            self.backend.delete(key)
+
+    # The backends answer quickly (local memory, SQLite or a Redis round trip), like the
+    # rest of the shared state they are called directly rather than from a thread
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        for checkpoint_tuple in self.list(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
@@ -2,7 +2,7 @@ import os
 from dotenv import load_dotenv
 from pydantic import Field
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 # Load environment variables at the very beginning
 load_dotenv()
@@ -23,10 +23,107 @@ class Settings(BaseSettings):
     ELEVENLABS_API_KEY: str = Field(default="", env="ELEVENLABS_API_KEY")
     
     EMBEDDING_MODEL_NAME: str = "BAAI/bge-large-en-v1.5"
+
+    # Query embedding cache shared by the query engines; set a path to keep a disk tier across restarts
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 2048
+    EMBEDDING_CACHE_PATH: Optional[str] = Field(default=None, env="EMBEDDING_CACHE_PATH")
     
     QDRANT_QNA_COLLECTION: str = "legal_qna_bge_large"
     QDRANT_CASE_COLLECTION: str = "Judge_Lawyer_Case_Large"
 
+    # Vector backend: "qdrant" (remote cluster) or "local" (embedded NumPy index, fully offline)
+    VECTOR_BACKEND: str = Field(default="qdrant", env="VECTOR_BACKEND")
+    LOCAL_VECTOR_DIR: str = "data/vector_index"
+    LOCAL_VECTOR_DTYPE: str = "float16"  # "float16" or "int8"
+    LOCAL_VECTOR_SEARCH: str = "flat"  # "flat" (exact) or "ivf"
+    LOCAL_VECTOR_IVF_LISTS: int = 64
+    LOCAL_VECTOR_IVF_PROBES: int = 8
+    # Comma-separated Qdrant collections served from a local in-RAM mirror (copied from Qdrant at startup)
+    LOCAL_HOT_COLLECTIONS: str = Field(default="", env="LOCAL_HOT_COLLECTIONS")
+
+    # Per-collection retrieval timeouts (seconds); a slow collection degrades to empty context
+    QNA_RETRIEVAL_TIMEOUT_SECONDS: float = 5.0
+    CASE_RETRIEVAL_TIMEOUT_SECONDS: float = 5.0
+
+    # Retrieval result cache; entries are also invalidated when a collection is ingested into
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = 1024
+    RETRIEVAL_CACHE_TTL_SECONDS: float = 600
+
+    # Semantic cache of chat agent answers (backend/chat_cache.py): a question asked without
+    # conversation context is answered from the cache when a cached question in the same language
+    # is at least CHAT_CACHE_SIMILARITY_THRESHOLD cosine-similar and mentions the same numbers
+    CHAT_CACHE_ENABLED: bool = Field(default=True, env="CHAT_CACHE_ENABLED")
+    CHAT_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    CHAT_CACHE_TTL_SECONDS: float = 24 * 3600
+    CHAT_CACHE_MAX_ENTRIES: int = 5000  # Per language
+
+    # How the AI judge is evaluated relative to the AI lawyer when both are called in a turn:
+    # "sequential" (judge sees the lawyer's reply), "speculative" (judge runs concurrently and is
+    # re-run only if it needs the reply) or "two_phase" (a quick intervene/silent triage runs
+    # concurrently; the full judge call only happens when it says intervene)
+    JUDGE_EVALUATION_MODE: str = Field(default="speculative", env="JUDGE_EVALUATION_MODE")
+
+    # Prompt size limits per role (estimated tokens). Whatever the fixed template leaves is split
+    # between retrieved context (highest score first) and debate history (most recent first).
+    LAWYER_PROMPT_TOKEN_BUDGET: int = 6000
+    JUDGE_PROMPT_TOKEN_BUDGET: int = 8000
+    PROMPT_CONTEXT_SHARE: float = 0.6
+    PROMPT_CONTEXT_MAX_TOKENS: int = 3000
+    JUDGE_TRIAGE_HISTORY_TOKENS: int = 500
+    # The human's statement and the AI lawyer's reply are cut to this size (keeping their start
+    # and end) before they go into a prompt, so one long paste cannot blow the budgets above
+    PROMPT_STATEMENT_MAX_TOKENS: int = 1500
+
+    # Rolling history summary: prompts get the newest HISTORY_VERBATIM_TURNS turns verbatim plus a
+    # summary of everything older, which a background Gemini call updates once at least
+    # HISTORY_SUMMARY_BATCH_TURNS turns have left the verbatim window
+    HISTORY_VERBATIM_TURNS: int = 8
+    HISTORY_SUMMARY_BATCH_TURNS: int = 4
+    HISTORY_SUMMARY_MAX_TOKENS: int = 400
+
+    # Case/session persistence: "sqlite" (WAL, one row per turn; safe across workers), "journal"
+    # (append-only log, compacted once it grows to CASE_JOURNAL_COMPACT_RATIO times its size after the
+    # last compaction) or "json" (the original whole-file cases.json/sessions.json rewrites)
+    CASE_STORE_BACKEND: str = Field(default="sqlite", env="CASE_STORE_BACKEND")
+    CASE_DATA_DIR: str = "data"
+    CASE_JOURNAL_COMPACT_MIN_BYTES: int = 1 << 20
+    CASE_JOURNAL_COMPACT_RATIO: float = 2.0
+    # Write-behind: case/session writes are coalesced in memory and flushed off the event loop every
+    # interval, or sooner once CASE_WRITE_BEHIND_MAX_PENDING records are dirty (flushed on shutdown)
+    CASE_WRITE_BEHIND: bool = True
+    CASE_WRITE_BEHIND_INTERVAL_SECONDS: float = 1.0
+    CASE_WRITE_BEHIND_MAX_PENDING: int = 200
+    # With a shared state backend, case/session listings re-read every record's version only when a
+    # case or session was added or removed, or this long after the last full read; in between only
+    # the listed page is refreshed, so other workers' reordering of sessions may show this late
+    CASE_SYNC_INTERVAL_SECONDS: float = 5.0
+
+    # In-memory turn-based debate sessions (StateManager): at most STATE_SESSION_MAX_SESSIONS are kept
+    # (least recently used evicted first) and sessions idle for STATE_SESSION_IDLE_TTL_SECONDS are
+    # evicted by a background sweeper. Set STATE_SESSION_SPILL_DIR to write evicted sessions to disk
+    # so they can be resumed; spilled files are deleted after STATE_SESSION_SPILL_TTL_SECONDS.
+    STATE_SESSION_MAX_SESSIONS: int = 1000
+    STATE_SESSION_IDLE_TTL_SECONDS: float = 2 * 3600
+    STATE_SESSION_SWEEP_INTERVAL_SECONDS: float = 60
+    STATE_SESSION_SPILL_DIR: Optional[str] = Field(default=None, env="STATE_SESSION_SPILL_DIR")
+    STATE_SESSION_SPILL_TTL_SECONDS: float = 7 * 24 * 3600
+    # With a shared state backend (SHARED_STATE_URL, see backend/shared_state.py) debate sessions live
+    # there instead, so any worker can serve any turn; they expire this long after their last update.
+    STATE_SESSION_SHARED_TTL_SECONDS: float = 7 * 24 * 3600
+
+    # Checkpoints of the debate workflow (StateManager.run_turn), kept while a turn is in flight so an
+    # interrupted turn can be finished by any worker. Stored in DEBATE_CHECKPOINT_URL (same URL schemes
+    # as SHARED_STATE_URL), or the shared state backend if unset.
+    DEBATE_CHECKPOINT_URL: Optional[str] = Field(default=None, env="DEBATE_CHECKPOINT_URL")
+    DEBATE_CHECKPOINT_TTL_SECONDS: float = 24 * 3600
+    # A running turn holds a lease on its session so overlapping requests get a 409 instead of re-running
+    # it; the lease expires after this long (well past an LLM call's deadline) if its worker dies
+    DEBATE_TURN_LEASE_SECONDS: float = 180.0
+
+    @property
+    def hot_collections(self) -> List[str]:
+        return [name.strip() for name in self.LOCAL_HOT_COLLECTIONS.split(",") if name.strip()]
+
     class Config:
         env_file = ".env"
         env_file_encoding = 'utf-8'
@@ -1,12 +1,15 @@
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from dotenv import load_dotenv
 from backend.ai_court.core.config import settings
+from backend.ai_court.core.startup import startup_registry
 
 # Load environment variables at the very beginning
 load_dotenv()
 
-def get_embedding_model():
+def _load_embedding_model():
     """Initializes and returns the HuggingFace embedding model."""
+    # Imported here so that importing this module does not pull in torch
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
     try:
         model = HuggingFaceEmbedding(model_name=settings.EMBEDDING_MODEL_NAME)
         print(f"Embedding model '{settings.EMBEDDING_MODEL_NAME}' loaded successfully.")
@@ -14,4 +17,12 @@ def get_embedding_model():
     except Exception as e:
         raise RuntimeError(f"Failed to load embedding model: {e}")
 
-embedding_model = get_embedding_model()
+startup_registry.register("embedding_model", _load_embedding_model)
+
+def get_embedding_model():
+    """Returns the embedding model, loading it on first use."""
+    return startup_registry.get("embedding_model")
+
+async def aget_embedding_model():
+    """Returns the embedding model, loading it off the event loop on first use."""
+    return await startup_registry.aget("embedding_model")
@@ -0,0 +1,167 @@
+import asyncio
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.ai_court.core.config import settings
+from backend.ai_court.core.embedding import aget_embedding_model
+
+def normalize_query(query: str) -> str:
+    """Normalizes query text for cache lookups (case and whitespace insensitive).
+
+    BGE models use an uncased tokenizer, so queries that differ only in case
+    or spacing produce the same embedding.
+    """
+    return " ".join(query.lower().split())
+
+class QueryEmbeddingCache:
+    """
+    Bounded in-process LRU of query embeddings keyed by embedding model name
+    and normalized query text, with an optional SQLite-backed second tier
+    that survives restarts.
+    """
+    def __init__(self, max_entries: int = 2048, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_path:
+            self._open_disk_tier(disk_path)
+
+    def _open_disk_tier(self, disk_path: str):
+        """Open (or create) the on-disk second tier"""
+        try:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "model TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, query))"
+            )
+            self._disk.commit()
+        except Exception as e:
+            print(f"Warning: Could not open embedding cache at {disk_path}: {e}")
+            self._disk = None
+
+    def get(self, model_name: str, query: str) -> Optional[List[float]]:
+        """Return the cached embedding for a query, or None on a miss"""
+        key = (model_name, normalize_query(query))
+        embedding = self._get_memory(key)
+        if embedding is None:
+            embedding = self._get_disk(key)
+        return embedding
+
+    async def aget(self, model_name: str, query: str) -> Optional[List[float]]:
+        """get() for async callers: the disk tier is read in a thread"""
+        key = (model_name, normalize_query(query))
+        embedding = self._get_memory(key)
+        if embedding is None:
+            embedding = await asyncio.to_thread(self._get_disk, key)
+        return embedding
+
+    def put(self, model_name: str, query: str, embedding: List[float]):
+        """Add an embedding to the cache (and to the disk tier if enabled)"""
+        key = (model_name, normalize_query(query))
+        with self._lock:
+            self._store(key, embedding)
+        self._persist(key, embedding)
+
+    async def aput(self, model_name: str, query: str, embedding: List[float]):
+        """put() for async callers: the disk tier is written in a thread"""
+        key = (model_name, normalize_query(query))
+        with self._lock:
+            self._store(key, embedding)
+        if self._disk is not None:
+            await asyncio.to_thread(self._persist, key, embedding)
+
+    def _get_memory(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            elif self._disk is None:
+                self.misses += 1
+            return embedding
+
+    def _get_disk(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        # Only called after a memory miss
+        if self._disk is None:
+            return None
+        # The disk tier has its own lock so memory lookups never wait on SQLite
+        with self._disk_lock:
+            row = self._disk.execute(
+                "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?", key
+            ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            embedding = array("f", row[0]).tolist()
+            self._store(key, embedding)
+            self.disk_hits += 1
+            return embedding
+
+    def _persist(self, key: Tuple[str, str], embedding: List[float]):
+        if self._disk is None:
+            return
+        try:
+            with self._disk_lock:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (model, query, vector) VALUES (?, ?, ?)",
+                    (*key, array("f", embedding).tobytes())
+                )
+                self._disk.commit()
+        except Exception as e:
+            print(f"Warning: Could not persist query embedding: {e}")
+
+    def _store(self, key: Tuple[str, str], embedding: List[float]):
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all in-memory entries and reset counters (disk tier is kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_tier": self._disk is not None
+            }
+
+# Shared by the QnA and case-law query engines
+query_embedding_cache = QueryEmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    disk_path=settings.EMBEDDING_CACHE_PATH
+)
+
+async def get_query_embedding(query: str) -> List[float]:
+    """Return the query embedding; the disk tier and the model both run off the event loop."""
+    model_name = settings.EMBEDDING_MODEL_NAME
+    embedding = await query_embedding_cache.aget(model_name, query)
+    if embedding is None:
+        embedding_model = await aget_embedding_model()
+        embedding = await asyncio.to_thread(embedding_model.get_query_embedding, query)
+        await query_embedding_cache.aput(model_name, query, embedding)
+    return embedding
@@ -4,15 +4,18 @@ from llama_index.vector_stores.qdrant import QdrantVectorStore
 from qdrant_client import AsyncQdrantClient
 from dotenv import load_dotenv
 
-from backend.ai_court.core.embedding import embedding_model
-from backend.ai_court.core.qdrant_client import qdrant_client_instance
+from backend.ai_court.core.embedding import aget_embedding_model
 from backend.ai_court.core.config import settings
+from backend.ai_court.core.startup import startup_registry
+from backend.ai_court.core.local_vector_store import (
+    LocalVectorStore, MirroredVectorStore, snapshot_qdrant_collection
+)
 
 # Load environment variables at the very beginning
 load_dotenv()
 
 # --- LlamaIndex Settings Initialization (replaces ServiceContext) ---
-Settings.embed_model = embedding_model
+# Settings.embed_model is assigned once the embedding model has loaded (see _load_vector_indexes)
 Settings.chunk_size = 1024  # You can make these configurable in settings.py
 Settings.chunk_overlap = 200
 
@@ -25,62 +28,124 @@ node_parser = SimpleNodeParser.from_defaults(
     include_metadata=True
 )
 
+# --- Vector backend selection ---
+# "qdrant" talks to the remote cluster; "local" runs both collections from the
+# embedded index with no network access. Collections listed in
+# LOCAL_HOT_COLLECTIONS stay on Qdrant for writes but are queried from RAM.
+USE_QDRANT = settings.VECTOR_BACKEND != "local"
+QDRANT_VECTOR_NAME = "text-dense"
+
+def create_local_vector_store(collection_name: str, mmap: bool = True, persist: bool = True) -> LocalVectorStore:
+    """Creates (or loads) an embedded vector store for a collection; persist=False keeps it in RAM only."""
+    return LocalVectorStore(
+        collection_name=collection_name,
+        persist_dir=settings.LOCAL_VECTOR_DIR if persist else None,
+        dtype=settings.LOCAL_VECTOR_DTYPE,
+        search_mode=settings.LOCAL_VECTOR_SEARCH,
+        ivf_lists=settings.LOCAL_VECTOR_IVF_LISTS,
+        ivf_probes=settings.LOCAL_VECTOR_IVF_PROBES,
+        mmap=mmap
+    )
+
 # --- Initialize Async Qdrant Client ---
 async_qdrant_client = AsyncQdrantClient(
     url=settings.QDRANT_URL,
     api_key=settings.QDRANT_API_KEY,
     timeout=10
-)
+) if USE_QDRANT else None
 
 # --- Ensure collections exist ---
 import asyncio
 
 async def ensure_collections_exist():
-    try:
-        collections = await async_qdrant_client.get_collections()
-        collection_names = [col.name for col in collections.collections]
+    collections = await async_qdrant_client.get_collections()
+    collection_names = [col.name for col in collections.collections]
+    
+    if settings.QDRANT_QNA_COLLECTION not in collection_names:
+        await async_qdrant_client.create_collection(
+            collection_name=settings.QDRANT_QNA_COLLECTION,
+            vectors_config={QDRANT_VECTOR_NAME: {"size": 1024, "distance": "Cosine"}}
+        )
+        print(f"Created collection: {settings.QDRANT_QNA_COLLECTION}")
         
-        if settings.QDRANT_QNA_COLLECTION not in collection_names:
-            await async_qdrant_client.create_collection(
-                collection_name=settings.QDRANT_QNA_COLLECTION,
-                vectors_config={"text-dense": {"size": 1024, "distance": "Cosine"}}
-            )
-            print(f"Created collection: {settings.QDRANT_QNA_COLLECTION}")
-            
-        if settings.QDRANT_CASE_COLLECTION not in collection_names:
-            await async_qdrant_client.create_collection(
-                collection_name=settings.QDRANT_CASE_COLLECTION,
-                vectors_config={"text-dense": {"size": 1024, "distance": "Cosine"}}
-            )
-            print(f"Created collection: {settings.QDRANT_CASE_COLLECTION}")
-            
-    except Exception as e:
-        print(f"Warning: Could not ensure collections exist: {e}")
-
-# Run collection creation (this will be called during import)
-try:
-    asyncio.run(ensure_collections_exist())
-except Exception as e:
-    print(f"Warning: Could not create collections during import: {e}")
-
-# --- Initialize Qdrant Vector Stores for LlamaIndex ---
-legal_qna_vector_store = QdrantVectorStore(
-    aclient=async_qdrant_client,
-    collection_name=settings.QDRANT_QNA_COLLECTION,
-    vector_name="text-dense"
-)
+    if settings.QDRANT_CASE_COLLECTION not in collection_names:
+        await async_qdrant_client.create_collection(
+            collection_name=settings.QDRANT_CASE_COLLECTION,
+            vectors_config={QDRANT_VECTOR_NAME: {"size": 1024, "distance": "Cosine"}}
+        )
+        print(f"Created collection: {settings.QDRANT_CASE_COLLECTION}")
 
-case_law_vector_store = QdrantVectorStore(
-    aclient=async_qdrant_client,
-    collection_name=settings.QDRANT_CASE_COLLECTION,
-    vector_name="text-dense"
-)
+async def refresh_hot_collections(mirrors: dict):
+    """Snapshot hot Qdrant collections into their local mirrors."""
+    for collection_name, mirror in mirrors.items():
+        try:
+            count = await snapshot_qdrant_collection(async_qdrant_client, collection_name, QDRANT_VECTOR_NAME, mirror)
+            print(f"Mirrored {count} vectors from '{collection_name}' into local RAM")
+        except Exception as e:
+            print(f"Warning: Could not mirror hot collection '{collection_name}': {e}")
 
-# --- Initialize LlamaIndex VectorStoreIndex instances ---
-legal_qna_index = VectorStoreIndex.from_vector_store(
-    vector_store=legal_qna_vector_store
-)
+# Local mirrors for hot collections, held in RAM by each process and never
+# written to disk: a copy on disk would go stale as other workers and ingest
+# paths write to Qdrant, and workers sharing LOCAL_VECTOR_DIR would overwrite
+# each other's files. Copied from Qdrant by _prepare_vector_backend on every
+# startup, before the vector stores are built.
+hot_collection_mirrors = {}
 
-case_law_index = VectorStoreIndex.from_vector_store(
-    vector_store=case_law_vector_store
-)
+async def _prepare_vector_backend():
+    """Makes sure the Qdrant collections exist and copies the hot ones into fresh mirrors."""
+    await ensure_collections_exist()
+    mirrors = {
+        name: create_local_vector_store(name, mmap=False, persist=False)
+        for name in settings.hot_collections
+    }
+    await refresh_hot_collections(mirrors)
+    hot_collection_mirrors.update(mirrors)
+    return async_qdrant_client
+
+def create_vector_store(collection_name: str):
+    """Returns the LlamaIndex vector store for a collection on the configured backend."""
+    if not USE_QDRANT:
+        return create_local_vector_store(collection_name)
+
+    qdrant_store = QdrantVectorStore(
+        aclient=async_qdrant_client,
+        collection_name=collection_name,
+        vector_name=QDRANT_VECTOR_NAME
+    )
+    mirror = hot_collection_mirrors.get(collection_name)
+    if mirror is not None and len(mirror) > 0:
+        return MirroredVectorStore(primary=qdrant_store, mirror=mirror)
+    return qdrant_store
+
+class VectorIndexes:
+    """Vector stores and LlamaIndex VectorStoreIndex instances for both collections."""
+    def __init__(self):
+        self.legal_qna_vector_store = create_vector_store(settings.QDRANT_QNA_COLLECTION)
+        self.case_law_vector_store = create_vector_store(settings.QDRANT_CASE_COLLECTION)
+
+        self.legal_qna_index = VectorStoreIndex.from_vector_store(
+            vector_store=self.legal_qna_vector_store
+        )
+        self.case_law_index = VectorStoreIndex.from_vector_store(
+            vector_store=self.case_law_vector_store
+        )
+
+async def _load_vector_indexes() -> VectorIndexes:
+    Settings.embed_model = await aget_embedding_model()
+    if USE_QDRANT:
+        # Hot mirrors must be filled before deciding which store serves queries
+        try:
+            await startup_registry.aget("qdrant_collections")
+        except RuntimeError as e:
+            print(f"Warning: Continuing without Qdrant collection setup: {e}")
+    return await asyncio.to_thread(VectorIndexes)
+
+# Qdrant being unreachable degrades retrieval to empty context rather than
+# taking the courtroom down, so it does not gate readiness.
+if USE_QDRANT:
+    startup_registry.register("qdrant_collections", _prepare_vector_backend, critical=False)
+startup_registry.register("vector_indexes", _load_vector_indexes)
+
+async def aget_vector_indexes() -> VectorIndexes:
+    """Returns the vector stores and indexes, building them on first use."""
+    return await startup_registry.aget("vector_indexes")
@@ -2,11 +2,12 @@ import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 from backend.ai_court.core.config import settings
+from backend.ai_court.core.startup import startup_registry
 
 # Load environment variables at the very beginning
 load_dotenv()
 
-def get_gemini_model():
+def _load_gemini_model():
     """Initializes and returns the Gemini GenerativeModel."""
     if not settings.GOOGLE_API_KEY:
         raise ValueError("GOOGLE_API_KEY environment variable not set.")
@@ -19,4 +20,8 @@ def get_gemini_model():
     except Exception as e:
         raise RuntimeError(f"Failed to initialize Gemini model: {e}. Please check GOOGLE_API_KEY.")
 
-gemini_model = get_gemini_model()
+startup_registry.register("gemini_model", _load_gemini_model)
+
+def get_gemini_model():
+    """Returns the Gemini model, initializing it on first use."""
+    return startup_registry.get("gemini_model")
@@ -0,0 +1,537 @@
+"""
+Embedded vector index used as an offline stand-in for Qdrant and as a
+zero-network hot tier for frequently queried collections.
+
+Vectors are kept as unit-normalized float16 or int8 (with per-row scales)
+NumPy matrices, persisted as .npy files and memory-mapped on load. Rows added
+after the last full write are appended to a log next to the .npy files, which
+is folded back in once it outgrows them. Search is
+exact brute force over the matrix, or IVF (spherical k-means coarse lists)
+for larger collections. Payloads use the same node layout as the LlamaIndex
+Qdrant integration, so metadata filters and node reconstruction behave the
+same on both backends.
+"""
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import PrivateAttr
+
+from llama_index.core.schema import BaseNode, TextNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    MetadataFilter,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+
+# Rows scored per matrix multiply; bounds the float32 temporary for large collections
+_SCORE_BLOCK_ROWS = 65536
+# IVF needs a few points per list before it beats brute force
+_IVF_MIN_POINTS_PER_LIST = 32
+_IVF_TRAIN_ITERATIONS = 10
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def _filter_value_matches(value: Any, metadata_filter: MetadataFilter) -> bool:
+    """Evaluate a single LlamaIndex MetadataFilter against a payload value"""
+    operator = getattr(metadata_filter.operator, "value", metadata_filter.operator)
+    expected = metadata_filter.value
+
+    if operator == "is_empty":
+        return value is None or value == "" or value == []
+    if value is None:
+        return operator in ("!=", "nin")
+    try:
+        if operator == "==":
+            return value == expected
+        if operator == "!=":
+            return value != expected
+        if operator == ">":
+            return value > expected
+        if operator == "<":
+            return value < expected
+        if operator == ">=":
+            return value >= expected
+        if operator == "<=":
+            return value <= expected
+        if operator == "in":
+            return value in expected
+        if operator == "nin":
+            return value not in expected
+        if operator == "contains":
+            return expected in value
+        if operator == "any":
+            return any(item in value for item in expected)
+        if operator == "all":
+            return all(item in value for item in expected)
+        if operator == "text_match":
+            return str(expected) in str(value)
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported metadata filter operator: {operator}")
+
+def _payload_matches(payload: Dict[str, Any], filters: MetadataFilters) -> bool:
+    results = []
+    for metadata_filter in filters.filters:
+        if isinstance(metadata_filter, MetadataFilters):
+            results.append(_payload_matches(payload, metadata_filter))
+        else:
+            results.append(_filter_value_matches(payload.get(metadata_filter.key), metadata_filter))
+
+    condition = getattr(filters.condition, "value", filters.condition) or "and"
+    if condition == "or":
+        return any(results)
+    if condition == "not":
+        return not any(results)
+    return all(results)
+
+def _payload_to_node(payload: Dict[str, Any], node_id: str) -> BaseNode:
+    try:
+        node = metadata_dict_to_node(payload)
+    except Exception:
+        # Payloads written outside LlamaIndex: treat everything but the text as metadata
+        metadata = {key: value for key, value in payload.items() if key != "text"}
+        node = TextNode(text=payload.get("text", ""), metadata=metadata)
+    node.id_ = node_id
+    return node
+
+def _read_log(path: Path, dtype: Any) -> np.ndarray:
+    return np.fromfile(path, dtype=dtype) if path.exists() else np.empty(0, dtype=dtype)
+
+class LocalVectorStore(BasePydanticVectorStore):
+    """In-process vector store with brute-force or IVF search and payload filtering."""
+
+    stores_text: bool = True
+    flat_metadata: bool = False
+
+    collection_name: str
+    persist_dir: Optional[str] = None
+    dtype: str = "float16"  # "float16" or "int8"
+    search_mode: str = "flat"  # "flat" or "ivf"
+    ivf_lists: int = 64
+    ivf_probes: int = 8
+    mmap: bool = True
+
+    _vectors: Optional[np.ndarray] = PrivateAttr(default=None)
+    _scales: Optional[np.ndarray] = PrivateAttr(default=None)
+    _ids: List[str] = PrivateAttr(default_factory=list)
+    _payloads: List[Dict[str, Any]] = PrivateAttr(default_factory=list)
+    _centroids: Optional[np.ndarray] = PrivateAttr(default=None)
+    _ivf_lists: List[np.ndarray] = PrivateAttr(default_factory=list)
+    _ivf_trained_size: int = PrivateAttr(default=0)
+    # Rows in the last full write, and rows on disk including the append log (None: rows
+    # were dropped since, so the next write is a full one)
+    _snapshot_rows: int = PrivateAttr(default=0)
+    _persisted_rows: Optional[int] = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.RLock)
+
+    def __init__(self, **data: Any):
+        super().__init__(**data)
+        if self.dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported local vector dtype: {self.dtype}")
+        if self.persist_dir:
+            self._load()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LocalVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # --- Storage ---
+
+    @property
+    def _collection_dir(self) -> Optional[Path]:
+        if not self.persist_dir:
+            return None
+        return Path(self.persist_dir) / self.collection_name
+
+    def _load(self):
+        """Load a persisted collection (vectors are memory-mapped when enabled)"""
+        collection_dir = self._collection_dir
+        nodes_file = collection_dir / "nodes.json"
+        if not nodes_file.exists():
+            return
+        mmap_mode = "r" if self.mmap else None
+        with open(nodes_file, "r") as f:
+            data = json.load(f)
+        self._ids = data["ids"]
+        self._payloads = data["payloads"]
+        self._vectors = np.load(collection_dir / "vectors.npy", mmap_mode=mmap_mode)
+        scales_file = collection_dir / "scales.npy"
+        self._scales = np.load(scales_file) if scales_file.exists() else None
+        self._snapshot_rows = self._persisted_rows = len(self._ids)
+        if self._replay_log(collection_dir):
+            # Fold the log into the .npy files so the vectors can be memory-mapped again
+            self.persist()
+            self._vectors = np.load(collection_dir / "vectors.npy", mmap_mode=mmap_mode)
+        if self.search_mode == "ivf":
+            self._train_ivf()
+        print(f"Loaded local vector collection '{self.collection_name}' ({len(self._ids)} vectors)")
+
+    def _replay_log(self, collection_dir: Path) -> bool:
+        """Append the rows in the append log to the loaded collection. Returns whether there was a log."""
+        nodes_log = collection_dir / "nodes.log"
+        if not nodes_log.exists():
+            return False
+        records = []
+        with open(nodes_log, "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn final record from a crash
+                    break
+        dim = self._vectors.shape[1]
+        vectors = _read_log(collection_dir / "vectors.log", self._vectors.dtype)
+        count = min(len(records), len(vectors) // dim)
+        if self._scales is not None:
+            scales = _read_log(collection_dir / "scales.log", np.float32)
+            count = min(count, len(scales))
+            self._scales = np.concatenate([self._scales, scales[:count]])
+        # The node record is written last, so rows without one never finished
+        self._vectors = np.concatenate([np.asarray(self._vectors), vectors[:count * dim].reshape(count, dim)])
+        self._ids = self._ids + [record["id"] for record in records[:count]]
+        self._payloads = self._payloads + [record["payload"] for record in records[:count]]
+        return True
+
+    def persist(self, persist_path: Optional[str] = None, fs: Any = None) -> None:
+        """Write the whole collection to disk (atomic per file) and clear the append log"""
+        collection_dir = Path(persist_path) if persist_path else self._collection_dir
+        if collection_dir is None:
+            return
+        collection_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if self._vectors is None:
+                return
+            self._atomic_save(collection_dir / "vectors.npy", np.asarray(self._vectors))
+            if self._scales is not None:
+                self._atomic_save(collection_dir / "scales.npy", self._scales)
+            tmp_file = collection_dir / "nodes.json.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump({"ids": self._ids, "payloads": self._payloads}, f, default=str)
+            os.replace(tmp_file, collection_dir / "nodes.json")
+            if collection_dir == self._collection_dir:
+                for log_name in ("nodes.log", "vectors.log", "scales.log"):
+                    (collection_dir / log_name).unlink(missing_ok=True)
+                self._snapshot_rows = self._persisted_rows = len(self._ids)
+
+    def _persist_new_rows(self):
+        """
+        Append the rows added since the last write to the append log, so an
+        ingest costs time proportional to its own size. Falls back to a full
+        write when rows were dropped or the log has outgrown the .npy files.
+        """
+        collection_dir = self._collection_dir
+        if collection_dir is None:
+            return
+        with self._lock:
+            start, count = self._persisted_rows, len(self._ids)
+            if start is None or self._snapshot_rows == 0 or count - self._snapshot_rows > self._snapshot_rows:
+                self.persist()
+                return
+            if start == count:
+                return
+            # Vectors first and the node records last: a row counts once its node record is complete
+            with open(collection_dir / "vectors.log", "ab") as f:
+                f.write(np.ascontiguousarray(self._vectors[start:]).tobytes())
+            if self._scales is not None:
+                with open(collection_dir / "scales.log", "ab") as f:
+                    f.write(self._scales[start:].astype(np.float32).tobytes())
+            with open(collection_dir / "nodes.log", "a") as f:
+                for node_id, payload in zip(self._ids[start:], self._payloads[start:]):
+                    f.write(json.dumps({"id": node_id, "payload": payload}, default=str) + "\n")
+            self._persisted_rows = count
+
+    @staticmethod
+    def _atomic_save(path: Path, array: np.ndarray):
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+    # --- Writes ---
+
+    def _encode(self, embeddings: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        unit = _normalize(embeddings.astype(np.float32))
+        if self.dtype == "int8":
+            scales = np.abs(unit).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            return np.round(unit / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return unit.astype(np.float16), None
+
+    def add_embeddings(self, ids: List[str], embeddings: List[List[float]],
+                       payloads: List[Dict[str, Any]], persist: bool = True) -> List[str]:
+        """Upsert raw vectors with their payloads"""
+        if not ids:
+            return []
+        encoded, scales = self._encode(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            existing = {node_id: row for row, node_id in enumerate(self._ids)}
+            replaced = [existing[node_id] for node_id in ids if node_id in existing]
+            if replaced:
+                self._drop_rows(replaced)
+
+            if self._vectors is None:
+                self._vectors = encoded
+                self._scales = scales
+            else:
+                self._vectors = np.concatenate([np.asarray(self._vectors), encoded])
+                if scales is not None:
+                    self._scales = np.concatenate([self._scales, scales])
+            self._ids = self._ids + list(ids)
+            self._payloads = self._payloads + list(payloads)
+            self._update_ivf(first_new_row=len(self._ids) - len(ids))
+
+        if persist:
+            self._persist_new_rows()
+        return list(ids)
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        ids = [node.node_id for node in nodes]
+        embeddings = [node.get_embedding() for node in nodes]
+        payloads = [
+            node_to_metadata_dict(node, remove_text=False, flat_metadata=self.flat_metadata)
+            for node in nodes
+        ]
+        return self.add_embeddings(ids, embeddings, payloads)
+
+    # Searches and writes are NumPy work over the whole matrix (plus a rewrite of the
+    # persisted files); async callers run them in a thread so the event loop keeps going
+
+    async def async_add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        return await asyncio.to_thread(self.add, nodes, **add_kwargs)
+
+    async def adelete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        await asyncio.to_thread(self.delete, ref_doc_id, **delete_kwargs)
+
+    async def aquery(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        return await asyncio.to_thread(self.query, query, **kwargs)
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        with self._lock:
+            rows = [
+                row for row, payload in enumerate(self._payloads)
+                if payload.get("ref_doc_id") == ref_doc_id or payload.get("doc_id") == ref_doc_id
+            ]
+            if not rows:
+                return
+            self._drop_rows(rows)
+            if self.search_mode == "ivf":
+                self._train_ivf()
+        self.persist()
+
+    def _drop_rows(self, rows: List[int]):
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[rows] = False
+        self._vectors = np.asarray(self._vectors)[keep]
+        if self._scales is not None:
+            self._scales = self._scales[keep]
+        self._ids = [node_id for node_id, k in zip(self._ids, keep) if k]
+        self._payloads = [payload for payload, k in zip(self._payloads, keep) if k]
+        self._centroids = None
+        self._persisted_rows = None
+
+    # --- IVF ---
+
+    def _decoded(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        vectors = self._vectors if rows is None else self._vectors[rows]
+        decoded = np.asarray(vectors, dtype=np.float32)
+        if self._scales is not None:
+            scales = self._scales if rows is None else self._scales[rows]
+            decoded = decoded * scales[:, None]
+        return decoded
+
+    def _assign(self, first_row: int = 0) -> np.ndarray:
+        assignments = []
+        for start in range(first_row, len(self._ids), _SCORE_BLOCK_ROWS):
+            rows = np.arange(start, min(start + _SCORE_BLOCK_ROWS, len(self._ids)))
+            assignments.append(np.argmax(self._decoded(rows) @ self._centroids.T, axis=1))
+        return np.concatenate(assignments) if assignments else np.empty(0, dtype=np.int64)
+
+    def _train_ivf(self):
+        """Spherical k-means over a sample of the collection"""
+        count = len(self._ids)
+        num_lists = min(self.ivf_lists, count // _IVF_MIN_POINTS_PER_LIST)
+        if num_lists < 2:
+            self._centroids = None
+            return
+
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(count, size=min(count, num_lists * 256), replace=False))
+        sample = self._decoded(sample_rows)
+        centroids = sample[rng.choice(len(sample), size=num_lists, replace=False)].copy()
+        for _ in range(_IVF_TRAIN_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(num_lists):
+                members = sample[assignment == list_id]
+                if len(members):
+                    centroids[list_id] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        self._centroids = centroids
+        assignments = self._assign()
+        self._ivf_lists = [np.flatnonzero(assignments == list_id) for list_id in range(num_lists)]
+        self._ivf_trained_size = count
+
+    def _update_ivf(self, first_new_row: int):
+        if self.search_mode != "ivf":
+            return
+        # Retrain when the collection has grown well past the training set
+        if self._centroids is None or len(self._ids) > 4 * self._ivf_trained_size:
+            self._train_ivf()
+            return
+        new_assignments = self._assign(first_new_row)
+        # Copy-on-write: a search running in another thread keeps the lists that match its
+        # snapshot of the vectors, so it never sees rows past the end of its matrix
+        ivf_lists = list(self._ivf_lists)
+        for list_id in np.unique(new_assignments):
+            new_rows = first_new_row + np.flatnonzero(new_assignments == list_id)
+            ivf_lists[list_id] = np.concatenate([ivf_lists[list_id], new_rows])
+        self._ivf_lists = ivf_lists
+
+    # --- Search ---
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.query_embedding is None:
+            raise ValueError("LocalVectorStore requires a query embedding")
+
+        with self._lock:
+            vectors, scales = self._vectors, self._scales
+            ids, payloads = self._ids, self._payloads
+            centroids, ivf_lists = self._centroids, self._ivf_lists
+
+        if vectors is None or not ids:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        query_vector = _normalize(np.asarray([query.query_embedding], dtype=np.float32))[0]
+
+        candidates: Optional[np.ndarray] = None
+        if self.search_mode == "ivf" and centroids is not None:
+            probes = np.argsort(-(centroids @ query_vector))[:self.ivf_probes]
+            candidates = np.sort(np.concatenate([ivf_lists[list_id] for list_id in probes]))
+
+        if query.filters is not None or query.doc_ids or query.node_ids:
+            rows = candidates if candidates is not None else range(len(ids))
+            doc_ids = set(query.doc_ids or [])
+            node_ids = set(query.node_ids or [])
+            candidates = np.asarray([
+                row for row in rows
+                if (not node_ids or ids[row] in node_ids)
+                and (not doc_ids or payloads[row].get("ref_doc_id") in doc_ids)
+                and (query.filters is None or _payload_matches(payloads[row], query.filters))
+            ], dtype=np.int64)
+
+        scores = self._score(vectors, scales, query_vector, candidates)
+        top_k = min(query.similarity_top_k, len(scores))
+        if top_k == 0:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        rows = top if candidates is None else candidates[top]
+
+        return VectorStoreQueryResult(
+            nodes=[_payload_to_node(payloads[row], ids[row]) for row in rows],
+            similarities=scores[top].astype(float).tolist(),
+            ids=[ids[row] for row in rows]
+        )
+
+    @staticmethod
+    def _score(vectors: np.ndarray, scales: Optional[np.ndarray],
+               query_vector: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        count = len(vectors) if rows is None else len(rows)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, _SCORE_BLOCK_ROWS):
+            end = min(start + _SCORE_BLOCK_ROWS, count)
+            block = vectors[start:end] if rows is None else vectors[rows[start:end]]
+            scores[start:end] = np.asarray(block, dtype=np.float32) @ query_vector
+        if scales is not None:
+            scores *= scales if rows is None else scales[rows]
+        return scores
+
+class MirroredVectorStore(BasePydanticVectorStore):
+    """
+    Serves queries from a local mirror while writes go to both the primary
+    (remote) store and the mirror. Used for hot collections.
+    """
+
+    stores_text: bool = True
+
+    primary: BasePydanticVectorStore
+    mirror: LocalVectorStore
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "MirroredVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return self.primary.client
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        ids = self.primary.add(nodes, **add_kwargs)
+        self.mirror.add(nodes)
+        return ids
+
+    async def async_add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        ids = await self.primary.async_add(nodes, **add_kwargs)
+        await asyncio.to_thread(self.mirror.add, nodes)
+        return ids
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self.primary.delete(ref_doc_id, **delete_kwargs)
+        self.mirror.delete(ref_doc_id)
+
+    async def adelete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        await self.primary.adelete(ref_doc_id, **delete_kwargs)
+        await asyncio.to_thread(self.mirror.delete, ref_doc_id)
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        return self.mirror.query(query, **kwargs)
+
+    async def aquery(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        return await asyncio.to_thread(self.mirror.query, query, **kwargs)
+
+async def snapshot_qdrant_collection(aclient: Any, collection_name: str, vector_name: str,
+                                     store: LocalVectorStore, batch_size: int = 256) -> int:
+    """Copy every point of a Qdrant collection into a local store. Returns the point count."""
+    ids: List[str] = []
+    embeddings: List[List[float]] = []
+    payloads: List[Dict[str, Any]] = []
+    offset = None
+    while True:
+        points, offset = await aclient.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=[vector_name]
+        )
+        for point in points:
+            vector = point.vector.get(vector_name) if isinstance(point.vector, dict) else point.vector
+            if vector is None:
+                continue
+            ids.append(str(point.id))
+            embeddings.append(vector)
+            payloads.append(point.payload or {})
+        if offset is None:
+            break
+
+    await asyncio.to_thread(store.add_embeddings, ids, embeddings, payloads)
+    return len(ids)
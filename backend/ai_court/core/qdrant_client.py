@@ -1,11 +1,12 @@
 import qdrant_client
 from dotenv import load_dotenv
 from backend.ai_court.core.config import settings
+from backend.ai_court.core.startup import startup_registry
 
 # Load environment variables at the very beginning
 load_dotenv()
 
-def get_qdrant_client():
+def _load_qdrant_client():
     """Initializes and returns the Qdrant client instance."""
     try:
         qdrant_client_instance = qdrant_client.QdrantClient(
@@ -22,4 +23,10 @@ def get_qdrant_client():
     except Exception as e:
         raise RuntimeError(f"Failed to connect to Qdrant: {e}. Please check QDRANT_API_KEY and URL.")
 
-qdrant_client_instance = get_qdrant_client()
+# Not needed by the request path (LlamaIndex uses the async client), so it is
+# only connected when something asks for it.
+startup_registry.register("qdrant_client", _load_qdrant_client, critical=False, preload=False)
+
+def get_qdrant_client():
+    """Returns the synchronous Qdrant client, connecting on first use."""
+    return startup_registry.get("qdrant_client")
@@ -1,22 +1,53 @@
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
 from fastapi import HTTPException
 
 from llama_index.core import VectorStoreIndex
+from llama_index.core.schema import QueryBundle
+
+from backend.ai_court.core.config import settings
+from backend.ai_court.core.embedding_cache import get_query_embedding
+from backend.ai_court.core.retrieval_cache import retrieval_cache
+
+def _empty_result(message: str = "No relevant documents found in database.") -> Dict[str, Any]:
+    return {
+        "response": message,
+        "sources": []
+    }
 
 class LegalQueryEngine:
-    def __init__(self, index: VectorStoreIndex):
+    def __init__(self, index: VectorStoreIndex, name: str, timeout: Optional[float] = None, top_k: int = 5):
         self.index = index
+        self.name = name
+        self.timeout = timeout
+        self.top_k = top_k
         # Using as_retriever to get raw nodes, not summary from LlamaIndex's built-in LLM
-        self.retriever = index.as_retriever(similarity_top_k=5)
-        
-    async def aquery(self, query: str) -> Dict[str, Any]:
+        self.retriever = index.as_retriever(similarity_top_k=top_k)
+
+    async def aquery(self, query: str, query_embedding: Optional[List[float]] = None) -> Dict[str, Any]:
         """
         Performs an asynchronous query on the LlamaIndex VectorStoreIndex
         and returns the raw source nodes with their metadata.
+
+        If query_embedding is given it is used as-is; otherwise it comes from
+        the shared query embedding cache. Hot queries are answered from the
+        retrieval result cache; misses are bounded by this engine's timeout.
         """
         try:
-            nodes = await self.retriever.aretrieve(query)
-            
+            if query_embedding is None:
+                query_embedding = await get_query_embedding(query)
+
+            cached_sources = retrieval_cache.get(self.name, query_embedding, self.top_k)
+            if cached_sources is not None:
+                return {
+                    "response": "Documents retrieved for context.",
+                    "sources": cached_sources
+                }
+
+            collection_version = retrieval_cache.collection_version(self.name)
+            query_bundle = QueryBundle(query_str=query, embedding=query_embedding)
+            nodes = await asyncio.wait_for(self.retriever.aretrieve(query_bundle), timeout=self.timeout)
+
             source_docs = []
             for node_with_score in nodes:
                 node = node_with_score.node
@@ -26,22 +57,65 @@ class LegalQueryEngine:
                     "metadata": node.metadata # Contains all extracted metadata from Qdrant payload
                 }
                 source_docs.append(source_doc)
-            
+
+            retrieval_cache.put(self.name, query_embedding, self.top_k, source_docs, version=collection_version)
             return {
                 "response": "Documents retrieved for context.",
                 "sources": source_docs
             }
-            
+
+        except asyncio.TimeoutError:
+            print(f"Qdrant retrieval from '{self.name}' timed out after {self.timeout}s")
+            return _empty_result()
         except Exception as e:
-            print(f"Error during Qdrant retrieval: {e}")
+            print(f"Error during Qdrant retrieval from '{self.name}': {e}")
             # Return empty results instead of failing completely
-            return {
-                "response": "No relevant documents found in database.",
-                "sources": []
-            }
+            return _empty_result()
+
+# Query engines are built once the indexes are available (see llama_index_setup)
+from backend.ai_court.core.llama_index_setup import aget_vector_indexes
+from backend.ai_court.core.startup import startup_registry
+
+async def _load_query_engines() -> Tuple[LegalQueryEngine, LegalQueryEngine]:
+    indexes = await aget_vector_indexes()
+    qna_query_engine = LegalQueryEngine(
+        indexes.legal_qna_index,
+        name=settings.QDRANT_QNA_COLLECTION,
+        timeout=settings.QNA_RETRIEVAL_TIMEOUT_SECONDS
+    )
+    case_query_engine = LegalQueryEngine(
+        indexes.case_law_index,
+        name=settings.QDRANT_CASE_COLLECTION,
+        timeout=settings.CASE_RETRIEVAL_TIMEOUT_SECONDS
+    )
+    return qna_query_engine, case_query_engine
+
+startup_registry.register("query_engines", _load_query_engines)
+
+async def get_query_engines() -> Tuple[LegalQueryEngine, LegalQueryEngine]:
+    """Returns (qna_query_engine, case_query_engine), building them on first use."""
+    return await startup_registry.aget("query_engines")
+
+async def retrieve_debate_context(query: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Retrieves QnA and case-law context for a debate turn in a single stage.
+
+    Both collections share the same embedding model, so the query is embedded
+    once and both searches are sent concurrently. Each search has its own
+    timeout; a slow or failing collection comes back as an empty result.
 
-# Initialize query engines using the setup from llama_index_setup
-from backend.ai_court.core.llama_index_setup import legal_qna_index, case_law_index
+    Returns:
+        Tuple of (qna_result, case_result), each shaped like LegalQueryEngine.aquery
+    """
+    try:
+        qna_query_engine, case_query_engine = await get_query_engines()
+        query_embedding = await get_query_embedding(query)
+    except Exception as e:
+        print(f"Error embedding query for retrieval: {e}")
+        return _empty_result(), _empty_result()
 
-qna_query_engine = LegalQueryEngine(legal_qna_index)
-case_query_engine = LegalQueryEngine(case_law_index)
+    qna_result, case_result = await asyncio.gather(
+        qna_query_engine.aquery(query, query_embedding=query_embedding),
+        case_query_engine.aquery(query, query_embedding=query_embedding)
+    )
+    return qna_result, case_result
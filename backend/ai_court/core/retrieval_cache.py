@@ -0,0 +1,98 @@
+import hashlib
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.ai_court.core.config import settings
+
+def embedding_hash(embedding: List[float]) -> str:
+    """Stable hash of a query embedding (float32 bytes)"""
+    return hashlib.sha1(array("f", embedding).tobytes()).hexdigest()
+
+class RetrievalResultCache:
+    """
+    TTL + LRU cache of vector retrieval results (the `sources` list) keyed by
+    collection, query embedding hash and top_k.
+
+    Each collection has a version counter that is bumped whenever new nodes
+    are ingested into it; entries recorded under an older version are treated
+    as misses. Invalidation is per process, so other workers pick up new
+    documents at the latest when their entries expire.
+    """
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, collection_version, sources)
+        self._entries: "OrderedDict[Tuple[str, str, int], Tuple[float, int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def collection_version(self, collection: str) -> int:
+        """Current version of a collection; capture it before retrieving"""
+        with self._lock:
+            return self._versions.get(collection, 0)
+
+    def get(self, collection: str, embedding: List[float], top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """Return cached sources, or None if missing, expired or invalidated"""
+        key = (collection, embedding_hash(embedding), top_k)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, version, sources = entry
+                if expires_at > time.monotonic() and version == self._versions.get(collection, 0):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(sources)
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, collection: str, embedding: List[float], top_k: int,
+            sources: List[Dict[str, Any]], version: int):
+        """
+        Store sources retrieved under the given collection version. Results
+        fetched before an invalidation are dropped rather than cached.
+        """
+        key = (collection, embedding_hash(embedding), top_k)
+        with self._lock:
+            if version != self._versions.get(collection, 0):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, version, list(sources))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_collection(self, collection: str):
+        """Invalidate every cached result for a collection (e.g. after ingestion)"""
+        with self._lock:
+            self._versions[collection] = self._versions.get(collection, 0) + 1
+            stale = [key for key in self._entries if key[0] == collection]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "collection_versions": dict(self._versions)
+            }
+
+retrieval_cache = RetrievalResultCache(
+    max_entries=settings.RETRIEVAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RETRIEVAL_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+class BoundedSessionStore(MutableMapping):
+    """
+    Dict-like session container with a size cap and idle expiry.
+
+    - LRU: reads and writes move a session to the most recent end; inserting
+      beyond `max_sessions` evicts the least recently used one.
+    - Idle TTL: every session has one entry in an expiry heap. `sweep()` pops
+      only the entries that are due, so its cost depends on how many
+      sessions expire, not on how many exist. An entry whose session was
+      used since it was pushed is pushed again with the new deadline.
+    - Spill: with a `spill_dir`, evicted sessions are written there and
+      transparently loaded again on the next access, so an evicted debate
+      can be resumed. Spilled files older than `spill_ttl_seconds` are
+      removed by the sweeper.
+
+    Iteration, len() and items() cover in-memory sessions only and do not
+    count as use.
+    """
+    def __init__(self, max_sessions: int, idle_ttl_seconds: float,
+                 dump: Callable[[Any], str], load: Callable[[str], Any],
+                 spill_dir: Optional[str] = None, spill_ttl_seconds: Optional[float] = None):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.dump = dump
+        self.load = load
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_ttl_seconds = spill_ttl_seconds
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+        self._data: OrderedDict = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.RLock()
+        self._sweeper: Optional[asyncio.Task] = None
+        self._last_spill_purge = time.monotonic()
+
+        self.stats: Dict[str, int] = {"lru_evictions": 0, "ttl_evictions": 0, "spilled": 0, "resumed": 0}
+
+    # --- Mapping interface ---
+
+    def __getitem__(self, session_id: str) -> Any:
+        with self._lock:
+            if session_id in self._data:
+                self._touch(session_id)
+                return self._data[session_id]
+            value = self._resume(session_id)
+            if value is None:
+                raise KeyError(session_id)
+            return value
+
+    def __setitem__(self, session_id: str, value: Any):
+        with self._lock:
+            is_new = session_id not in self._data
+            self._data[session_id] = value
+            self._touch(session_id)
+            if is_new:
+                heapq.heappush(self._expiry_heap, (self._last_access[session_id] + self.idle_ttl_seconds, session_id))
+                self._remove_spilled(session_id)
+            while len(self._data) > self.max_sessions:
+                oldest = next(iter(self._data))
+                self._evict(oldest)
+                self.stats["lru_evictions"] += 1
+
+    def __delitem__(self, session_id: str):
+        with self._lock:
+            found = self._remove_spilled(session_id)
+            if session_id in self._data:
+                del self._data[session_id]
+                del self._last_access[session_id]
+                found = True
+            if not found:
+                raise KeyError(session_id)
+
+    def __contains__(self, session_id: object) -> bool:
+        with self._lock:
+            if session_id in self._data:
+                return True
+            if not isinstance(session_id, str):
+                return False
+            path = self._spill_path(session_id)
+            return path is not None and path.exists()
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def items(self):
+        with self._lock:
+            return list(self._data.items())
+
+    def values(self):
+        with self._lock:
+            return list(self._data.values())
+
+    # --- Eviction ---
+
+    def _touch(self, session_id: str):
+        self._data.move_to_end(session_id)
+        self._last_access[session_id] = time.monotonic()
+
+    def _evict(self, session_id: str):
+        value = self._data.pop(session_id)
+        del self._last_access[session_id]
+        self._spill(session_id, value)
+
+    def sweep(self) -> int:
+        """Evicts every session idle for longer than idle_ttl_seconds. Returns how many."""
+        evicted = 0
+        with self._lock:
+            now = time.monotonic()
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, session_id = heapq.heappop(self._expiry_heap)
+                if session_id not in self._data:
+                    continue  # Already evicted or deleted
+                expires_at = self._last_access[session_id] + self.idle_ttl_seconds
+                if expires_at <= now:
+                    self._evict(session_id)
+                    evicted += 1
+                else:
+                    heapq.heappush(self._expiry_heap, (expires_at, session_id))
+            self.stats["ttl_evictions"] += evicted
+            # Entries of sessions that are gone accumulate until popped; rebuild if they dominate
+            if len(self._expiry_heap) > 2 * len(self._data) + 64:
+                self._expiry_heap = [
+                    (self._last_access[session_id] + self.idle_ttl_seconds, session_id) for session_id in self._data
+                ]
+                heapq.heapify(self._expiry_heap)
+        if self.spill_dir and self.spill_ttl_seconds and time.monotonic() - self._last_spill_purge >= 3600:
+            self.purge_spilled()
+        return evicted
+
+    # --- Spill to disk ---
+
+    def _spill_path(self, session_id: str) -> Optional[Path]:
+        if not self.spill_dir:
+            return None
+        return self.spill_dir / (hashlib.sha1(session_id.encode()).hexdigest() + ".json")
+
+    def _spill(self, session_id: str, value: Any):
+        path = self._spill_path(session_id)
+        if path is None:
+            return
+        try:
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(self.dump(value))
+            os.replace(tmp_path, path)
+            self.stats["spilled"] += 1
+        except Exception as e:
+            print(f"Error spilling session {session_id}: {e}")
+
+    def _resume(self, session_id: str) -> Optional[Any]:
+        path = self._spill_path(session_id)
+        if path is None or not path.exists():
+            return None
+        try:
+            value = self.load(path.read_text())
+        except Exception as e:
+            print(f"Error resuming spilled session {session_id}: {e}")
+            return None
+        self[session_id] = value  # Also removes the spilled file
+        self.stats["resumed"] += 1
+        return value
+
+    def _remove_spilled(self, session_id: str) -> bool:
+        path = self._spill_path(session_id)
+        if path is not None and path.exists():
+            path.unlink(missing_ok=True)
+            return True
+        return False
+
+    def spill_all(self) -> int:
+        """Writes every in-memory session to the spill directory (e.g. on shutdown)"""
+        if not self.spill_dir:
+            return 0
+        with self._lock:
+            for session_id, value in self._data.items():
+                self._spill(session_id, value)
+            return len(self._data)
+
+    def purge_spilled(self) -> int:
+        """Deletes spilled sessions older than spill_ttl_seconds"""
+        self._last_spill_purge = time.monotonic()
+        if not self.spill_dir or not self.spill_ttl_seconds:
+            return 0
+        cutoff = time.time() - self.spill_ttl_seconds
+        removed = 0
+        for path in self.spill_dir.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    # --- Background sweeper ---
+
+    async def _sweep_forever(self, interval_seconds: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                evicted = await asyncio.to_thread(self.sweep)
+                if evicted:
+                    print(f"Session sweeper evicted {evicted} idle session(s); {len(self)} in memory")
+            except Exception as e:
+                print(f"Session sweeper error: {e}")
+
+    def start_sweeper(self, interval_seconds: float = 60) -> asyncio.Task:
+        """Starts the periodic sweep (call from the app lifespan)"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_forever(interval_seconds))
+        return self._sweeper
+
+    async def stop_sweeper(self):
+        if self._sweeper is not None and not self._sweeper.done():
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+        self._sweeper = None
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "in_memory": len(self._data),
+            "max_sessions": self.max_sessions,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "spill_dir": str(self.spill_dir) if self.spill_dir else None,
+            **self.stats
+        }
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+STATUS_PENDING = "pending"
+STATUS_LOADING = "loading"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+class StartupComponent:
+    """
+    A heavy resource (model, client, index) that is initialized on first use
+    or by the background warm-up, whichever comes first. Loading happens at
+    most once at a time; a failed load is retried on the next access.
+    """
+    def __init__(self, name: str, loader: Callable[[], Any], critical: bool = True, preload: bool = True):
+        self.name = name
+        self.loader = loader
+        self.critical = critical
+        self.preload = preload
+        self.is_async = asyncio.iscoroutinefunction(loader)
+
+        self.status = STATUS_PENDING
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[datetime] = None
+        self.duration_seconds: Optional[float] = None
+        self.attempts = 0
+
+        self._lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+
+    def _begin(self) -> float:
+        self.status = STATUS_LOADING
+        self.started_at = datetime.utcnow()
+        self.attempts += 1
+        return time.perf_counter()
+
+    def _finish(self, started: float, value: Any = None, error: Optional[Exception] = None):
+        self.duration_seconds = time.perf_counter() - started
+        if error is None:
+            self.value = value
+            self.error = None
+            self.status = STATUS_READY
+            print(f"✅ Startup component '{self.name}' ready in {self.duration_seconds:.2f}s")
+        else:
+            self.error = str(error)
+            self.status = STATUS_FAILED
+            print(f"❌ Startup component '{self.name}' failed after {self.duration_seconds:.2f}s: {error}")
+
+    def load(self) -> Any:
+        """Load synchronously (thread-safe). Raises if the loader fails."""
+        if self.status == STATUS_READY:
+            return self.value
+        if self.is_async:
+            raise RuntimeError(f"Component '{self.name}' must be loaded from the event loop")
+        with self._lock:
+            if self.status == STATUS_READY:
+                return self.value
+            started = self._begin()
+            try:
+                value = self.loader()
+            except Exception as e:
+                self._finish(started, error=e)
+                raise RuntimeError(f"Failed to initialize {self.name}: {e}") from e
+            self._finish(started, value=value)
+            return value
+
+    async def aload(self) -> Any:
+        """Load without blocking the event loop."""
+        if self.status == STATUS_READY:
+            return self.value
+        if not self.is_async:
+            return await asyncio.to_thread(self.load)
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            if self.status == STATUS_READY:
+                return self.value
+            started = self._begin()
+            try:
+                value = await self.loader()
+            except Exception as e:
+                self._finish(started, error=e)
+                raise RuntimeError(f"Failed to initialize {self.name}: {e}") from e
+            self._finish(started, value=value)
+            return value
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "critical": self.critical,
+            "duration_seconds": round(self.duration_seconds, 3) if self.duration_seconds is not None else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "attempts": self.attempts,
+            "error": self.error
+        }
+
+class StartupRegistry:
+    """
+    Registry of lazily initialized resources. Modules register their heavy
+    resources at import time (which is cheap); the app lifespan starts a
+    background warm-up that initializes them in parallel, and readiness
+    reflects whether every critical component is up.
+    """
+    def __init__(self):
+        self.components: Dict[str, StartupComponent] = {}
+        self.warmup_started_at: Optional[datetime] = None
+        self.warmup_seconds: Optional[float] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, loader: Callable[[], Any], critical: bool = True, preload: bool = True):
+        """Register a resource loader (sync or async). Re-registering replaces it."""
+        self.components[name] = StartupComponent(name, loader, critical=critical, preload=preload)
+
+    def _component(self, name: str) -> StartupComponent:
+        if name not in self.components:
+            raise KeyError(f"Unknown startup component: {name}")
+        return self.components[name]
+
+    def get(self, name: str) -> Any:
+        """Return a resource, loading it in the calling thread if needed."""
+        return self._component(name).load()
+
+    async def aget(self, name: str) -> Any:
+        """Return a resource, loading it off the event loop if needed."""
+        return await self._component(name).aload()
+
+    def status(self, name: str) -> str:
+        return self._component(name).status
+
+    async def warm_up(self, names: Optional[List[str]] = None):
+        """Initialize components in parallel; failures are recorded, not raised."""
+        names = names or [name for name, component in self.components.items() if component.preload]
+        self.warmup_started_at = datetime.utcnow()
+        started = time.perf_counter()
+        await asyncio.gather(*(self.aget(name) for name in names), return_exceptions=True)
+        self.warmup_seconds = time.perf_counter() - started
+        print(f"Startup warm-up finished in {self.warmup_seconds:.2f}s")
+
+    def start_background_warmup(self) -> asyncio.Task:
+        """Start warm-up as a background task (call from the app lifespan)."""
+        if self._warmup_task is None or self._warmup_task.done():
+            self._warmup_task = asyncio.create_task(self.warm_up())
+        return self._warmup_task
+
+    async def shutdown(self):
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+
+    def readiness(self) -> Dict[str, Any]:
+        """Ready once every critical component has loaded."""
+        critical = [c for c in self.components.values() if c.critical]
+        return {
+            "ready": all(c.status == STATUS_READY for c in critical),
+            "components": {name: c.status for name, c in self.components.items()}
+        }
+
+    def profile(self) -> Dict[str, Any]:
+        """Startup cost per component, slowest first."""
+        loaded = [c for c in self.components.values() if c.duration_seconds is not None]
+        return {
+            "warmup_started_at": self.warmup_started_at.isoformat() if self.warmup_started_at else None,
+            "warmup_wall_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "sum_component_seconds": round(sum(c.duration_seconds for c in loaded), 3),
+            "components": {
+                c.name: c.report()
+                for c in sorted(self.components.values(), key=lambda c: c.duration_seconds or 0, reverse=True)
+            }
+        }
+
+# Global registry
+startup_registry = StartupRegistry()
@@ -1,9 +1,18 @@
-from typing import Dict, List, Any, Optional
+import asyncio
+from typing import Callable, Dict, List, Any, Optional, TypedDict, Union
 from datetime import datetime, timedelta
 import json
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel, Field
 import hashlib
+import uuid
+
+from backend.ai_court.core.checkpoint_store import StateBackendCheckpointSaver
+from backend.ai_court.core.config import settings
+from backend.ai_court.core.llm import get_gemini_model
+from backend.ai_court.core.session_store import BoundedSessionStore
+from backend.llm_gateway import llm_gateway
+from backend.shared_state import ConcurrentUpdateError, SharedMap, create_state_backend, shared_state
 
 class DebateState(BaseModel):
     """State container for the turn-based debate flow"""
@@ -18,6 +27,10 @@ class DebateState(BaseModel):
     evidence_presented: List[Dict[str, Any]] = Field(default_factory=list)
     objections_raised: List[Dict[str, str]] = Field(default_factory=list)
     
+    # Rolling summary of the first summarized_turns messages (see HistorySummarizer)
+    history_summary: Optional[str] = None
+    summarized_turns: int = 0
+    
     # Turn management
     current_speaker: str = "judge"  # "judge", "ai_lawyer", or "user"
     waiting_for: str = "user"  # Next expected speaker
@@ -49,6 +62,8 @@ class DebateState(BaseModel):
             "debate_history": self.debate_history,
             "evidence_presented": self.evidence_presented,
             "objections_raised": self.objections_raised,
+            "history_summary": self.history_summary,
+            "summarized_turns": self.summarized_turns,
             "current_turn": self.current_turn,
             "last_updated": self.last_updated.isoformat()
         }
@@ -60,30 +75,199 @@ class DebateState(BaseModel):
             data["last_updated"] = datetime.fromisoformat(data["last_updated"])
         return cls(**data)
 
+class DebateTurn(TypedDict, total=False):
+    """Workflow state of one turn: its input and the message it produced"""
+    session_id: str
+    user_input: Optional[str]
+    role: str
+    content: str
+
+class TurnOrderError(Exception):
+    """A message arrived out of turn, e.g. another request took the turn first"""
+
 class StateManager:
     """Manages turn-based debate state and flow"""
     def __init__(self):
-        self.sessions: Dict[str, DebateState] = {}
+        self.sessions: Union[BoundedSessionStore, SharedMap]
+        if shared_state.is_shared:
+            # Every worker reads and writes the same sessions; reads return copies, so
+            # changes go through _update_state
+            self.sessions = SharedMap(
+                shared_state, "debate_state", DebateState,
+                ttl_seconds=settings.STATE_SESSION_SHARED_TTL_SECONDS
+            )
+        else:
+            self.sessions = BoundedSessionStore(
+                max_sessions=settings.STATE_SESSION_MAX_SESSIONS,
+                idle_ttl_seconds=settings.STATE_SESSION_IDLE_TTL_SECONDS,
+                dump=lambda state: state.model_dump_json(),
+                load=DebateState.model_validate_json,
+                spill_dir=settings.STATE_SESSION_SPILL_DIR,
+                spill_ttl_seconds=settings.STATE_SESSION_SPILL_TTL_SECONDS
+            )
+        # Checkpoints of in-flight turns, in DEBATE_CHECKPOINT_URL or else the shared state backend,
+        # next to the leases marking which sessions have a turn in flight
+        self._turn_backend = create_state_backend(settings.DEBATE_CHECKPOINT_URL) if settings.DEBATE_CHECKPOINT_URL else shared_state
+        self.checkpointer = StateBackendCheckpointSaver(
+            self._turn_backend,
+            namespace="debate_checkpoint",
+            ttl_seconds=settings.DEBATE_CHECKPOINT_TTL_SECONDS
+        )
+        # Compiled once and reused for every session
         self.workflow = self._create_workflow()
     
+    def start_session_sweeper(self):
+        """Start evicting idle sessions in the background (call from the app lifespan)"""
+        if isinstance(self.sessions, BoundedSessionStore):
+            self.sessions.start_sweeper(settings.STATE_SESSION_SWEEP_INTERVAL_SECONDS)
+    
+    async def shutdown(self):
+        """Stop the sweeper and spill in-memory sessions so they survive a restart"""
+        if isinstance(self.sessions, BoundedSessionStore):
+            await self.sessions.stop_sweeper()
+            await asyncio.to_thread(self.sessions.spill_all)
+    
+    def _update_state(self, session_id: str, mutate: Callable[[DebateState], bool]) -> bool:
+        """
+        Read-modify-write of one session. With a shared backend the write is a
+        compare-and-set, re-run on a fresh copy if another worker updated the
+        session meanwhile, so concurrent turns cannot overwrite each other.
+        mutate returns False to leave the session unchanged.
+        """
+        if isinstance(self.sessions, SharedMap):
+            return self.sessions.update(session_id, mutate) is not None
+        state = self.sessions.get(session_id)
+        if state is None:
+            return False
+        return mutate(state) is not False
+    
     def _create_workflow(self):
-        """Create LangGraph workflow for debate flow"""
+        """
+        Create the LangGraph workflow for one debate turn. A run starts with
+        whoever the session is waiting for:
+        
+            user -> ai_lawyer -> END
+            ai_lawyer -> END
+            judge -> END
+        
+        Each node records its message with add_message(), which also moves
+        waiting_for on, so the next run picks up where this one ended.
+        Checkpoints are keyed by session ID: a run cut short (e.g. the worker
+        died during an LLM call) is finished by the next run_turn() for that
+        session, on any worker sharing the checkpoint store.
+        """
+        workflow = StateGraph(DebateTurn)
+        
+        workflow.add_node("user", self._user_turn)
+        workflow.add_node("ai_lawyer", self._ai_lawyer_turn)
+        workflow.add_node("judge", self._judge_turn)
+        
+        workflow.add_conditional_edges(
+            START,
+            self._next_speaker,
+            {"user": "user", "ai_lawyer": "ai_lawyer", "judge": "judge"}
+        )
+        workflow.add_edge("user", "ai_lawyer")
+        workflow.add_edge("ai_lawyer", END)
+        workflow.add_edge("judge", END)
+        
+        return workflow.compile(checkpointer=self.checkpointer)
+    
+    def _next_speaker(self, turn: DebateTurn) -> str:
+        state = self.sessions.get(turn["session_id"])
+        if state is None:
+            raise KeyError(turn["session_id"])
+        return state.waiting_for
+    
+    async def _user_turn(self, turn: DebateTurn) -> Dict[str, Any]:
+        """Record the user's argument"""
+        if not self.add_message(turn["session_id"], "user", turn["user_input"]):
+            raise TurnOrderError("It is no longer the user's turn")
+        return {"role": "user", "content": turn["user_input"]}
+    
+    async def _ai_lawyer_turn(self, turn: DebateTurn) -> Dict[str, Any]:
+        """Generate and record the opposing counsel's response"""
+        return await self._speak(turn["session_id"], "ai_lawyer", self.get_ai_lawyer_prompt(turn["session_id"]))
+    
+    async def _judge_turn(self, turn: DebateTurn) -> Dict[str, Any]:
+        """Generate and record the judge's ruling or guidance"""
+        return await self._speak(turn["session_id"], "judge", self.get_judge_prompt(turn["session_id"]))
+    
+    async def _speak(self, session_id: str, role: str, prompt: str) -> Dict[str, Any]:
+        response = await llm_gateway.generate(get_gemini_model(), prompt, caller=role)
+        if not self.add_message(session_id, role, response.text):
+            raise TurnOrderError(f"The {role} turn was already taken by another request")
+        return {"role": role, "content": response.text}
+    
+    async def run_turn(self, session_id: str, user_input: Optional[str] = None) -> DebateTurn:
+        """
+        Run the workflow for the session's next turn, or finish its previous
+        turn if that was interrupted (user_input is then ignored, as the user's
+        argument was already recorded).
+        
+        Only one turn per session runs at a time: a request arriving while
+        another is still in flight (e.g. waiting on the LLM) is rejected rather
+        than mistaking that turn's checkpoint for an interrupted one.
+        
+        Returns:
+            The turn state, with the role and content of the last message produced
+        
+        Raises:
+            TurnOrderError: Another request took the turn first, or is still running one
+        """
+        lease = self._claim_turn(session_id)
+        try:
+            config = {"configurable": {"thread_id": session_id}}
+            interrupted = await self.workflow.aget_state(config)
+            turn_input = None if interrupted.next else {"session_id": session_id, "user_input": user_input}
+            try:
+                result = await self.workflow.ainvoke(turn_input, config)
+            except TurnOrderError:
+                # The turn belongs to another request; nothing here is worth resuming
+                await self.checkpointer.adelete_thread(session_id)
+                raise
+            # Finished turns need no checkpoint: the session itself records them
+            await self.checkpointer.adelete_thread(session_id)
+            return result
+        finally:
+            self._release_turn(session_id, lease)
+    
+    def _claim_turn(self, session_id: str) -> str:
+        """
+        Take the session's turn lease. It expires after DEBATE_TURN_LEASE_SECONDS,
+        so a turn whose worker died is resumed by the next request after that.
         
+        Raises:
+            TurnOrderError: Another request holds the lease
+        """
+        lease = uuid.uuid4().hex
+        try:
+            self._turn_backend.compare_and_set(
+                f"debate_turn:{session_id}", lease, 0, ttl_seconds=settings.DEBATE_TURN_LEASE_SECONDS
+            )
+        except ConcurrentUpdateError:
+            raise TurnOrderError("A turn is already in progress for this session")
+        return lease
+    
+    def _release_turn(self, session_id: str, lease: str):
+        """Drop the session's turn lease, unless it expired and another request holds it now"""
+        key = f"debate_turn:{session_id}"
+        current = self._turn_backend.get(key)
+        if current is not None and current[0] == lease:
+            self._turn_backend.delete(key)
+    
     def validate_turn(self, session_id: str, speaker: str) -> bool:
         """Validate if it's the speaker's turn"""
-        if session_id not in self.sessions:
+        state = self.sessions.get(session_id)
+        if state is None:
             return False
-            
-        state = self.sessions[session_id]
         return state.waiting_for == speaker
     
     def add_message(self, session_id: str, role: str, content: str) -> bool:
         """Add a message to the debate history and update turn state"""
-        if session_id not in self.sessions:
-            return False
-            
-        state = self.sessions[session_id]
-        
+        return self._update_state(session_id, lambda state: self._apply_message(state, role, content))
+    
+    def _apply_message(self, state: DebateState, role: str, content: str) -> bool:
         # Validate turn order
         if role != state.waiting_for and role != "judge":
             return False
@@ -115,13 +299,25 @@ class StateManager:
             
         return True
     
+    def _dialogue(self, state: DebateState) -> str:
+        """
+        Summary of older messages (if any) followed by the messages it does not
+        cover, capped so a lagging or failed summary update cannot grow the prompt
+        """
+        window = settings.HISTORY_VERBATIM_TURNS + settings.HISTORY_SUMMARY_BATCH_TURNS
+        start = max(state.summarized_turns, len(state.debate_history) - window)
+        lines = [f"{m['role'].upper()}: {m['content']}" for m in state.debate_history[start:]]
+        if state.history_summary:
+            lines.insert(0, f"EARLIER PROCEEDINGS (summary): {state.history_summary}")
+        return "\n".join(lines)
+    
     def get_judge_prompt(self, session_id: str) -> str:
         """Generate prompt for the judge based on current debate state"""
-        if session_id not in self.sessions:
+        state = self.sessions.get(session_id)
+        if state is None:
             return ""
             
-        state = self.sessions[session_id]
-        history = "\n".join([f"{m['role'].upper()}: {m['content']}" for m in state.debate_history[-5:]])
+        history = self._dialogue(state)
         
         return f"""You are {state.judge_persona} presiding over this case. 
         
@@ -139,11 +335,11 @@ class StateManager:
     
     def get_ai_lawyer_prompt(self, session_id: str) -> str:
         """Generate prompt for the AI lawyer based on current debate state"""
-        if session_id not in self.sessions:
+        state = self.sessions.get(session_id)
+        if state is None:
             return ""
             
-        state = self.sessions[session_id]
-        history = "\n".join([f"{m['role'].upper()}: {m['content']}" for m in state.debate_history[-5:]])
+        history = self._dialogue(state)
         
         return f"""You are {state.ai_lawyer_persona} representing the {'defendant' if state.user_role == 'plaintiff' else 'plaintiff'}.
         
@@ -158,58 +354,6 @@ class StateManager:
         3. Reference relevant laws and precedents when possible
         
         Keep your response under 100 words. Be persuasive but professional."""
-        workflow = StateGraph(DebateState)
-        
-        # Define nodes
-        workflow.add_node("process_prosecution", self._process_prosecution)
-        workflow.add_node("process_defense", self._process_defense)
-        workflow.add_node("evaluate_arguments", self._evaluate_arguments)
-        
-        # Define edges
-        workflow.add_conditional_edges(
-            "process_prosecution",
-            self._decide_next_step,
-            {
-                "defense": "process_defense",
-                "evaluate": "evaluate_arguments",
-                "end": END
-            }
-        )
-        
-        workflow.add_edge("process_defense", "process_prosecution")
-        workflow.add_edge("evaluate_arguments", END)
-        
-        # Set entry point
-        workflow.set_entry_point("process_prosecution")
-        
-        return workflow.compile()
-    
-    async def _process_prosecution(self, state: DebateState):
-        """Process prosecution's turn"""
-        # Update state
-        state.current_turn = "prosecution"
-        state.last_updated = datetime.utcnow()
-        return state
-    
-    async def _process_defense(self, state: DebateState):
-        """Process defense's turn"""
-        state.current_turn = "defense"
-        state.last_updated = datetime.utcnow()
-        return state
-    
-    async def _evaluate_arguments(self, state: DebateState):
-        """Evaluate the current state of arguments"""
-        # Add any evaluation logic here
-        return state
-    
-    def _decide_next_step(self, state: DebateState):
-        """Determine next step in the workflow"""
-        # Example logic - can be customized
-        if len(state.debate_history) >= 10:  # End after 10 exchanges
-            return "end"
-        elif state.current_turn == "prosecution":
-            return "defense"
-        return "prosecution"
     
     # Session management
     def create_session(self, case_details: Dict[str, Any]) -> str:
@@ -230,37 +374,34 @@ class StateManager:
     
     def update_session(self, session_id: str, updates: Dict[str, Any]) -> bool:
         """Update session with new data"""
-        if session_id not in self.sessions:
-            return False
-        
-        session = self.sessions[session_id]
-        for key, value in updates.items():
-            if hasattr(session, key):
-                setattr(session, key, value)
-        
-        session.last_updated = datetime.utcnow()
-        return True
+        def apply(session: DebateState) -> bool:
+            for key, value in updates.items():
+                if hasattr(session, key):
+                    setattr(session, key, value)
+            session.last_updated = datetime.utcnow()
+            return True
+        return self._update_state(session_id, apply)
     
     def add_to_history(self, session_id: str, role: str, content: str):
         """Add message to debate history"""
-        if session_id not in self.sessions:
-            return False
-        
-        self.sessions[session_id].debate_history.append({
+        return self._update_state(session_id, lambda session: session.debate_history.append({
             "role": role,
             "content": content,
             "timestamp": datetime.utcnow().isoformat()
-        })
-        return True
+        }))
     
     def get_recent_history(self, session_id: str, limit: int = 5) -> List[Dict[str, str]]:
         """Get recent debate history"""
-        if session_id not in self.sessions:
+        state = self.sessions.get(session_id)
+        if state is None:
             return []
-        return self.sessions[session_id].debate_history[-limit:]
+        return state.debate_history[-limit:]
     
     def cleanup_old_sessions(self, hours: int = 24):
-        """Remove sessions older than specified hours"""
+        """
+        Remove sessions older than specified hours. Idle sessions are already
+        evicted by the sweeper; this is for a one-off, stricter cleanup.
+        """
         cutoff = datetime.utcnow() - timedelta(hours=hours)
         to_remove = [
             sid for sid, session in self.sessions.items() 
@@ -1,23 +1,42 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Body
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import uvicorn
 import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from backend.ai_court.core.config import settings
 from backend.ai_court.services.document_ingestion import ingest_document
 from backend.ai_court.services.debate_orchestrator import conduct_debate_turn, start_new_case, continue_case
 from backend.ai_court.models.api_models import (
     DebateInput, DebateTurnResponse, CaseDetails, CaseListResponse, 
-    CaseStartResponse, PracticeConfig
+    CaseStartResponse, PracticeConfig, SessionListResponse, SessionSummary
 )
 from backend.ai_court.services.case_manager import case_manager
 from backend.ai_court.api.endpoints import router as api_router
+from backend.ai_court.core.startup import startup_registry
+from backend.ai_court.core.state_manager import state_manager
+from backend.ai_court.services.history_summarizer import history_summarizer
+from backend.loop_monitor import loop_monitor
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="LegalAI - Advanced Legal Debate Assistant", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_registry.start_background_warmup()
+    case_manager.start_write_behind()
+    state_manager.start_session_sweeper()
+    loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+    await startup_registry.shutdown()
+    # Let in-flight debate summaries reach the session store
+    await history_summarizer.wait_idle()
+    await state_manager.shutdown()
+    await case_manager.aclose()
+
+app = FastAPI(title="LegalAI - Advanced Legal Debate Assistant", version="1.0.0", lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -40,10 +59,10 @@ async def read_root():
 
 # Case Management Endpoints
 @app.get("/api/cases", response_model=CaseListResponse)
-async def get_cases():
-    """Get all available cases"""
-    cases = case_manager.get_all_cases()
-    return CaseListResponse(cases=cases, total_count=len(cases))
+async def get_cases(offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1, le=500)):
+    """Get available cases, optionally one page at a time"""
+    cases, total_count = await case_manager.alist_cases(offset=offset, limit=limit)
+    return CaseListResponse(cases=cases, total_count=total_count, offset=offset, limit=limit)
 
 @app.post("/api/cases", response_model=CaseStartResponse)
 async def create_case(request_body: Dict[str, Any] = Body(...)):
@@ -60,6 +79,33 @@ async def get_case(case_id: str):
         raise HTTPException(status_code=404, detail="Case not found")
     return case
 
+@app.get("/api/sessions", response_model=SessionListResponse)
+async def list_sessions(
+    case_id: Optional[str] = None,
+    active: Optional[bool] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """List sessions, most recently active first, without their debate history"""
+    sessions, total_count = await case_manager.alist_sessions(case_id=case_id, active=active, offset=offset, limit=limit)
+    return SessionListResponse(
+        sessions=[
+            SessionSummary(
+                sessionId=session.sessionId,
+                caseId=session.caseId,
+                isActive=session.isActive,
+                sessionStartTime=session.sessionStartTime,
+                sessionEndTime=session.sessionEndTime,
+                lastActivity=session.lastActivity,
+                turnCount=len(session.debateHistory)
+            )
+            for session in sessions
+        ],
+        total_count=total_count,
+        offset=offset,
+        limit=limit
+    )
+
 @app.get("/api/sessions/{session_id}")
 async def get_session(session_id: str):
     """Get a specific session by ID"""
@@ -56,13 +56,18 @@ class CaseSession(BaseModel):
     caseId: str = Field(..., description="Associated case ID")
     practiceConfig: PracticeConfig = Field(..., description="Practice session configuration")
     debateHistory: List[Dict[str, str]] = Field(default_factory=list, description="Session debate history")
+    historySummary: Optional[str] = Field(None, description="Rolling summary of the turns before the verbatim window")
+    summarizedTurns: int = Field(default=0, description="Number of leading debateHistory turns covered by historySummary")
     sessionStartTime: datetime = Field(default_factory=datetime.now, description="Session start time")
     sessionEndTime: Optional[datetime] = Field(None, description="Session end time")
+    lastActivity: Optional[datetime] = Field(None, description="Time of the last turn or status change")
     isActive: bool = Field(default=True, description="Whether session is currently active")
 
 class DebateInput(BaseModel):
     human_input: str = Field(..., description="The human lawyer's statement or question.")
     debate_history: List[Dict[str, str]] = Field(default_factory=list, description="List of previous debate turns (role and content).")
+    history_summary: Optional[str] = Field(None, description="Summary of the first summarized_turns turns of debate_history")
+    summarized_turns: int = Field(default=0, description="Number of leading debate_history turns replaced by history_summary in prompts")
     practice_config: Optional[PracticeConfig] = Field(None, description="Practice session configuration")
     case_details: Optional[CaseDetails] = Field(None, description="Case details for new cases")
     session_id: Optional[str] = Field(None, description="Session ID for continuing cases")
@@ -76,10 +81,29 @@ class DebateTurnResponse(BaseModel):
     session_id: Optional[str] = Field(None, description="Session ID for tracking")
     ai_lawyer_audio_url: Optional[str] = Field(None, description="Audio URL for AI lawyer's response")
     judge_audio_url: Optional[str] = Field(None, description="Audio URL for judge's intervention")
+    prompt_tokens: Optional[Dict[str, int]] = Field(None, description="Estimated prompt tokens per LLM caller in this turn (summed over its calls)")
 
 class CaseListResponse(BaseModel):
     cases: List[CaseDetails] = Field(..., description="List of available cases")
     total_count: int = Field(..., description="Total number of cases")
+    offset: int = Field(default=0, description="Index of the first case on this page")
+    limit: Optional[int] = Field(None, description="Page size, or None for all cases")
+
+class SessionSummary(BaseModel):
+    """A session without its debate history, for listings"""
+    sessionId: str = Field(..., description="Unique session identifier")
+    caseId: str = Field(..., description="Associated case ID")
+    isActive: bool = Field(..., description="Whether session is currently active")
+    sessionStartTime: datetime = Field(..., description="Session start time")
+    sessionEndTime: Optional[datetime] = Field(None, description="Session end time")
+    lastActivity: Optional[datetime] = Field(None, description="Time of the last turn or status change")
+    turnCount: int = Field(..., description="Number of turns in the debate history")
+
+class SessionListResponse(BaseModel):
+    sessions: List[SessionSummary] = Field(..., description="Sessions on this page, most recently active first")
+    total_count: int = Field(..., description="Total number of matching sessions")
+    offset: int = Field(default=0, description="Index of the first session on this page")
+    limit: Optional[int] = Field(None, description="Page size")
 
 class DebateTurnInput(BaseModel):
     """Input model for submitting a turn in the debate"""
@@ -1,61 +1,409 @@
+import asyncio
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Optional
-import json
-import os
+from typing import Any, Callable, List, Dict, Optional, Tuple
+from itertools import islice
 from pathlib import Path
 
+from backend.ai_court.core.config import settings
+from backend.ai_court.services.case_store import CaseStore, WriteBehindCaseStore, create_case_store
 from backend.ai_court.models.api_models import CaseDetails, CaseSession, CaseStatus, PracticeConfig, CaseStartResponse
+from backend.shared_state import ConcurrentUpdateError, SharedMap, shared_state
+
+# Shared-backend key holding when its case data was first published (seconds)
+STORE_EPOCH_KEY = "case_store:epoch"
+# Store versions are epoch * STORE_VERSIONS_PER_EPOCH + shared version
+STORE_VERSIONS_PER_EPOCH = 10 ** 9
+# Shared-backend keys whose version is bumped whenever a case / session is added or removed,
+# so a listing only has to read every version number when membership changed
+CASES_MEMBERSHIP_KEY = "case_membership:cases"
+SESSIONS_MEMBERSHIP_KEY = "case_membership:case_sessions"
 
 class CaseManager:
-    def __init__(self):
-        self.cases_file = Path("data/cases.json")
-        self.sessions_file = Path("data/sessions.json")
-        self._ensure_data_directory()
-        self.cases = self._load_cases()
-        self.sessions = self._load_sessions()
-    
-    def _ensure_data_directory(self):
-        """Ensure data directory exists"""
-        self.cases_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    def _load_cases(self) -> Dict[str, CaseDetails]:
-        """Load cases from file"""
-        if self.cases_file.exists():
-            try:
-                with open(self.cases_file, 'r') as f:
-                    data = json.load(f)
-                    return {case_id: CaseDetails(**case_data) for case_id, case_data in data.items()}
-            except Exception as e:
-                print(f"Error loading cases: {e}")
-        return {}
-    
-    def _save_cases(self):
-        """Save cases to file"""
+    def __init__(self, store: Optional[CaseStore] = None):
+        if store is None:
+            store = create_case_store(settings.CASE_STORE_BACKEND, Path(settings.CASE_DATA_DIR))
+            if settings.CASE_WRITE_BEHIND:
+                store = WriteBehindCaseStore(
+                    store,
+                    interval_seconds=settings.CASE_WRITE_BEHIND_INTERVAL_SECONDS,
+                    max_pending=settings.CASE_WRITE_BEHIND_MAX_PENDING
+                )
+        self.store = store
+        self.cases, self.sessions = self._load()
+        # Version of each cached record; compared with the shared backend's to spot remote changes,
+        # and with the caller's to reject conflicting history updates
+        self._case_versions: Dict[str, int] = {}
+        self._session_versions: Dict[str, int] = {}
+        self._build_indexes()
+        
+        # With a shared state backend the authoritative copy of every case and session is there,
+        # and self.cases / self.sessions cache it for this worker
+        self.shared_cases: Optional[SharedMap] = None
+        self.shared_sessions: Optional[SharedMap] = None
+        self._store_epoch = 0
+        # Membership versions as of the last full sync, and when it started (monotonic seconds)
+        self._synced_membership: Optional[Tuple[int, int]] = None
+        self._synced_at = 0.0
+        if shared_state.is_shared:
+            self.shared_cases = SharedMap(shared_state, "cases", CaseDetails)
+            self.shared_sessions = SharedMap(shared_state, "case_sessions", CaseSession)
+            self._store_epoch = self._shared_epoch()
+            self._publish_loaded()
+    
+    def _load(self) -> Tuple[Dict[str, CaseDetails], Dict[str, CaseSession]]:
+        """Load cases and sessions from the store"""
+        cases: Dict[str, CaseDetails] = {}
+        sessions: Dict[str, CaseSession] = {}
         try:
-            with open(self.cases_file, 'w') as f:
-                json.dump({case_id: case.dict() for case_id, case in self.cases.items()}, f, indent=2, default=str)
+            case_records, session_records = self.store.load()
+            cases = {case_id: CaseDetails(**case_data) for case_id, case_data in case_records.items()}
+            sessions = {session_id: CaseSession(**session_data) for session_id, session_data in session_records.items()}
         except Exception as e:
-            print(f"Error saving cases: {e}")
+            print(f"Error loading cases: {e}")
+        return cases, sessions
+    
+    def _build_indexes(self):
+        """
+        Secondary indexes over self.sessions, kept up to date by every method
+        that adds, ends, touches or deletes a session:
+        - case ID -> session IDs
+        - sessions by last activity (oldest first), all and active only
+        """
+        self._sessions_by_case: Dict[str, Dict[str, None]] = {}
+        self._activity_order: OrderedDict = OrderedDict()
+        self._active_order: OrderedDict = OrderedDict()
+        for session in sorted(self.sessions.values(), key=self._last_activity):
+            self._index_session(session)
+    
+    @staticmethod
+    def _last_activity(session: CaseSession) -> datetime:
+        return session.lastActivity or session.sessionStartTime
+    
+    def _index_session(self, session: CaseSession):
+        self._sessions_by_case.setdefault(session.caseId, {})[session.sessionId] = None
+        self._activity_order[session.sessionId] = None
+        if session.isActive:
+            self._active_order[session.sessionId] = None
+    
+    def _unindex_session(self, session: CaseSession):
+        case_sessions = self._sessions_by_case.get(session.caseId)
+        if case_sessions is not None:
+            case_sessions.pop(session.sessionId, None)
+            if not case_sessions:
+                del self._sessions_by_case[session.caseId]
+        self._activity_order.pop(session.sessionId, None)
+        self._active_order.pop(session.sessionId, None)
+    
+    def _cache_session(self, session: CaseSession, version: int, previous: Optional[Tuple[Optional[datetime], bool]]):
+        """
+        Store a new or changed session locally. `previous` is (lastActivity, isActive)
+        before the change, or None for a session new to this worker; it moves in the
+        activity indexes only if one of those changed.
+        """
+        self.sessions[session.sessionId] = session
+        self._session_versions[session.sessionId] = version
+        if previous != (session.lastActivity, session.isActive):
+            self._unindex_session(session)
+            self._index_session(session)
+    
+    def _forget_session(self, session_id: str):
+        """Drop a session from the local cache (e.g. deleted by another worker)"""
+        session = self.sessions.pop(session_id, None)
+        self._session_versions.pop(session_id, None)
+        if session is not None:
+            self._unindex_session(session)
+    
+    def _update_session(self, session_id: str, mutate: Callable[[CaseSession], Any],
+                        expected_version: Optional[int] = None) -> Optional[CaseSession]:
+        """
+        Apply mutate to a session and bump its version. With a shared backend this is
+        a compare-and-set on the shared copy, retried on conflicts unless
+        expected_version is given.
+        
+        Raises:
+            ConcurrentUpdateError: expected_version is given and the session has changed since
+        
+        Returns:
+            The updated session, or None if there is no such session
+        """
+        if self.shared_sessions is not None:
+            session, version = self.shared_sessions.update_versioned(session_id, mutate, expected_version)
+            if session is None:
+                self._forget_session(session_id)
+                return None
+            old = self.sessions.get(session_id)
+            self._cache_session(session, version, (old.lastActivity, old.isActive) if old else None)
+            return session
+        
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        version = self._session_versions.get(session_id, 0)
+        if expected_version is not None and expected_version != version:
+            raise ConcurrentUpdateError(session_id, expected_version, version)
+        previous = (session.lastActivity, session.isActive)
+        mutate(session)
+        self._cache_session(session, version + 1, previous)
+        return session
+    
+    def _update_case(self, case_id: str, mutate: Callable[[CaseDetails], Any]) -> Optional[CaseDetails]:
+        """Apply mutate to a case (see _update_session)"""
+        if self.shared_cases is not None:
+            case, version = self.shared_cases.update_versioned(case_id, mutate)
+            if case is None:
+                self.cases.pop(case_id, None)
+                self._case_versions.pop(case_id, None)
+                return None
+            self.cases[case_id] = case
+            self._case_versions[case_id] = version
+            return case
+        
+        case = self.cases.get(case_id)
+        if case is not None:
+            mutate(case)
+            self._case_versions[case_id] = self._case_versions.get(case_id, 0) + 1
+        return case
+    
+    def _refresh_session(self, session_id: str):
+        """Pick up another worker's changes to one session"""
+        session, version = self.shared_sessions.get_versioned(session_id)
+        if session is None:
+            self._forget_session(session_id)
+        elif version != self._session_versions.get(session_id):
+            old = self.sessions.get(session_id)
+            self._cache_session(session, version, (old.lastActivity, old.isActive) if old else None)
+    
+    def _refresh_case(self, case_id: str):
+        """Pick up another worker's changes to one case"""
+        case, version = self.shared_cases.get_versioned(case_id)
+        if case is None:
+            self.cases.pop(case_id, None)
+            self._case_versions.pop(case_id, None)
+        elif version != self._case_versions.get(case_id):
+            self.cases[case_id] = case
+            self._case_versions[case_id] = version
+    
+    def _fetch_changes(self) -> Tuple[Dict[str, int], Dict[str, Tuple[Optional[CaseDetails], int]],
+                                      Dict[str, int], Dict[str, Tuple[Optional[CaseSession], int]]]:
+        """
+        Read what _sync needs from the shared backend: the version numbers of
+        everything, and the records whose version differs from the cached one.
+        Only reads the local cache, so async callers can run it in a thread.
+        """
+        case_versions = self.shared_cases.versions()
+        changed_cases = {
+            case_id: self.shared_cases.get_versioned(case_id)
+            for case_id, version in case_versions.items() if self._case_versions.get(case_id) != version
+        }
+        session_versions = self.shared_sessions.versions()
+        changed_sessions = {
+            session_id: self.shared_sessions.get_versioned(session_id)
+            for session_id, version in session_versions.items() if self._session_versions.get(session_id) != version
+        }
+        return case_versions, changed_cases, session_versions, changed_sessions
+    
+    def _fetch_records(self, case_ids: List[str], session_ids: List[str]):
+        """
+        Like _fetch_changes, but only for the given records. No version maps are
+        returned, so _apply_changes leaves every other cached record as it is.
+        """
+        changed_cases = {case_id: self.shared_cases.get_versioned(case_id) for case_id in case_ids}
+        changed_sessions = {session_id: self.shared_sessions.get_versioned(session_id) for session_id in session_ids}
+        return None, changed_cases, None, changed_sessions
+    
+    def _apply_changes(self, changes):
+        """Bring the local cache in line with what _fetch_changes or _fetch_records read"""
+        case_versions, changed_cases, session_versions, changed_sessions = changes
+        if case_versions is not None:
+            for case_id in [case_id for case_id in self.cases if case_id not in case_versions]:
+                del self.cases[case_id]
+                self._case_versions.pop(case_id, None)
+        added = False
+        for case_id, (case, version) in changed_cases.items():
+            if case is None:
+                self.cases.pop(case_id, None)
+                self._case_versions.pop(case_id, None)
+            elif version != self._case_versions.get(case_id):
+                added |= case_id not in self.cases
+                self.cases[case_id] = case
+                self._case_versions[case_id] = version
+        if added:
+            # Keep listings in creation order
+            self.cases = dict(sorted(self.cases.items(), key=lambda item: item[1].createdAt or datetime.min))
+        
+        if session_versions is not None:
+            for session_id in [session_id for session_id in self.sessions if session_id not in session_versions]:
+                self._forget_session(session_id)
+        for session_id, (session, version) in changed_sessions.items():
+            if session is None:
+                self._forget_session(session_id)
+            elif version != self._session_versions.get(session_id):
+                old = self.sessions.get(session_id)
+                self._cache_session(session, version, (old.lastActivity, old.isActive) if old else None)
+    
+    def _sync(self):
+        """
+        Bring the whole local cache up to date with the shared backend. Only the
+        version numbers are read for everything; records are fetched only if
+        their version changed.
+        """
+        if self.shared_cases is None:
+            return
+        self._apply_synced(self._fetch_all())
+    
+    def _fetch_all(self):
+        started = time.monotonic()
+        membership = self._read_membership()
+        return self._fetch_changes(), membership, started
+    
+    def _apply_synced(self, fetched):
+        changes, membership, started = fetched
+        self._apply_changes(changes)
+        if membership is not None:
+            self._synced_membership = membership
+            self._synced_at = started
+    
+    def _fetch_for_page(self, page_ids: Callable[[], Tuple[List[str], List[str]]]):
+        """
+        What a listing needs from the shared backend. Reading the version of every
+        case and session is a full scan (an HGETALL over all of them on Redis), so
+        it is only done when cases or sessions were added or removed since the last
+        full sync, or CASE_SYNC_INTERVAL_SECONDS have passed; otherwise only the
+        records on the page (from page_ids) are refreshed. Only reads the local
+        cache, so async callers can run it in a thread.
+        """
+        started = time.monotonic()
+        membership = self._read_membership()
+        if (membership != self._synced_membership
+                or started - self._synced_at >= settings.CASE_SYNC_INTERVAL_SECONDS):
+            return self._fetch_changes(), membership, started
+        return self._fetch_records(*page_ids()), None, started
+    
+    def _sync_page(self, page_ids: Callable[[], Tuple[List[str], List[str]]]):
+        """Bring the local cache up to date before a listing (see _fetch_for_page)"""
+        if self.shared_cases is None:
+            return
+        self._apply_synced(self._fetch_for_page(page_ids))
+    
+    async def _async_sync_page(self, page_ids: Callable[[], Tuple[List[str], List[str]]]):
+        """_sync_page for async callers: the shared backend is read in a thread, so a
+        remote backend (Redis) does not block the event loop"""
+        if self.shared_cases is None:
+            return
+        fetched = await asyncio.to_thread(self._fetch_for_page, page_ids)
+        self._apply_synced(fetched)
+    
+    @staticmethod
+    def _read_membership() -> Tuple[int, int]:
+        """Versions of the case and session membership keys"""
+        cases = shared_state.get(CASES_MEMBERSHIP_KEY)
+        sessions = shared_state.get(SESSIONS_MEMBERSHIP_KEY)
+        return (cases[1] if cases else 0), (sessions[1] if sessions else 0)
+    
+    def _membership_changed(self, cases: bool = False, sessions: bool = False):
+        """Tell every worker's next listing to do a full sync"""
+        if self.shared_cases is None:
+            return
+        if cases:
+            shared_state.set(CASES_MEMBERSHIP_KEY, "")
+        if sessions:
+            shared_state.set(SESSIONS_MEMBERSHIP_KEY, "")
+    
+    def _publish_loaded(self):
+        """
+        Copy cases and sessions loaded from this worker's store into the shared
+        backend unless they are already there, then adopt the shared versions
+        """
+        published = self.shared_cases.versions()
+        new_cases = False
+        for case_id, case in self.cases.items():
+            if case_id not in published:
+                try:
+                    self.shared_cases.put_if_version(case_id, case, 0)
+                    new_cases = True
+                except ConcurrentUpdateError:
+                    pass  # Another worker published it first
+        published = self.shared_sessions.versions()
+        new_sessions = False
+        for session_id, session in self.sessions.items():
+            if session_id not in published:
+                try:
+                    self.shared_sessions.put_if_version(session_id, session, 0)
+                    new_sessions = True
+                except ConcurrentUpdateError:
+                    pass
+        self._membership_changed(new_cases, new_sessions)
+        self._sync()
     
-    def _load_sessions(self) -> Dict[str, CaseSession]:
-        """Load sessions from file"""
-        if self.sessions_file.exists():
+    @staticmethod
+    def _shared_epoch() -> int:
+        """
+        When the shared backend's case data was first published. Shared versions
+        start again from 1 if the backend is wiped while the store keeps its data,
+        so store versions are prefixed with this to keep increasing.
+        """
+        current = shared_state.get(STORE_EPOCH_KEY)
+        if current is None:
             try:
-                with open(self.sessions_file, 'r') as f:
-                    data = json.load(f)
-                    return {session_id: CaseSession(**session_data) for session_id, session_data in data.items()}
-            except Exception as e:
-                print(f"Error loading sessions: {e}")
-        return {}
-    
-    def _save_sessions(self):
-        """Save sessions to file"""
+                shared_state.compare_and_set(STORE_EPOCH_KEY, str(int(time.time())), 0)
+            except ConcurrentUpdateError:
+                pass  # Another worker set it first
+            current = shared_state.get(STORE_EPOCH_KEY)
+        return int(current[0])
+    
+    def _store_version(self, version: int) -> Optional[int]:
+        """
+        Version for a store write. With a shared backend every worker writes the
+        store on its own schedule (write-behind), so writes carry the record's
+        shared version and the store ignores ones older than what it holds.
+        """
+        if self.shared_cases is None:
+            return None
+        return self._store_epoch * STORE_VERSIONS_PER_EPOCH + version
+    
+    def _save_case(self, case_id: str):
+        """Persist one case"""
+        try:
+            self.store.save_case(case_id, self.cases[case_id].dict(), self._store_version(self._case_versions[case_id]))
+        except Exception as e:
+            print(f"Error saving case {case_id}: {e}")
+    
+    def _save_session(self, session_id: str):
+        """Persist one session's fields (not its debate history)"""
+        try:
+            self.store.save_session(
+                session_id,
+                self.sessions[session_id].dict(exclude={"debateHistory"}),
+                self._store_version(self._session_versions[session_id])
+            )
+        except Exception as e:
+            print(f"Error saving session {session_id}: {e}")
+    
+    def _save_history(self, session_id: str, start: int, turns: List[Dict[str, str]]):
+        """Persist debateHistory[start:] of one session"""
         try:
-            with open(self.sessions_file, 'w') as f:
-                json.dump({session_id: session.dict() for session_id, session in self.sessions.items()}, f, indent=2, default=str)
+            self.store.write_history(session_id, start, turns, self._store_version(self._session_versions[session_id]))
         except Exception as e:
-            print(f"Error saving sessions: {e}")
+            print(f"Error saving history for session {session_id}: {e}")
+    
+    def start_write_behind(self):
+        """Start flushing buffered writes in the background (call from the app lifespan)"""
+        if isinstance(self.store, WriteBehindCaseStore):
+            self.store.start()
+    
+    def close(self):
+        """Flush and close the store"""
+        self.store.close()
+    
+    async def aclose(self):
+        """Flush and close the store without blocking the event loop"""
+        if isinstance(self.store, WriteBehindCaseStore):
+            await self.store.aclose()
+        else:
+            await asyncio.to_thread(self.store.close)
     
     def create_case(self, case_details: CaseDetails) -> str:
         """Create a new case"""
@@ -74,23 +422,53 @@ class CaseManager:
             case_details.damages = "To be determined"
         
         self.cases[case_id] = case_details
-        self._save_cases()
+        self._case_versions[case_id] = 1
+        if self.shared_cases is not None:
+            self._case_versions[case_id] = self.shared_cases.put_if_version(case_id, case_details, 0)
+            self._membership_changed(cases=True)
+        self._save_case(case_id)
         return case_id
     
     def get_case(self, case_id: str) -> Optional[CaseDetails]:
         """Get case by ID"""
+        if self.shared_cases is not None:
+            self._refresh_case(case_id)
         return self.cases.get(case_id)
     
     def get_all_cases(self) -> List[CaseDetails]:
         """Get all cases"""
+        self._sync()
         return list(self.cases.values())
     
+    def list_cases(self, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[CaseDetails], int]:
+        """
+        Get one page of cases in creation order.
+        
+        Returns:
+            Tuple of (cases on the page, total number of cases)
+        """
+        self._sync_page(lambda: self._cases_page_ids(offset, limit))
+        return self._cases_page(offset, limit)
+    
+    async def alist_cases(self, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[CaseDetails], int]:
+        """list_cases for async callers"""
+        await self._async_sync_page(lambda: self._cases_page_ids(offset, limit))
+        return self._cases_page(offset, limit)
+    
+    def _cases_page_ids(self, offset: int, limit: Optional[int]) -> Tuple[List[str], List[str]]:
+        return [case.caseId for case in self._cases_page(offset, limit)[0]], []
+    
+    def _cases_page(self, offset: int, limit: Optional[int]) -> Tuple[List[CaseDetails], int]:
+        stop = offset + limit if limit is not None else None
+        return list(islice(self.cases.values(), offset, stop)), len(self.cases)
+    
     def update_case_status(self, case_id: str, status: CaseStatus):
         """Update case status"""
-        if case_id in self.cases:
-            self.cases[case_id].status = status
-            self.cases[case_id].lastModified = datetime.now()
-            self._save_cases()
+        def apply(case: CaseDetails):
+            case.status = status
+            case.lastModified = datetime.now()
+        if self._update_case(case_id, apply):
+            self._save_case(case_id)
     
     def create_session(self, case_id: str, practice_config: PracticeConfig) -> str:
         """Create a new session for a case"""
@@ -100,11 +478,16 @@ class CaseManager:
             caseId=case_id,
             practiceConfig=practice_config,
             sessionStartTime=datetime.now(),
+            lastActivity=datetime.now(),
             isActive=True
         )
         
-        self.sessions[session_id] = session
-        self._save_sessions()
+        version = 1
+        if self.shared_sessions is not None:
+            version = self.shared_sessions.put_if_version(session_id, session, 0)
+            self._membership_changed(sessions=True)
+        self._cache_session(session, version, None)
+        self._save_session(session_id)
         
         # Update case status to active
         self.update_case_status(case_id, CaseStatus.ACTIVE)
@@ -113,40 +496,134 @@ class CaseManager:
     
     def get_session(self, session_id: str) -> Optional[CaseSession]:
         """Get session by ID"""
+        if self.shared_sessions is not None:
+            self._refresh_session(session_id)
         return self.sessions.get(session_id)
     
-    def update_session_history(self, session_id: str, debate_history: List[Dict[str, str]]):
-        """Update session debate history"""
-        if session_id in self.sessions:
-            self.sessions[session_id].debateHistory = debate_history
-            self.sessions[session_id].lastModified = datetime.now()
-            self._save_sessions()
+    def get_session_version(self, session_id: str) -> int:
+        """Version of the session as last returned by get_session(), for update_session_history()"""
+        return self._session_versions.get(session_id, 0)
+    
+    def update_session_history(self, session_id: str, debate_history: List[Dict[str, str]],
+                               expected_version: Optional[int] = None):
+        """
+        Update session debate history, writing only the turns that changed.
+        
+        Args:
+            expected_version: get_session_version() from when the caller read the
+                session; if another turn was recorded since, the update is rejected
+                instead of overwriting it
+        
+        Raises:
+            ConcurrentUpdateError: The session changed after expected_version
+        """
+        start = 0
+        
+        def apply(session: CaseSession):
+            nonlocal start
+            previous = session.debateHistory
+            # Turns are normally appended; anything else rewrites the history
+            start = len(previous) if debate_history[:len(previous)] == previous else 0
+            session.debateHistory = debate_history
+            session.lastActivity = datetime.now()
+        
+        if self._update_session(session_id, apply, expected_version):
+            self._save_history(session_id, start, debate_history[start:])
+            self._save_session(session_id)
+    
+    def update_session_summary(self, session_id: str, summary: str, summarized_turns: int):
+        """Update the rolling summary of a session's older turns"""
+        def apply(session: CaseSession):
+            session.historySummary = summary
+            session.summarizedTurns = summarized_turns
+        if self._update_session(session_id, apply):
+            self._save_session(session_id)
     
     def end_session(self, session_id: str):
         """End a session"""
-        if session_id in self.sessions:
-            self.sessions[session_id].isActive = False
-            self.sessions[session_id].sessionEndTime = datetime.now()
-            self._save_sessions()
+        def apply(session: CaseSession):
+            session.isActive = False
+            session.sessionEndTime = datetime.now()
+            session.lastActivity = session.sessionEndTime
+        if self._update_session(session_id, apply):
+            self._save_session(session_id)
     
     def get_active_sessions(self) -> List[CaseSession]:
         """Get all active sessions"""
-        return [session for session in self.sessions.values() if session.isActive]
+        self._sync()
+        return [self.sessions[session_id] for session_id in self._active_order]
     
     def get_sessions_for_case(self, case_id: str) -> List[CaseSession]:
         """Get all sessions for a specific case"""
-        return [session for session in self.sessions.values() if session.caseId == case_id]
+        self._sync()
+        return [self.sessions[session_id] for session_id in self._sessions_by_case.get(case_id, {})]
+    
+    def list_sessions(self, case_id: Optional[str] = None, active: Optional[bool] = None,
+                      offset: int = 0, limit: Optional[int] = None) -> Tuple[List[CaseSession], int]:
+        """
+        Get one page of sessions, most recently active first.
+        
+        Args:
+            case_id: Only sessions of this case
+            active: Only active (True) or ended (False) sessions
+        
+        Returns:
+            Tuple of (sessions on the page, total number matching)
+        """
+        self._sync_page(lambda: self._sessions_page_ids(case_id, active, offset, limit))
+        return self._sessions_page(case_id, active, offset, limit)
+    
+    async def alist_sessions(self, case_id: Optional[str] = None, active: Optional[bool] = None,
+                             offset: int = 0, limit: Optional[int] = None) -> Tuple[List[CaseSession], int]:
+        """list_sessions for async callers"""
+        await self._async_sync_page(lambda: self._sessions_page_ids(case_id, active, offset, limit))
+        return self._sessions_page(case_id, active, offset, limit)
+    
+    def _sessions_page_ids(self, case_id: Optional[str], active: Optional[bool],
+                           offset: int, limit: Optional[int]) -> Tuple[List[str], List[str]]:
+        sessions = self._sessions_page(case_id, active, offset, limit)[0]
+        return [case_id] if case_id is not None else [], [session.sessionId for session in sessions]
+    
+    def _sessions_page(self, case_id: Optional[str], active: Optional[bool],
+                       offset: int, limit: Optional[int]) -> Tuple[List[CaseSession], int]:
+        stop = offset + limit if limit is not None else None
+        if case_id is not None:
+            # Per-case session lists are short; filter and sort them directly
+            matching = [
+                self.sessions[session_id] for session_id in self._sessions_by_case.get(case_id, {})
+                if active is None or self.sessions[session_id].isActive == active
+            ]
+            matching.sort(key=self._last_activity, reverse=True)
+            return matching[offset:stop], len(matching)
+        
+        if active is None:
+            total = len(self._activity_order)
+            session_ids = reversed(self._activity_order)
+        elif active:
+            total = len(self._active_order)
+            session_ids = reversed(self._active_order)
+        else:
+            total = len(self._activity_order) - len(self._active_order)
+            session_ids = (session_id for session_id in reversed(self._activity_order) if session_id not in self._active_order)
+        return [self.sessions[session_id] for session_id in islice(session_ids, offset, stop)], total
     
     def delete_case(self, case_id: str):
         """Delete a case and all its sessions"""
+        self._sync()
         if case_id in self.cases:
             del self.cases[case_id]
+            self._case_versions.pop(case_id, None)
             # Delete associated sessions
-            sessions_to_delete = [session_id for session_id, session in self.sessions.items() if session.caseId == case_id]
+            sessions_to_delete = list(self._sessions_by_case.get(case_id, {}))
             for session_id in sessions_to_delete:
-                del self.sessions[session_id]
-            self._save_cases()
-            self._save_sessions()
+                self._forget_session(session_id)
+                if self.shared_sessions is not None:
+                    self.shared_sessions.pop(session_id, None)
+                self.store.delete_session(session_id)
+            if self.shared_cases is not None:
+                self.shared_cases.pop(case_id, None)
+            self._membership_changed(cases=True, sessions=bool(sessions_to_delete))
+            self.store.delete_case(case_id)
 
 # Global case manager instance
 case_manager = CaseManager() 
\ No newline at end of file
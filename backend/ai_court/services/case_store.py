@@ -0,0 +1,597 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.ai_court.core.config import settings
+
+# Raw (JSON-serializable) records as produced by BaseModel.dict(); sessions are
+# stored without their debateHistory, which is written separately so that a
+# debate turn only writes the turns it added.
+CaseRecords = Dict[str, Dict[str, Any]]
+SessionRecords = Dict[str, Dict[str, Any]]
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, default=str, separators=(",", ":"))
+
+class CaseStore:
+    """
+    Persistence backend for CaseManager.
+
+    `version` orders the writes of one record when several workers write the
+    same store, each on its own schedule: a store shared between processes
+    ignores a write older than the one it holds. None writes unconditionally.
+    """
+
+    def load(self) -> Tuple[CaseRecords, SessionRecords]:
+        """Returns (cases, sessions) with each session's debateHistory filled in"""
+        raise NotImplementedError
+
+    def save_case(self, case_id: str, data: Dict[str, Any], version: Optional[int] = None):
+        raise NotImplementedError
+
+    def delete_case(self, case_id: str):
+        raise NotImplementedError
+
+    def save_session(self, session_id: str, data: Dict[str, Any], version: Optional[int] = None):
+        """Saves session fields; debateHistory (if present) is ignored"""
+        raise NotImplementedError
+
+    def write_history(self, session_id: str, start: int, turns: List[Dict[str, Any]], version: Optional[int] = None):
+        """Replaces debateHistory[start:] with turns (start == old length appends)"""
+        raise NotImplementedError
+
+    def delete_session(self, session_id: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class JsonFileCaseStore(CaseStore):
+    """
+    The original format: data/cases.json and data/sessions.json, each
+    rewritten in full on every change. Kept for compatibility; every write
+    costs O(total data). Single process only, so `version` is not needed.
+    """
+    def __init__(self, cases_file: Path, sessions_file: Path):
+        self.cases_file = cases_file
+        self.sessions_file = sessions_file
+        self.cases: CaseRecords = {}
+        self.sessions: SessionRecords = {}
+        self._lock = threading.Lock()
+
+    def _read(self, path: Path) -> Dict[str, Any]:
+        if path.exists():
+            try:
+                with open(path, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading {path}: {e}")
+        return {}
+
+    def _write(self, path: Path, data: Dict[str, Any]):
+        try:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2, default=str)
+        except Exception as e:
+            print(f"Error saving {path}: {e}")
+
+    def load(self) -> Tuple[CaseRecords, SessionRecords]:
+        with self._lock:
+            self.cases = self._read(self.cases_file)
+            self.sessions = self._read(self.sessions_file)
+            return dict(self.cases), {sid: dict(data) for sid, data in self.sessions.items()}
+
+    def save_case(self, case_id: str, data: Dict[str, Any], version: Optional[int] = None):
+        with self._lock:
+            self.cases[case_id] = data
+            self._write(self.cases_file, self.cases)
+
+    def delete_case(self, case_id: str):
+        with self._lock:
+            if self.cases.pop(case_id, None) is not None:
+                self._write(self.cases_file, self.cases)
+
+    def save_session(self, session_id: str, data: Dict[str, Any], version: Optional[int] = None):
+        with self._lock:
+            history = self.sessions.get(session_id, {}).get("debateHistory", [])
+            self.sessions[session_id] = {**data, "debateHistory": history}
+            self._write(self.sessions_file, self.sessions)
+
+    def write_history(self, session_id: str, start: int, turns: List[Dict[str, Any]], version: Optional[int] = None):
+        with self._lock:
+            session = self.sessions.setdefault(session_id, {"sessionId": session_id})
+            session["debateHistory"] = session.get("debateHistory", [])[:start] + list(turns)
+            self._write(self.sessions_file, self.sessions)
+
+    def delete_session(self, session_id: str):
+        with self._lock:
+            if self.sessions.pop(session_id, None) is not None:
+                self._write(self.sessions_file, self.sessions)
+
+class JournalCaseStore(CaseStore):
+    """
+    Append-only journal (one JSON record per line). A change appends one
+    record, so a debate turn writes only its new turns. On load the journal
+    is replayed. Once the file grows to `compact_ratio` times its size after
+    the last compaction it is rewritten as a snapshot of the live records
+    (temporary file, fsync, atomic rename), which keeps both replay time and
+    the amortized write cost proportional to live data. A torn final line
+    from a crash is ignored.
+
+    Records:
+        {"op": "case", "id": ..., "data": {...}}
+        {"op": "delete_case", "id": ...}
+        {"op": "session", "id": ..., "data": {...}}
+        {"op": "history", "id": ..., "start": n, "turns": [...]}
+        {"op": "delete_session", "id": ...}
+
+    Intended for a single writer process (so `version` is not needed); use the
+    SQLite store when several workers share the data directory.
+    """
+    def __init__(self, path: Path, compact_min_bytes: int = 1 << 20, compact_ratio: float = 2.0):
+        self.path = path
+        self.compact_min_bytes = compact_min_bytes
+        self.compact_ratio = compact_ratio
+        self.cases: CaseRecords = {}
+        self.sessions: SessionRecords = {}
+        self.histories: Dict[str, List[Dict[str, Any]]] = {}
+        self.records = 0
+        self.size = 0
+        self.compacted_size = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _apply(self, record: Dict[str, Any]):
+        op, key = record["op"], record["id"]
+        if op == "case":
+            self.cases[key] = record["data"]
+        elif op == "delete_case":
+            self.cases.pop(key, None)
+        elif op == "session":
+            self.sessions[key] = record["data"]
+        elif op == "history":
+            self.histories[key] = self.histories.get(key, [])[:record["start"]] + record["turns"]
+        elif op == "delete_session":
+            self.sessions.pop(key, None)
+            self.histories.pop(key, None)
+
+    def _replay(self):
+        self.cases, self.sessions, self.histories, self.records = {}, {}, {}, 0
+        self.size = self.compacted_size = 0
+        if not self.path.exists():
+            return
+        with open(self.path, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping unreadable case journal record at line {line_number}")
+                    continue
+                self._apply(record)
+                self.records += 1
+        self.size = self.compacted_size = self.path.stat().st_size
+
+    def _live_records(self) -> int:
+        return len(self.cases) + len(self.sessions) + len(self.histories)
+
+    def _append(self, record: Dict[str, Any]):
+        self._apply(record)
+        if self._file is None:
+            self._file = open(self.path, 'a')
+        line = _dumps(record) + "\n"
+        self._file.write(line)
+        self._file.flush()
+        self.records += 1
+        self.size += len(line.encode())
+        if self.size >= max(self.compact_min_bytes, self.compact_ratio * self.compacted_size):
+            self._compact()
+
+    def _compact(self):
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w') as f:
+            for case_id, data in self.cases.items():
+                f.write(_dumps({"op": "case", "id": case_id, "data": data}) + "\n")
+            for session_id, data in self.sessions.items():
+                f.write(_dumps({"op": "session", "id": session_id, "data": data}) + "\n")
+            for session_id, turns in self.histories.items():
+                f.write(_dumps({"op": "history", "id": session_id, "start": 0, "turns": turns}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        os.replace(tmp_path, self.path)
+        self.records = self._live_records()
+        self.size = self.compacted_size = self.path.stat().st_size
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def load(self) -> Tuple[CaseRecords, SessionRecords]:
+        with self._lock:
+            self._replay()
+            # Mostly superseded records (e.g. the process died before compacting)
+            if self.size >= self.compact_min_bytes and self.records > self.compact_ratio * self._live_records():
+                self._compact()
+            sessions = {
+                sid: {**data, "debateHistory": list(self.histories.get(sid, []))}
+                for sid, data in self.sessions.items()
+            }
+            return dict(self.cases), sessions
+
+    def save_case(self, case_id: str, data: Dict[str, Any], version: Optional[int] = None):
+        with self._lock:
+            self._append({"op": "case", "id": case_id, "data": data})
+
+    def delete_case(self, case_id: str):
+        with self._lock:
+            self._append({"op": "delete_case", "id": case_id})
+
+    def save_session(self, session_id: str, data: Dict[str, Any], version: Optional[int] = None):
+        data = {k: v for k, v in data.items() if k != "debateHistory"}
+        with self._lock:
+            self._append({"op": "session", "id": session_id, "data": data})
+
+    def write_history(self, session_id: str, start: int, turns: List[Dict[str, Any]], version: Optional[int] = None):
+        with self._lock:
+            self._append({"op": "history", "id": session_id, "start": start, "turns": list(turns)})
+
+    def delete_session(self, session_id: str):
+        with self._lock:
+            self._append({"op": "delete_session", "id": session_id})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+class SqliteCaseStore(CaseStore):
+    """
+    Embedded SQLite database in WAL mode: one row per case and per session,
+    and one row per debate turn, so a turn inserts only its new rows. Safe
+    to share between worker processes.
+
+    Every row keeps the version of the write that produced it, and a write
+    only replaces rows older than itself, so a worker flushing late cannot
+    roll back what another worker already stored. For each session history
+    the version and length of its newest write are kept too: turns past that
+    length were dropped by a newer write, so an older write does not bring
+    them back. Deleted cases and sessions leave a tombstone row for the same
+    reason.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS cases (case_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, case_id TEXT, data TEXT NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS sessions_case_id ON sessions (case_id)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_turns ("
+                "session_id TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (session_id, seq))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_histories ("
+                "session_id TEXT PRIMARY KEY, version INTEGER NOT NULL, length INTEGER NOT NULL)"
+            )
+            # Columns added after the first release
+            self._add_column("cases", "version INTEGER NOT NULL DEFAULT 0")
+            self._add_column("cases", "deleted INTEGER NOT NULL DEFAULT 0")
+            self._add_column("sessions", "version INTEGER NOT NULL DEFAULT 0")
+            self._add_column("sessions", "deleted INTEGER NOT NULL DEFAULT 0")
+            self._add_column("session_turns", "version INTEGER NOT NULL DEFAULT 0")
+
+    def _add_column(self, table: str, column: str):
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        if column.split()[0] not in existing:
+            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+
+    def load(self) -> Tuple[CaseRecords, SessionRecords]:
+        with self._lock:
+            cases = {
+                case_id: json.loads(data)
+                for case_id, data in self.conn.execute("SELECT case_id, data FROM cases WHERE deleted = 0")
+            }
+            sessions = {}
+            for session_id, data in self.conn.execute("SELECT session_id, data FROM sessions WHERE deleted = 0"):
+                sessions[session_id] = {**json.loads(data), "debateHistory": []}
+            for session_id, data in self.conn.execute("SELECT session_id, data FROM session_turns ORDER BY session_id, seq"):
+                if session_id in sessions:
+                    sessions[session_id]["debateHistory"].append(json.loads(data))
+            return cases, sessions
+
+    def save_case(self, case_id: str, data: Dict[str, Any], version: Optional[int] = None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO cases (case_id, data, version) VALUES (?, ?, ?) "
+                "ON CONFLICT (case_id) DO UPDATE SET data = excluded.data, version = excluded.version "
+                "WHERE cases.deleted = 0 AND (? IS NULL OR cases.version < excluded.version)",
+                (case_id, _dumps(data), version or 0, version)
+            )
+
+    def delete_case(self, case_id: str):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO cases (case_id, data, deleted) VALUES (?, '{}', 1) "
+                "ON CONFLICT (case_id) DO UPDATE SET data = '{}', deleted = 1",
+                (case_id,)
+            )
+
+    def save_session(self, session_id: str, data: Dict[str, Any], version: Optional[int] = None):
+        data = {k: v for k, v in data.items() if k != "debateHistory"}
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO sessions (session_id, case_id, data, version) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET case_id = excluded.case_id, data = excluded.data, "
+                "version = excluded.version "
+                "WHERE sessions.deleted = 0 AND (? IS NULL OR sessions.version < excluded.version)",
+                (session_id, data.get("caseId"), _dumps(data), version or 0, version)
+            )
+
+    def write_history(self, session_id: str, start: int, turns: List[Dict[str, Any]], version: Optional[int] = None):
+        end = start + len(turns)
+        with self._lock, self.conn:
+            # Reads and writes in one write transaction, so another process cannot write in between
+            self.conn.execute("BEGIN IMMEDIATE")
+            deleted = self.conn.execute("SELECT deleted FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if deleted is not None and deleted[0]:
+                return
+            newest = self.conn.execute(
+                "SELECT version, length FROM session_histories WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if version is None or newest is None or newest[0] < version:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO session_histories (session_id, version, length) VALUES (?, ?, ?)",
+                    (session_id, version or 0, end)
+                )
+                self.conn.execute("DELETE FROM session_turns WHERE session_id = ? AND seq >= ?", (session_id, end))
+            else:
+                # A newer write set the length; turns past it no longer exist
+                turns = turns[:max(newest[1] - start, 0)]
+            self.conn.executemany(
+                "INSERT INTO session_turns (session_id, seq, data, version) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (session_id, seq) DO UPDATE SET data = excluded.data, version = excluded.version "
+                "WHERE ? IS NULL OR session_turns.version < excluded.version",
+                [(session_id, start + i, _dumps(turn), version or 0, version) for i, turn in enumerate(turns)]
+            )
+
+    def delete_session(self, session_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM session_turns WHERE session_id = ?", (session_id,))
+            self.conn.execute("DELETE FROM session_histories WHERE session_id = ?", (session_id,))
+            self.conn.execute(
+                "INSERT INTO sessions (session_id, data, deleted) VALUES (?, '{}', 1) "
+                "ON CONFLICT (session_id) DO UPDATE SET data = '{}', deleted = 1",
+                (session_id,)
+            )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+# Marks a pending delete in the write-behind buffers
+_DELETED = None
+
+# A buffered history write: (start, turns, version)
+HistoryWrite = Tuple[int, List[Dict[str, Any]], Optional[int]]
+
+def _merge_history(older: HistoryWrite, newer: HistoryWrite) -> HistoryWrite:
+    """Combines two history writes into one with the same effect"""
+    old_start, old_turns, _ = older
+    new_start, new_turns, version = newer
+    if old_start <= new_start <= old_start + len(old_turns):
+        return old_start, old_turns[:new_start - old_start] + list(new_turns), version
+    return new_start, list(new_turns), version
+
+class WriteBehindCaseStore(CaseStore):
+    """
+    Buffers writes to another store and applies them in batches. Repeated
+    writes to the same case or session are coalesced (appended turns are
+    merged into one history write), and batches are written by `flush()`,
+    which the background flusher runs in a worker thread every
+    `interval_seconds`, or sooner once `max_pending` records are dirty.
+
+    Until the flusher is started (e.g. in scripts without an event loop)
+    every write goes straight through. `aclose()` stops the flusher and
+    flushes what is left; a crash can lose at most one interval of writes.
+    """
+    def __init__(self, store: CaseStore, interval_seconds: float = 1.0, max_pending: int = 200):
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self.max_pending = max_pending
+        # Pending (data, version) per record, or _DELETED
+        self.cases: Dict[str, Any] = {}
+        self.sessions: Dict[str, Any] = {}
+        self.histories: Dict[str, HistoryWrite] = {}
+        self.flushes = 0
+        self.flushed_records = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self.cases) + len(self.sessions) + len(self.histories)
+
+    def _written(self):
+        if self._task is None or self._task.done():
+            self.flush()
+        elif self.pending >= self.max_pending:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def load(self) -> Tuple[CaseRecords, SessionRecords]:
+        self.flush()
+        return self.store.load()
+
+    def save_case(self, case_id: str, data: Dict[str, Any], version: Optional[int] = None):
+        with self._lock:
+            self.cases[case_id] = (data, version)
+        self._written()
+
+    def delete_case(self, case_id: str):
+        with self._lock:
+            self.cases[case_id] = _DELETED
+        self._written()
+
+    def save_session(self, session_id: str, data: Dict[str, Any], version: Optional[int] = None):
+        data = {k: v for k, v in data.items() if k != "debateHistory"}
+        with self._lock:
+            self.sessions[session_id] = (data, version)
+        self._written()
+
+    def write_history(self, session_id: str, start: int, turns: List[Dict[str, Any]], version: Optional[int] = None):
+        with self._lock:
+            if session_id in self.histories:
+                self.histories[session_id] = _merge_history(self.histories[session_id], (start, turns, version))
+            else:
+                self.histories[session_id] = (start, list(turns), version)
+        self._written()
+
+    def delete_session(self, session_id: str):
+        with self._lock:
+            self.sessions[session_id] = _DELETED
+            self.histories.pop(session_id, None)
+        self._written()
+
+    def _requeue(self, cases: Dict[str, Any], sessions: Dict[str, Any], histories: Dict[str, HistoryWrite]):
+        """Puts a failed batch back behind anything written since"""
+        with self._lock:
+            self.cases = {**cases, **self.cases}
+            self.sessions = {**sessions, **self.sessions}
+            for session_id, write in histories.items():
+                if self.sessions.get(session_id, True) is _DELETED:
+                    continue
+                if session_id in self.histories:
+                    self.histories[session_id] = _merge_history(write, self.histories[session_id])
+                else:
+                    self.histories[session_id] = write
+
+    def flush(self) -> int:
+        """Writes every buffered change to the underlying store. Returns the number of records written."""
+        with self._flush_lock:
+            with self._lock:
+                cases, sessions, histories = self.cases, self.sessions, self.histories
+                self.cases, self.sessions, self.histories = {}, {}, {}
+            if not (cases or sessions or histories):
+                return 0
+            try:
+                for session_id, write in sessions.items():
+                    if write is _DELETED:
+                        self.store.delete_session(session_id)
+                    else:
+                        self.store.save_session(session_id, *write)
+                for session_id, (start, turns, version) in histories.items():
+                    self.store.write_history(session_id, start, turns, version)
+                for case_id, write in cases.items():
+                    if write is _DELETED:
+                        self.store.delete_case(case_id)
+                    else:
+                        self.store.save_case(case_id, *write)
+            except Exception as e:
+                print(f"Error flushing case store, will retry: {e}")
+                # Records written before the error are written again; every write is idempotent
+                self._requeue(cases, sessions, histories)
+                return 0
+            records = len(cases) + len(sessions) + len(histories)
+            self.flushes += 1
+            self.flushed_records += records
+            return records
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self.pending:
+                await asyncio.to_thread(self.flush)
+
+    def start(self) -> asyncio.Task:
+        """Starts the background flusher (call from the app lifespan)"""
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def aclose(self):
+        """Stops the flusher, flushes what is left and closes the underlying store"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await asyncio.to_thread(self.close)
+
+    def close(self):
+        self.flush()
+        self.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "flushes": self.flushes,
+            "flushed_records": self.flushed_records,
+            "running": self._task is not None and not self._task.done()
+        }
+
+def import_records(store: CaseStore, cases: CaseRecords, sessions: SessionRecords):
+    """Copies raw records (e.g. from the legacy JSON files) into a store"""
+    for case_id, data in cases.items():
+        store.save_case(case_id, data)
+    for session_id, data in sessions.items():
+        store.save_session(session_id, data)
+        store.write_history(session_id, 0, data.get("debateHistory", []))
+
+def create_case_store(backend: str, data_dir: Path) -> CaseStore:
+    """
+    Creates the configured store ("json", "journal" or "sqlite"). When the
+    journal or SQLite file is created for the first time, data/cases.json and
+    data/sessions.json are imported into it so existing data carries over.
+    """
+    data_dir.mkdir(parents=True, exist_ok=True)
+    json_store = JsonFileCaseStore(data_dir / "cases.json", data_dir / "sessions.json")
+    if backend == "json":
+        return json_store
+
+    if backend == "journal":
+        path = data_dir / "case_store.jsonl"
+        is_new = not path.exists()
+        store: CaseStore = JournalCaseStore(
+            path,
+            compact_min_bytes=settings.CASE_JOURNAL_COMPACT_MIN_BYTES,
+            compact_ratio=settings.CASE_JOURNAL_COMPACT_RATIO
+        )
+    elif backend == "sqlite":
+        path = data_dir / "case_store.sqlite3"
+        is_new = not path.exists()
+        store = SqliteCaseStore(path)
+    else:
+        raise ValueError(f"Unknown case store backend: {backend}")
+
+    if is_new and (json_store.cases_file.exists() or json_store.sessions_file.exists()):
+        cases, sessions = json_store.load()
+        import_records(store, cases, sessions)
+        print(f"Imported {len(cases)} cases and {len(sessions)} sessions from JSON into the {backend} case store")
+    return store
@@ -1,24 +1,28 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable, Tuple
 from fastapi import HTTPException, status
-from llama_index.core.prompts import PromptTemplate
 import google.generativeai as genai
 from dotenv import load_dotenv
 from datetime import datetime
 import logging
 import json
-from ..core.state_manager import state_manager, DebateState
+from ..core.state_manager import state_manager, DebateState, TurnOrderError
 
-from backend.ai_court.core.llm import gemini_model
-from backend.ai_court.core.query_engine import qna_query_engine, case_query_engine
+from backend.ai_court.core.config import settings
+from backend.ai_court.core.llm import get_gemini_model
+from backend.ai_court.core.query_engine import retrieve_debate_context
 from backend.ai_court.models.api_models import (
     DebateInput, DebateTurnResponse, CaseDetails, CaseStatus, 
     CaseStartResponse, PracticeConfig, DebateTurnInput, DebateTurnOutput
 )
 from backend.ai_court.services.case_manager import case_manager
-
-# Initialize Gemini model
-if gemini_model is None:
-    raise RuntimeError("Gemini model not initialized. Please check your configuration.")
+from backend.ai_court.services.history_summarizer import history_summarizer
+from backend.ai_court.services.intent_classifier import classify_intent
+from backend.ai_court.services.prompt_builder import (
+    build_lawyer_prompt, build_judge_prompt, build_judge_triage_prompt, JUDGE_OPENING_PROMPT
+)
+from backend.llm_gateway import llm_gateway
+from backend.shared_state import ConcurrentUpdateError
 
 # Load environment variables at the very beginning
 load_dotenv()
@@ -27,6 +31,13 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _require_gemini_model():
+    """Returns the Gemini model, or raises 503 if it cannot be initialized."""
+    try:
+        return get_gemini_model()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Gemini model not initialized: {e}")
+
 # Define roles for turn management
 ROLE_JUDGE = "judge"
 ROLE_AI_LAWYER = "ai_lawyer"
@@ -35,6 +46,22 @@ ROLE_USER = "user"
 # Define turn order
 TURN_ORDER = [ROLE_JUDGE, ROLE_USER, ROLE_AI_LAWYER, ROLE_JUDGE]
 
+# --- Judge evaluation modes (see settings.JUDGE_EVALUATION_MODE) ---
+# Speculative: the judge is called concurrently with the AI lawyer, before the
+# lawyer's reply exists, and asked to say so if its decision depends on it.
+NEEDS_LAWYER_REPLY = "NEEDS_LAWYER_REPLY"
+SPECULATIVE_LAWYER_REPLY = "(The AI Lawyer is replying at the same time; the reply is not available yet.)"
+SPECULATIVE_JUDGE_INSTRUCTION = f"""
+
+            NOTE ON TIMING:
+            The AI Lawyer's reply is not available yet. If your decision can be made from the human lawyer's
+            statement and the context above, respond as usual. If whether or how you intervene depends on what
+            the AI Lawyer replies, respond with exactly: "{NEEDS_LAWYER_REPLY}"
+            """
+
+# Receives streamed text chunks
+TokenCallback = Callable[[str], Awaitable[None]]
+
 class TurnBasedDebateError(Exception):
     """Custom exception for turn-based debate errors"""
     def __init__(self, message: str, status_code: int = 400):
@@ -55,94 +82,47 @@ async def handle_turn_based_debate(session_id: str, user_input: Optional[str] =
     """
     try:
         # Get the current debate state
-        if session_id not in state_manager.sessions:
+        state = state_manager.get_session(session_id)
+        if state is None:
             raise TurnBasedDebateError("Session not found", status_code=404)
-            
-        state = state_manager.sessions[session_id]
         
-        # If it's the user's turn, validate and process their input
-        if state.waiting_for == ROLE_USER:
-            if not user_input or not user_input.strip():
-                raise TurnBasedDebateError("User input is required", status_code=400)
-                
-            # Add user's message to the debate history
-            state_manager.add_message(session_id, ROLE_USER, user_input)
-            
-            # Generate AI lawyer's response
-            return await _generate_ai_lawyer_response(session_id)
-            
-        # If it's the AI lawyer's turn, generate their response
-        elif state.waiting_for == ROLE_AI_LAWYER:
-            return await _generate_ai_lawyer_response(session_id)
-            
-        # If it's the judge's turn, generate their response
-        elif state.waiting_for == ROLE_JUDGE:
-            return await _generate_judge_response(session_id)
-            
-        else:
+        # The user's argument is required on their turn; other turns are generated
+        if state.waiting_for == ROLE_USER and (not user_input or not user_input.strip()):
+            raise TurnBasedDebateError("User input is required", status_code=400)
+        if state.waiting_for not in (ROLE_USER, ROLE_AI_LAWYER, ROLE_JUDGE):
             raise TurnBasedDebateError("Invalid turn state", status_code=500)
+        _require_gemini_model()
+        
+        # The workflow records the user's argument (if any) and the next generated response
+        try:
+            turn = await state_manager.run_turn(session_id, user_input)
+        except TurnOrderError as e:
+            raise TurnBasedDebateError(str(e), status_code=409)
+        history_summarizer.schedule_debate_state(session_id)
+        
+        state = state_manager.get_session(session_id)
+        return {
+            "role": turn["role"],
+            "content": turn["content"],
+            "next_turn": state.waiting_for,
+            "round": state.current_round
+        }
             
     except TurnBasedDebateError as e:
         logger.error(f"Turn-based debate error: {str(e)}")
         raise HTTPException(status_code=e.status_code, detail=e.message)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error in turn-based debate: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
 
-async def _generate_ai_lawyer_response(session_id: str) -> Dict[str, Any]:
-    """Generate a response from the AI lawyer"""
-    state = state_manager.sessions[session_id]
-    
-    # Get the prompt for the AI lawyer
-    prompt = state_manager.get_ai_lawyer_prompt(session_id)
-    
-    # Generate the response using Gemini
-    response = await gemini_model.generate_content_async(prompt)
-    
-    # Add the AI lawyer's response to the debate history
-    state_manager.add_message(session_id, ROLE_AI_LAWYER, response.text)
-    
-    # Return the response and next turn info
-    return {
-        "role": ROLE_AI_LAWYER,
-        "content": response.text,
-        "next_turn": ROLE_JUDGE,
-        "round": state.current_round
-    }
-
-
-async def _generate_judge_response(session_id: str) -> Dict[str, Any]:
-    """Generate a response from the judge"""
-    state = state_manager.sessions[session_id]
-    
-    # Get the prompt for the judge
-    prompt = state_manager.get_judge_prompt(session_id)
-    
-    # Generate the response using Gemini
-    response = await gemini_model.generate_content_async(prompt)
-    
-    # Add the judge's response to the debate history
-    state_manager.add_message(session_id, ROLE_JUDGE, response.text)
-    
-    # Determine the next speaker
-    next_speaker = ROLE_USER if state.waiting_for != ROLE_USER else ROLE_AI_LAWYER
-    
-    # Return the response and next turn info
-    return {
-        "role": ROLE_JUDGE,
-        "content": response.text,
-        "next_turn": next_speaker,
-        "round": state.current_round
-    }
-
-
 async def start_new_case(case_details: CaseDetails, practice_config: Dict) -> CaseStartResponse:
     """
     Start a new case with proper setup and judge opening.
     """
-    if gemini_model is None:
-        raise HTTPException(status_code=500, detail="Gemini model not initialized.")
+    gemini_model = _require_gemini_model()
     
     try:
         # Create the case
@@ -155,46 +135,24 @@ async def start_new_case(case_details: CaseDetails, practice_config: Dict) -> Ca
         session_id = case_manager.create_session(case_id, practice_config_obj)
         
         # Generate judge opening statement
-        judge_opening_prompt = PromptTemplate(
-            """
-            You are an AI Judge presiding over a new legal case. You need to provide a formal opening statement for the court.
-            
-            CASE DETAILS:
-            - Case Title: {case_title}
-            - Case Type: {case_type}
-            - Specific Issue: {specific_issue}
-            - Plaintiff: {plaintiff}
-            - Defendant: {defendant}
-            - User Role: {user_role}
-            - Case Summary: {case_summary}
-            - Key Arguments: {key_arguments}
-            
-            PRACTICE CONFIGURATION:
-            - Difficulty Level: {difficulty_level}
-            - Judge Strictness: {judge_strictness}
-            - Opponent Experience: {opponent_experience}
-            - Opponent Style: {opponent_style}
-            
-            Provide a formal court opening that:
-            1. Acknowledges the appearance of both parties
-            2. Summarizes the case briefly and professionally
-            3. Sets the proper courtroom tone and expectations
-            4. Mentions the key legal issues to be addressed
-            5. Provides clear procedural guidance
-            
-        
-        Your task is to provide a concise opening statement that:
-        1. Acknowledges the court is now in session
-        2. States the nature of the case
-        3. Outlines the key legal principles at stake
-        4. Sets expectations for both counsels
-        5. Maintains strict courtroom decorum
-        
-        Keep it under 5 sentences. Be authoritative but not verbose.
-        """
+        judge_prompt = JUDGE_OPENING_PROMPT.format(
+            case_title=case_details.caseTitle,
+            case_type=case_details.caseType.value,
+            specific_issue=case_details.specificIssue,
+            plaintiff=case_details.plaintiff,
+            defendant=case_details.defendant,
+            user_role=case_details.userRole,
+            case_summary=case_details.caseSummary,
+            key_arguments="; ".join(case_details.keyArguments) or "Not specified",
+            difficulty_level=practice_config_obj.difficultyLevel or "Standard",
+            judge_strictness=practice_config_obj.judgeStrictness or "Moderate",
+            opponent_experience=practice_config_obj.opponentExperience or "Standard",
+            opponent_style=practice_config_obj.opponentStyle or "Professional"
         )
-        judge_opening = await gemini_model.generate_content_async(
+        judge_opening = await llm_gateway.generate(
+            gemini_model,
             judge_prompt,
+            caller="judge_opening",
             generation_config=genai.types.GenerationConfig(
                 temperature=0.2,  # Lower temperature for more predictable output
                 max_output_tokens=200,
@@ -203,24 +161,16 @@ async def start_new_case(case_details: CaseDetails, practice_config: Dict) -> Ca
             )
         )
         
-        # Add to debate history
-        state_manager.add_to_history(
+        # The opening is the first turn of the session's history (continue_case builds on it)
+        case_manager.update_session_history(session_id, [{"role": "judge", "content": judge_opening.text}])
+        
+        return CaseStartResponse(
             session_id=session_id,
-            role="judge",
-            content=judge_opening.text
+            case_id=case_id,
+            judge_opening=judge_opening.text,
+            case_status=case_manager.get_case(case_id).status
         )
         
-        return {
-            "session_id": session_id,
-            "judge_opening": judge_opening.text,
-            "case_details": {
-                "case_type": case_details.case_type,
-                "specific_issue": case_details.specific_issue,
-                "case_summary": case_details.case_summary
-            },
-            "instructions": "The court is now in session. Please present your case."
-        }
-        
     except Exception as e:
         logger.error(f"Error starting new case: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -236,6 +186,7 @@ async def continue_case(session_id: str, human_input: str) -> DebateTurnResponse
     session = case_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    session_version = case_manager.get_session_version(session_id)
     
     # Get the case details
     case = case_manager.get_case(session.caseId)
@@ -246,6 +197,8 @@ async def continue_case(session_id: str, human_input: str) -> DebateTurnResponse
     debate_input = DebateInput(
         human_input=human_input,
         debate_history=session.debateHistory,
+        history_summary=session.historySummary,
+        summarized_turns=session.summarizedTurns,
         practice_config=session.practiceConfig,
         session_id=session_id
     )
@@ -262,7 +215,13 @@ async def continue_case(session_id: str, human_input: str) -> DebateTurnResponse
     if response.judge_intervention != "NO_JUDGE_INTERVENTION":
         updated_history.append({"role": "judge", "content": response.judge_intervention})
     
-    case_manager.update_session_history(session_id, updated_history)
+    try:
+        case_manager.update_session_history(session_id, updated_history, expected_version=session_version)
+    except ConcurrentUpdateError:
+        # Another request (possibly on another worker) recorded a turn while this one ran
+        raise HTTPException(status_code=409, detail="The session was updated by another request; please resend your argument")
+    # Fold turns that left the verbatim window into the summary, off the request path
+    history_summarizer.schedule_case_session(session_id)
     
     # Add session info to response
     response.session_id = session_id
@@ -274,518 +233,160 @@ async def conduct_debate_turn(input: DebateInput) -> DebateTurnResponse:
     """
     Orchestrates a single turn of the legal debate, involving AI Lawyer and AI Judge.
     """
-    if gemini_model is None:
-        raise HTTPException(status_code=500, detail="Gemini model not initialized.")
+    return await _run_debate_turn(input)
+
+async def stream_debate_turn(input: DebateInput) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Runs a debate turn and yields (event, data) pairs as it progresses:
+    "sources" once retrieval finishes, "lawyer_token" chunks then "lawyer_done",
+    "judge_token" chunks then "judge_done" (only if the judge intervenes), and
+    finally "done" with the full DebateTurnResponse.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def emit(event: str, data: Dict[str, Any]):
+        await queue.put((event, data))
+
+    async def run():
+        try:
+            response = await _run_debate_turn(input, emit=emit)
+            await emit("done", response.dict())
+        finally:
+            await queue.put(None)
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            yield item
+        # Surface errors raised by the turn
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+
+async def _generate_text(gemini_model, prompt: str, generation_config, caller: str,
+                         on_token: Optional[TokenCallback] = None) -> str:
+    """Calls Gemini through the LLM gateway, streaming chunks to on_token when given."""
+    if on_token is None:
+        response = await llm_gateway.generate(gemini_model, prompt, caller=caller, generation_config=generation_config)
+        return response.text
+
+    parts = []
+    async for chunk in llm_gateway.stream(gemini_model, prompt, caller=caller, generation_config=generation_config):
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunk without text (e.g. safety-blocked or finish-only)
+            continue
+        if text:
+            parts.append(text)
+            await on_token(text)
+    return "".join(parts)
+
+class _ControlResponseFilter:
+    """
+    Holds back the start of a streamed reply until it can no longer be one of
+    the control responses (e.g. NO_JUDGE_INTERVENTION), which must never reach
+    the client.
+    """
+    def __init__(self, on_token: TokenCallback, control_responses: List[str]):
+        self.on_token = on_token
+        self.control_responses = control_responses
+        self.buffer = ""
+        self.released = False
+
+    def _could_be_control(self) -> bool:
+        head = self.buffer.strip().strip('"')
+        return any(control.startswith(head) or head.startswith(control) for control in self.control_responses)
+
+    async def __call__(self, text: str):
+        if self.released:
+            await self.on_token(text)
+            return
+        self.buffer += text
+        if not self._could_be_control():
+            self.released = True
+            await self.on_token(self.buffer)
+
+    async def flush(self):
+        """Releases a short reply that turned out not to be a control response."""
+        head = self.buffer.strip().strip('"')
+        if not self.released and head and head not in self.control_responses:
+            self.released = True
+            await self.on_token(self.buffer)
+
+async def _run_debate_turn(input: DebateInput, emit: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None) -> DebateTurnResponse:
+    """
+    Runs a debate turn. When emit is given, Gemini output is streamed and
+    progress is reported through it (see stream_debate_turn).
+    """
+    gemini_model = _require_gemini_model()
 
     try:
         # --- 1. Retrieval (with fallback) ---
+        # Embeds the input once and queries both collections concurrently;
+        # a failed or timed-out collection comes back with empty sources.
         qna_retrieval_result = {"sources": []}
         case_retrieval_result = {"sources": []}
         
         try:
-            qna_retrieval_result = await qna_query_engine.aquery(query=input.human_input)
-        except Exception as e:
-            print(f"QNA retrieval failed: {e}")
-            
-        try:
-            case_retrieval_result = await case_query_engine.aquery(query=input.human_input)
+            qna_retrieval_result, case_retrieval_result = await retrieve_debate_context(input.human_input)
         except Exception as e:
-            print(f"Case retrieval failed: {e}")
-        
-        # --- Helper for formatting retrieved documents for LLM prompts ---
-        def format_llm_context(retrieved_sources: List[Dict], include_sources_detail: bool = False) -> str:
-            formatted_texts = []
-            for i, doc in enumerate(retrieved_sources):
-                text = doc['text']
-                metadata = doc['metadata']
-                source_info_parts = []
-                if include_sources_detail:
-                    if metadata.get('case_name'): source_info_parts.append(f"Case: {metadata['case_name']}")
-                    if metadata.get('court'): source_info_parts.append(f"Court: {metadata['court']}")
-                    if metadata.get('judgement_date'): source_info_parts.append(f"Date: {metadata['judgement_date']}")
-                    if metadata.get('legal_principles'): source_info_parts.append(f"Principles: {'; '.join(metadata['legal_principles'])}")
-                    if metadata.get('citations'): source_info_parts.append(f"Citations: {'; '.join(metadata['citations'])}")
-                    if metadata.get('tags') and isinstance(metadata['tags'], list):
-                        source_info_parts.append(f"Tags: {'; '.join(metadata['tags'])}")
-                    if metadata.get('source_file'): source_info_parts.append(f"File: {metadata['source_file']}")
-                    if metadata.get('page_label'): source_info_parts.append(f"Page: {metadata['page_label']}")
-                    
-                    formatted_texts.append(f"--- Document {i+1} (Score: {doc['score']:.2f}) ---\nContent: {text}\n[Source Details: {'; '.join(source_info_parts) or 'No specific metadata'}]")
-                else:
-                    formatted_texts.append(f"--- Document {i+1} (Score: {doc['score']:.2f}) ---\nContent: {text}")
-            return "\n\n".join(formatted_texts)
-
-        qna_context_for_lawyer = format_llm_context(qna_retrieval_result.get('sources', []), include_sources_detail=False)
-        if not qna_retrieval_result.get('sources'):
-            qna_context_for_lawyer = "No specific legal precedents or case law found for this query. Rely on general legal principles and your expertise."
-        case_context_for_judge = format_llm_context(case_retrieval_result.get('sources', []), include_sources_detail=True)
-        if not case_retrieval_result.get('sources'):
-            case_context_for_judge = "No specific case law or precedents found for judicial reference. Proceed based on general legal principles."
+            print(f"Retrieval failed: {e}")
         
         # Debug logging for RAG usage
         print(f"=== RAG DEBUG INFO ===")
         print(f"QNA sources retrieved: {len(qna_retrieval_result.get('sources', []))}")
         print(f"Case law sources retrieved: {len(case_retrieval_result.get('sources', []))}")
-        if qna_retrieval_result.get('sources'):
-            print(f"QNA context length: {len(qna_context_for_lawyer)} characters")
-        if case_retrieval_result.get('sources'):
-            print(f"Case context length: {len(case_context_for_judge)} characters")
         print(f"=======================")
 
-        # --- 2. Role-Aware Turn Logic ---
-        # Determine who the human is addressing and who should respond
-        
-        # Check if human is addressing the judge
-        judge_address_indicators = [
-            'your honour', 'your honor', 'judge', 'court', 'your lordship', 
-            'your worship', 'may it please the court', 'if it please the court'
-        ]
-        is_addressing_judge = any(indicator in input.human_input.lower() for indicator in judge_address_indicators)
-        
-        # Check if human is addressing the opposition lawyer
-        opposition_address_indicators = [
-            'counsel', 'opposition', 'defense', 'defence', 'prosecution', 
-            'my learned friend', 'learned counsel', 'opposing counsel'
-        ]
-        is_addressing_opposition = any(indicator in input.human_input.lower() for indicator in opposition_address_indicators)
-        
-        # Check if this is a general statement that requires opposition response
-        requires_opposition_response = any(indicator in input.human_input.lower() for indicator in [
-            'case', 'plaintiff', 'defendant', 'prove', 'allegations', 'claims', 
-            'matter', 'proceedings', 'will prove', 'allege', 'demonstrate',
-            'discrimination', 'retaliation', 'violation', 'breach', 'damages',
-            'evidence', 'witness', 'testimony', 'argument'
-        ])
-        
-        # Check if this is a procedural request (should go to judge)
-        procedural_requests = [
-            'objection', 'sustain', 'overrule', 'strike', 'withdraw', 'rephrase',
-            'clarification', 'recess', 'adjourn', 'continue', 'proceed', 'may i approach',
-            'permission to', 'request for', 'ruling', 'decision', 'order'
-        ]
-        is_procedural_request = any(request in input.human_input.lower() for request in procedural_requests)
-        
-        # Check if this is evidence submission (requires judge oversight)
-        evidence_submission_indicators = [
-            'submit', 'introduce', 'exhibit', 'evidence', 'document', 'file', 'attached',
-            'present', 'offer', 'produce', 'tender', 'mark as exhibit', 'admit into evidence'
-        ]
-        is_evidence_submission = any(indicator in input.human_input.lower() for indicator in evidence_submission_indicators)
-        
-        # Check if this is a document attachment without proper introduction
-        document_attachment_indicators = [
-            'attached', 'uploaded', 'upload', 'file', 'document', 'pdf', 'doc', 'txt'
-        ]
-        is_document_attachment = any(indicator in input.human_input.lower() for indicator in document_attachment_indicators)
-        
-        # Check if document is properly introduced with purpose
-        proper_document_introduction = (
-            is_evidence_submission and 
-            any(purpose in input.human_input.lower() for purpose in [
-                'as evidence', 'supporting', 'showing', 'demonstrating', 'proving',
-                'establishing', 'corroborating', 'confirming', 'verifying'
-            ])
-        )
-        
-        # Determine who should respond based on courtroom procedure
-        if is_addressing_judge or is_procedural_request:
-            # Judge should respond, AI Lawyer should NOT respond
-            ai_lawyer_should_respond = False
-            judge_should_respond = True
-        elif is_evidence_submission or (is_document_attachment and not proper_document_introduction):
-            # Evidence submission requires judge oversight first
-            ai_lawyer_should_respond = False
-            judge_should_respond = True
-        elif is_addressing_opposition or requires_opposition_response:
-            # AI Lawyer should respond, Judge should NOT respond unless there's an error
-            ai_lawyer_should_respond = True
-            judge_should_respond = False
-        else:
-            # Default: AI Lawyer responds to general statements
-            ai_lawyer_should_respond = True
-            judge_should_respond = False
-        
-        # Check if this is a simple greeting (both can respond appropriately)
-        simple_greetings = ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening']
-        is_greeting = input.human_input.lower().strip() in simple_greetings
-        
-        if is_greeting:
-            if is_addressing_judge:
-                ai_lawyer_should_respond = False
-                judge_should_respond = True
-            else:
-                ai_lawyer_should_respond = True
-                judge_should_respond = False
-
-        # Check if this appears to be the start of a case presentation
-        case_start_indicators = [
-            'represent', 'case', 'plaintiff', 'defendant', 'your honor', 'court', 
-            'prove', 'allegations', 'claims', 'matter', 'proceedings'
-        ]
-        is_case_start = any(indicator in input.human_input.lower() for indicator in case_start_indicators)
-        
-        # Check if this is a very short debate history (likely just starting)
-        is_debate_beginning = len(input.debate_history) <= 2
-        
-        # Special case: If this is clearly the start of a case presentation, trigger judge opening
-        should_judge_open = is_case_start and is_debate_beginning
-        
-        # Check if judge is being directly addressed
-        judge_address_indicators = ['your honor', 'judge', 'court', 'your lordship', 'your worship']
-        is_judge_addressed = any(indicator in input.human_input.lower() for indicator in judge_address_indicators)
-        
-        # Check if this is a direct greeting to the judge
-        judge_greeting_indicators = ['hello judge', 'hi judge', 'good morning judge', 'good afternoon judge']
-        is_judge_greeting = any(greeting in input.human_input.lower() for greeting in judge_greeting_indicators)
-        
-        # Add missing variables for judge prompt
-        is_case_presentation = requires_opposition_response
-        is_direct_to_judge = is_addressing_judge
-        
-        # Build AI Lawyer prompt based on practice configuration
-        AI_LAWYER_PROMPT = PromptTemplate(
-            """
-            You are an experienced Defense Attorney with 15+ years of criminal defense practice. You are representing a client in a {case_type} case. Your responses must be:
-            - Concise and to the point (max 3-4 sentences)
-            - Legally precise and technically accurate
-            - Focused on the specific allegations
-            - Based only on known facts and evidence
-
-            CASE CONTEXT:
-            - Case Type: {case_type}
-            - Specific Charge: {specific_issue}
-            - Known Facts: {case_summary}
-            - Your Role: Defense Counsel
-            - Prosecution's Role: {user_role}
-
-            RESPONSE RULES:
-            1. NEVER invent or assume facts not in evidence
-            2. ALWAYS maintain presumption of innocence
-            3. Focus on specific weaknesses in prosecution's case
-            4. Cite specific legal principles when relevant
-            5. Keep responses brief and impactful
-
-            OPPOSITION STRATEGY:
-            - Experience Level: {opponent_experience}
-            - Argument Style: {opponent_style}
-            - Case Difficulty: {difficulty_level}
-            
-            CURRENT DEBATE CONTEXT:
-            {debate_history}
-
-            📚 RELEVANT LEGAL CONTEXT (from case law and precedents):
-            {qna_context}
-
-            RESPONSE GUIDELINES:
-            1. **Legal Accuracy**: Use precise legal terminology and correct burden of proof standards
-            2. **Evidence Analysis**: When challenging evidence, explain specific grounds (timing, consistency, corroboration)
-            3. **Section 498A Specific**: For 498A cases, acknowledge the burden lies on prosecution but note contextual factors
-            4. **Professional Tone**: Maintain respectful but firm opposition
-            5. **Strategic Focus**: Target weaknesses in opponent's arguments and evidence
-            6. **RAG Integration**: Reference relevant legal principles, precedents, and case law from the provided context when applicable
-
-            LEGAL STANDARDS BY CASE TYPE:
-            - **Criminal Cases (498A)**: "The burden lies on the prosecution to demonstrate that the alleged acts amount to cruelty as defined under Section 498A IPC. Courts consider context, continuity, and credibility of allegations."
-            - **Civil Cases**: "The plaintiff must establish their case on a preponderance of evidence, demonstrating clear and convincing proof."
-            - **Employment Cases**: "The burden shifts based on the nature of the claim - discrimination cases require prima facie evidence before burden shifts to employer."
-
-            EVIDENCE CHALLENGE TEMPLATES:
-            - Medical Reports: "The medical reports lack contemporaneous complaints and show inconsistencies in timing. Without corroborative injuries or immediate reporting, their probative value is limited."
-            - Witness Credibility: "The witness testimony shows material contradictions and lacks independent corroboration."
-            - Documentary Evidence: "The documents presented lack proper authentication and chain of custody."
-
-            RESPOND TO: {human_input}
+        # --- Extract and compile metadata for response ---
+        extracted_metadata = {
+            "qna_principles": list(set([p for doc in qna_retrieval_result.get('sources', []) for p in doc.get('metadata', {}).get('legal_principles', [])])),
+            "qna_citations": list(set([c for doc in qna_retrieval_result.get('sources', []) for c in doc.get('metadata', {}).get('citations', [])])),
+            "case_principles": list(set([p for doc in case_retrieval_result.get('sources', []) for p in doc.get('metadata', {}).get('legal_principles', [])])),
+            "case_citations": list(set([c for doc in case_retrieval_result.get('sources', []) for c in doc.get('metadata', {}).get('citations', [])])),
+            "case_tags": list(set([tag for doc in case_retrieval_result.get('sources', []) for tag in doc.get('metadata', {}).get('tags', []) if isinstance(doc.get('metadata', {}).get('tags'), list)]))
+        }
 
-            Your response (be concise, legal, and strategic):
-            """
-        )
+        if emit is not None:
+            await emit("sources", {
+                "sources": {
+                    "qna_sources": qna_retrieval_result.get('sources', []),
+                    "case_sources": case_retrieval_result.get('sources', [])
+                },
+                "metadata": extracted_metadata
+            })
 
-        # Add practice configuration context if available
-        practice_context = ""
-        if hasattr(input, 'practice_config') and input.practice_config:
-            # Handle both dict and Pydantic model formats
-            if hasattr(input.practice_config, 'dict'):
-                config = input.practice_config.dict()
-            elif isinstance(input.practice_config, dict):
-                config = input.practice_config
-            else:
-                config = {}
-            
-            practice_context = f"""
-            
-            PRACTICE SESSION CONTEXT:
-            - Case Type: {config.get('caseType', 'General')}
-            - Specific Issue: {config.get('specificIssue', 'Not specified')}
-            - Your Experience Level: {config.get('opponentExperience', 'Standard')}
-            - Your Argument Style: {config.get('opponentStyle', 'Professional')}
-            - Your Strengths: {config.get('opponentStrengths', 'General legal knowledge')}
-            - Difficulty Level: {config.get('difficultyLevel', 'Standard')}
-            - Time Pressure: {config.get('timePressure', 'None')}
-            
-            Adapt your responses accordingly:
-            - Experience Level: {config.get('opponentExperience', 'Standard')} - Adjust complexity and sophistication
-            - Argument Style: {config.get('opponentStyle', 'Professional')} - Match this style in your responses
-            - Difficulty: {config.get('difficultyLevel', 'Standard')} - Adjust challenge level appropriately
-            """
+        # --- 2. Role-Aware Turn Logic ---
+        # Determine who the human is addressing and who should respond
+        intent = classify_intent(input.human_input)
+        ai_lawyer_should_respond = intent.ai_lawyer_should_respond
+        judge_should_respond = intent.judge_should_respond
+
+        is_greeting = intent.is_greeting
+        is_procedural_request = intent.is_procedural_request
+        is_evidence_submission = intent.is_evidence_submission
+        is_document_attachment = intent.is_document_attachment
+        proper_document_introduction = intent.proper_document_introduction
+        is_case_start = intent.is_case_start
+        is_judge_addressed = intent.is_judge_addressed
+        is_judge_greeting = intent.is_judge_greeting
 
-        # Check if this is a simple greeting
-        simple_greetings = ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening']
-        is_greeting = input.human_input.lower().strip() in simple_greetings
-        
-        # Check if this appears to be the start of a case presentation
-        case_start_indicators = [
-            'represent', 'case', 'plaintiff', 'defendant', 'your honor', 'court', 
-            'prove', 'allegations', 'claims', 'matter', 'proceedings'
-        ]
-        is_case_start = any(indicator in input.human_input.lower() for indicator in case_start_indicators)
-        
         # Check if this is a very short debate history (likely just starting)
         is_debate_beginning = len(input.debate_history) <= 2
         
         # Special case: If this is clearly the start of a case presentation, trigger judge opening
         should_judge_open = is_case_start and is_debate_beginning
         
-        # Check if judge is being directly addressed
-        judge_address_indicators = ['your honor', 'judge', 'court', 'your lordship', 'your worship']
-        is_judge_addressed = any(indicator in input.human_input.lower() for indicator in judge_address_indicators)
-        
-        # Check if this is a direct greeting to the judge
-        judge_greeting_indicators = ['hello judge', 'hi judge', 'good morning judge', 'good afternoon judge']
-        is_judge_greeting = any(greeting in input.human_input.lower() for greeting in judge_greeting_indicators)
-        
-        # Generate AI Lawyer response only if needed
-        ai_lawyer_response = ""
-        ai_lawyer_prompt_str = ""  # Initialize the variable
-        
-        if ai_lawyer_should_respond:
-            if is_greeting:
-                ai_lawyer_prompt_template = PromptTemplate(
-                    """
-                    You are an AI Lawyer acting as opposition counsel. The human lawyer has just greeted you.
-                    
-                    Respond naturally and professionally to their greeting. Be brief and friendly, but maintain your role as opposition counsel.
-                    Don't dive into legal arguments yet - just acknowledge their greeting and perhaps ask what case or matter they'd like to discuss.
-                    
-                    📚 RELEVANT LEGAL CONTEXT (if any):
-                    {qna_context}
-                    
-                    Human Lawyer's greeting: "{human_input}"
-                    
-                    Your response:
-                    """
-                )
-                ai_lawyer_prompt_str = ai_lawyer_prompt_template.format(
-                    qna_context=qna_context_for_lawyer,
-                    human_input=input.human_input
-                )
-            else:
-                # Handle practice_config whether it's a dict or Pydantic model
-                practice_config_dict = {}
-                if hasattr(input, 'practice_config') and input.practice_config:
-                    if hasattr(input.practice_config, 'dict'):
-                        practice_config_dict = input.practice_config.dict()
-                    elif isinstance(input.practice_config, dict):
-                        practice_config_dict = input.practice_config
-                
-                # Get case details from input if available
-                case_details = None
-                if hasattr(input, 'case_details') and input.case_details:
-                    case_details = input.case_details
-                
-                ai_lawyer_prompt_str = AI_LAWYER_PROMPT.format(
-                    case_type=case_details.caseType.value if case_details else 'General',
-                    specific_issue=case_details.specificIssue if case_details else 'Not specified',
-                    case_summary=case_details.caseSummary if case_details else 'Not specified',
-                    user_role=case_details.userRole if case_details else 'Not specified',
-                    opponent_experience=practice_config_dict.get('opponentExperience', 'Standard'),
-                    opponent_style=practice_config_dict.get('opponentStyle', 'Professional'),
-                    opponent_strengths=practice_config_dict.get('opponentStrengths', 'General legal knowledge'),
-                    difficulty_level=practice_config_dict.get('difficultyLevel', 'Standard'),
-                    qna_context=qna_context_for_lawyer,
-                    human_input=input.human_input
-                )
-            
-            ai_lawyer_response_obj = await gemini_model.generate_content_async(
-                ai_lawyer_prompt_str,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=1024,
-                    top_p=0.8,
-                )
-            )
-            
-            if ai_lawyer_should_respond:
-                try:
-                    ai_lawyer_response = ai_lawyer_response_obj.text.strip()
-                    print(f"=== AI LAWYER DEBUG ===")
-                    print(f"Prompt: {ai_lawyer_prompt_str[:200]}...")
-                    print(f"Response: {ai_lawyer_response}")
-                    print(f"Response length: {len(ai_lawyer_response)}")
-                    print(f"=======================")
-                except Exception as e:
-                    print(f"Error getting AI lawyer response: {e}")
-                    ai_lawyer_response = "NO_LAWYER_RESPONSE"
-            else:
-                ai_lawyer_response = "NO_LAWYER_RESPONSE"
-                print(f"=== AI LAWYER DEBUG ===")
-                print(f"AI lawyer should NOT respond")
-                print(f"=======================")
-
-        # --- 3. AI Judge's Evaluation & Intervention Decision ---
-        judge_prompt_base = """
-            You are a High Court Judge with 20+ years of experience, presiding over this case. You maintain strict courtroom decorum and ensure proper legal procedures are followed.
-            
-            COURTROOM RULES:
-            1. Maintain control of proceedings
-            2. Ensure arguments stay relevant to the charges
-            3. Prevent speculation and unsubstantiated claims
-            4. Uphold rules of evidence
-            5. Keep discussions focused and professional
-            
-            Your primary responsibilities:
-            - Ensure proper legal procedures are followed
-            - Rule on objections and admissibility of evidence
-            - Guide the examination of witnesses
-            - Maintain order and decorum in the courtroom
-            - Ensure both parties get fair opportunity to present their case
-            
-            Current Case: {case_type} - {specific_issue}
-            Your role is to ensure legal accuracy, procedural fairness, and maintain courtroom decorum.
-
-            INTERVENTION GUIDELINES:
-            You should intervene in the following situations:
-            1. **Direct Address**: When either party directly addresses you ("Your Honor", "Judge", "Court")
-            2. **Procedural Requests**: Objections, motions, requests for clarification, recess, etc.
-            3. **Legal Errors**: Significant misstatements of law, incorrect citations, or factual errors
-            4. **Procedural Issues**: Improper courtroom conduct, irrelevant arguments, or procedural violations
-            5. **Clarification Needed**: When a critical legal principle needs clarification for the debate to proceed
-            6. **Ruling Requests**: When either party explicitly requests a ruling or decision
-            7. **Debate Direction**: When the debate needs judicial guidance to stay on track
-            8. **Opening/Closing**: Provide brief opening remarks when the case begins, and closing remarks when appropriate
-            9. **Direct Greetings**: When someone specifically greets you (e.g., "hello judge")
-            10. **Evidence Submission**: When documents or evidence are submitted for admission
-            11. **Case Introduction**: When a new case is being presented, provide a formal court opening
-
-            EVIDENCE SUBMISSION PROCEDURE:
-            When a document or evidence is submitted:
-            1. **Proper Introduction**: If the document is properly introduced with purpose (e.g., "We submit this CCTV footage as evidence supporting our claim"), acknowledge receipt and ask for opposition response
-            2. **Improper Introduction**: If a document is attached without proper introduction, guide the lawyer on proper procedure
-            3. **Admissibility**: Always ask for opposition objections before admitting evidence
-            4. **Documentation**: Maintain proper exhibit numbering and documentation
-
-            INTERVENTION STYLE:
-            - Be authoritative but fair
-            - Use judicial language: "The Court observes...", "Counsel, please...", "It is ordered that..."
-            - Keep interventions concise and focused
-            - Cite relevant legal authority when applicable
-            - Maintain impartiality between both parties
-            - When directly addressed, acknowledge the address appropriately
-            - For case introductions, be formal and set the proper courtroom tone
-            - For evidence submission, ensure proper procedure is followed
-
-            FORMATTING GUIDELINES:
-            - Use **bold text** for judicial orders, rulings, and important legal principles
-            - Use *italic text* for emphasis on key judicial points
-            - Use `monospace` for specific legal citations and case references
-            - Structure your responses with clear judicial authority
-            - Use formal, authoritative language befitting a judge
-
-            IMPORTANT: If you decide NOT to intervene, respond with exactly: "NO_JUDGE_INTERVENTION" (this will be filtered out and not shown to users)
-            
-            If you DO intervene, provide a clear, authoritative judicial statement that addresses the specific situation.
-        """
-
-        # Add judge strictness context if available
-        judge_context = ""
-        if hasattr(input, 'practice_config') and input.practice_config:
-            config = input.practice_config
-            judge_context = f"""
-            
-            JUDGE CONFIGURATION:
-            - Strictness Level: {config.judgeStrictness or 'Moderate'}
-            - Case Type: {config.caseType or 'General'}
-            - Difficulty Level: {config.difficultyLevel or 'Standard'}
-            
-            Adjust your intervention frequency based on strictness:
-            - Lenient: Intervene only for major legal errors
-            - Moderate: Intervene for significant errors and missing context
-            - Strict: Intervene for any legal inaccuracies
-            - Very Strict: Intervene frequently to maintain legal precision
-            """
-
-        judge_prompt_template = PromptTemplate(
-            judge_prompt_base + judge_context + """
-            
-            ---
-            CURRENT DEBATE CONTEXT:
-            🧑 Human Lawyer's Statement: "{human_input}"
-            🤖 AI Lawyer's Reply: "{ai_lawyer_response}"
-
-            📚 Relevant Case Law Context (for judicial reference):
-            {case_context}
-
-            📖 Debate History (for context):
-            {debate_history_str}
-
-            ---
-            DEBATE STATUS:
-            - Is this a greeting? {is_greeting}
-            - Is this the start of a case presentation? {is_case_start}
-            - Is this a case presentation? {is_case_presentation}
-            - Is this the beginning of the debate? {is_debate_beginning}
-            - Should judge provide opening remarks? {should_judge_open}
-            - Is judge being directly addressed? {is_judge_addressed}
-            - Is this a direct greeting to judge? {is_judge_greeting}
-            - Is this a procedural request? {is_procedural_request}
-            - Is this direct to judge? {is_direct_to_judge}
-            - Did AI lawyer respond? {ai_lawyer_responded}
-            - Number of previous exchanges: {debate_count}
-            - Is this evidence submission? {is_evidence_submission}
-            - Is this document attachment? {is_document_attachment}
-            - Is document properly introduced? {proper_document_introduction}
-
-            ---
-            ANALYSIS REQUIRED:
-            1. Is this the beginning of a new case/debate? (If yes, provide opening remarks)
-            2. Is the judge being directly addressed or greeted? (If yes, acknowledge appropriately)
-            3. Is this a procedural request that requires immediate judicial response?
-            4. Are there any legal errors or procedural issues that require intervention?
-            5. Does either party need clarification on legal principles?
-            6. Is a ruling or decision being requested?
-            7. Does the debate need judicial direction to proceed properly?
-            8. Is evidence being submitted? If yes:
-               - Is it properly introduced with purpose? (If yes, acknowledge and ask for opposition)
-               - Is it improperly introduced? (If yes, guide on proper procedure)
-               - Does it need admissibility ruling?
-
-            SPECIAL INSTRUCTIONS:
-            - If the judge is directly addressed ("Your Honor", "Judge", etc.), ALWAYS respond appropriately
-            - If someone says "hello judge" or similar, acknowledge the greeting
-            - If this is a procedural request (objection, motion, etc.), respond immediately
-            - If evidence is submitted without proper introduction, guide the lawyer on proper procedure
-            - If evidence is properly introduced, acknowledge receipt and ask for opposition objections
-            - Always maintain judicial authority and impartiality
-            - For document attachments without explanation, provide guidance on proper evidence introduction
-
-            EVIDENCE SUBMISSION EXAMPLES:
-            - **Proper**: "Your Honor, I submit this CCTV footage as Exhibit A, supporting our claim of assault at 10:15 PM"
-            - **Improper**: "Attached: 1.pdf" (no explanation of purpose or relevance)
-            - **Response to Proper**: "Exhibit A received. Opposition counsel, any objections to the admission of this evidence?"
-            - **Response to Improper**: "Counsel, please properly introduce this document with its purpose and relevance to the case."
-
-            Based on your analysis, decide whether to intervene or remain silent.
-            If intervening, provide a clear, authoritative judicial statement that addresses the specific situation.
-            If not intervening, respond with exactly: "NO_JUDGE_INTERVENTION" (this will be filtered out)
-            """
-        )
-
-        debate_history_str = "\n".join([f"{entry['role'].capitalize()}: {entry['content']}" for entry in input.debate_history])
+        # Add missing variables for judge prompt
+        is_case_presentation = intent.requires_opposition_response
+        is_direct_to_judge = intent.is_addressing_judge
         
-        judge_prompt_str = judge_prompt_template.format(
-            human_input=input.human_input,
-            ai_lawyer_response=ai_lawyer_response,
-            case_context=case_context_for_judge,
-            debate_history_str=debate_history_str,
+        debate_status = dict(
             is_greeting=is_greeting,
             is_case_start=is_case_start,
             is_case_presentation=is_case_presentation,
@@ -801,16 +402,133 @@ async def conduct_debate_turn(input: DebateInput) -> DebateTurnResponse:
             is_document_attachment=is_document_attachment,
             proper_document_introduction=proper_document_introduction
         )
+        # Estimated prompt size per caller (summed over its calls), reported with the response
+        prompt_tokens: Dict[str, int] = {}
+
+        async def emit_lawyer_token(text: str):
+            await emit("lawyer_token", {"text": text})
+
+        async def emit_judge_token(text: str):
+            await emit("judge_token", {"text": text})
+
+        # Generate AI Lawyer response (only called if the lawyer should respond)
+        async def generate_ai_lawyer_response() -> str:
+            lawyer_prompt = build_lawyer_prompt(input, qna_retrieval_result.get('sources', []), is_greeting)
+            ai_lawyer_prompt_str = lawyer_prompt.text
+            prompt_tokens["ai_lawyer"] = lawyer_prompt.tokens
+
+            try:
+                ai_lawyer_response = (await _generate_text(
+                    gemini_model,
+                    ai_lawyer_prompt_str,
+                    genai.types.GenerationConfig(
+                        temperature=0.7,
+                        max_output_tokens=1024,
+                        top_p=0.8,
+                    ),
+                    caller="ai_lawyer",
+                    on_token=emit_lawyer_token if emit is not None else None
+                )).strip()
+                print(f"=== AI LAWYER DEBUG ===")
+                print(f"Prompt: {ai_lawyer_prompt_str[:200]}...")
+                print(f"Response: {ai_lawyer_response}")
+                print(f"Response length: {len(ai_lawyer_response)}")
+                print(f"=======================")
+            except Exception as e:
+                print(f"Error getting AI lawyer response: {e}")
+                ai_lawyer_response = "NO_LAWYER_RESPONSE"
+            if emit is not None and ai_lawyer_response != "NO_LAWYER_RESPONSE":
+                await emit("lawyer_done", {"text": ai_lawyer_response})
+            return ai_lawyer_response
 
-        judge_intervention_obj = await gemini_model.generate_content_async(
-            judge_prompt_str,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.3,
-                max_output_tokens=512,
-                top_p=0.7
+        # --- 3. AI Judge's Evaluation & Intervention Decision ---
+        async def generate_judge_intervention(ai_lawyer_response: str, speculative: bool = False, stream: bool = False) -> str:
+            judge_prompt = build_judge_prompt(
+                input,
+                case_retrieval_result.get('sources', []),
+                SPECULATIVE_LAWYER_REPLY if speculative else ai_lawyer_response,
+                debate_status
             )
-        )
-        judge_intervention = judge_intervention_obj.text.strip()
+            judge_prompt_str = judge_prompt.text
+            # Summed, since the speculative judge may be re-run with the lawyer's reply
+            prompt_tokens["judge"] = prompt_tokens.get("judge", 0) + judge_prompt.tokens
+            if speculative:
+                judge_prompt_str += SPECULATIVE_JUDGE_INSTRUCTION
+
+            token_filter = None
+            if stream and emit is not None:
+                token_filter = _ControlResponseFilter(emit_judge_token, ["NO_JUDGE_INTERVENTION", NEEDS_LAWYER_REPLY])
+
+            judge_intervention = await _generate_text(
+                gemini_model,
+                judge_prompt_str,
+                genai.types.GenerationConfig(
+                    temperature=0.3,
+                    max_output_tokens=512,
+                    top_p=0.7
+                ),
+                caller="judge",
+                on_token=token_filter
+            )
+            if token_filter is not None:
+                await token_filter.flush()
+            return judge_intervention.strip()
+
+        async def judge_should_intervene() -> bool:
+            """Quick intervene/silent triage of the human's statement (two-phase mode)"""
+            try:
+                triage_prompt = build_judge_triage_prompt(input, debate_status)
+                prompt_tokens["judge_triage"] = triage_prompt.tokens
+                triage_obj = await llm_gateway.generate(
+                    gemini_model,
+                    triage_prompt.text,
+                    caller="judge_triage",
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=0.0,
+                        max_output_tokens=5
+                    )
+                )
+                return "SILENT" not in triage_obj.text.strip().upper()
+            except Exception as e:
+                # When in doubt, let the full judge evaluation decide
+                print(f"Judge triage failed, falling back to full evaluation: {e}")
+                return True
+
+        # --- 4. Run the AI Lawyer and AI Judge ---
+        # When streaming, judge tokens are only forwarded for calls made after the
+        # lawyer has finished, so the client always sees the lawyer first.
+        streaming = emit is not None
+        judge_mode = settings.JUDGE_EVALUATION_MODE
+        ai_lawyer_response = ""
+        if not ai_lawyer_should_respond:
+            # Only the judge speaks; there is no reply for it to wait on
+            judge_intervention = await generate_judge_intervention(ai_lawyer_response, stream=streaming)
+        elif judge_mode == "speculative":
+            # Judge evaluates the human's statement while the lawyer replies; it is
+            # re-run with the reply only when its decision depends on it
+            ai_lawyer_response, judge_intervention = await asyncio.gather(
+                generate_ai_lawyer_response(),
+                generate_judge_intervention(ai_lawyer_response, speculative=True)
+            )
+            if NEEDS_LAWYER_REPLY in judge_intervention:
+                judge_intervention = await generate_judge_intervention(ai_lawyer_response, stream=streaming)
+            elif streaming and judge_intervention != "NO_JUDGE_INTERVENTION":
+                await emit_judge_token(judge_intervention)
+        elif judge_mode == "two_phase":
+            ai_lawyer_response, should_intervene = await asyncio.gather(
+                generate_ai_lawyer_response(),
+                judge_should_intervene()
+            )
+            if should_intervene:
+                judge_intervention = await generate_judge_intervention(ai_lawyer_response, stream=streaming)
+            else:
+                judge_intervention = "NO_JUDGE_INTERVENTION"
+        else:
+            ai_lawyer_response = await generate_ai_lawyer_response()
+            judge_intervention = await generate_judge_intervention(ai_lawyer_response, stream=streaming)
+
+        if streaming and judge_intervention and judge_intervention != "NO_JUDGE_INTERVENTION":
+            await emit("judge_done", {"text": judge_intervention})
         
         # Debug logging
         print(f"=== JUDGE DEBUG INFO ===")
@@ -823,19 +541,12 @@ async def conduct_debate_turn(input: DebateInput) -> DebateTurnResponse:
         print(f"Is procedural request: {is_procedural_request}")
         print(f"Is direct to judge: {is_direct_to_judge}")
         print(f"AI lawyer should respond: {ai_lawyer_should_respond}")
+        print(f"Judge evaluation mode: {judge_mode}")
         print(f"AI lawyer response: {ai_lawyer_response}")
         print(f"Judge intervention: {judge_intervention}")
+        print(f"Prompt tokens (estimated): {prompt_tokens}")
         print(f"========================")
 
-        # --- Extract and compile metadata for response ---
-        extracted_metadata = {
-            "qna_principles": list(set([p for doc in qna_retrieval_result.get('sources', []) for p in doc.get('metadata', {}).get('legal_principles', [])])),
-            "qna_citations": list(set([c for doc in qna_retrieval_result.get('sources', []) for c in doc.get('metadata', {}).get('citations', [])])),
-            "case_principles": list(set([p for doc in case_retrieval_result.get('sources', []) for p in doc.get('metadata', {}).get('legal_principles', [])])),
-            "case_citations": list(set([c for doc in case_retrieval_result.get('sources', []) for c in doc.get('metadata', {}).get('citations', [])])),
-            "case_tags": list(set([tag for doc in case_retrieval_result.get('sources', []) for tag in doc.get('metadata', {}).get('tags', []) if isinstance(doc.get('metadata', {}).get('tags'), list)]))
-        }
-
         # Filter out the "NO_JUDGE_INTERVENTION" response - don't show it to users
         if judge_intervention == "NO_JUDGE_INTERVENTION":
             judge_intervention = None
@@ -847,7 +558,8 @@ async def conduct_debate_turn(input: DebateInput) -> DebateTurnResponse:
                 "qna_sources": qna_retrieval_result.get('sources', []),
                 "case_sources": case_retrieval_result.get('sources', [])
             },
-            metadata=extracted_metadata
+            metadata=extracted_metadata,
+            prompt_tokens=prompt_tokens
         )
     except Exception as e:
         print(f"Error in debate_turn orchestrator: {e}")
@@ -1,12 +1,16 @@
 import os
+import asyncio
 from datetime import datetime
 from typing import Dict, Any, List
 from dotenv import load_dotenv
 
 from fastapi import UploadFile, HTTPException
 from llama_index.core import SimpleDirectoryReader
+from llama_index.core.schema import MetadataMode
 from backend.ai_court.core.config import settings
-from backend.ai_court.core.llama_index_setup import node_parser, case_law_vector_store
+from backend.ai_court.core.embedding import aget_embedding_model
+from backend.ai_court.core.llama_index_setup import node_parser, aget_vector_indexes
+from backend.ai_court.core.retrieval_cache import retrieval_cache
 from backend.ai_court.services.metadata_extractor import extract_metadata_from_text_llm
 
 # Load environment variables at the very beginning
@@ -37,7 +41,7 @@ async def ingest_document(file: UploadFile) -> Dict[str, Any]:
 
         # Extract comprehensive metadata for the entire document using LLM
         full_document_text = documents[0].text # Take first doc's text as representative
-        document_metadata = extract_metadata_from_text_llm(full_document_text)
+        document_metadata = await extract_metadata_from_text_llm(full_document_text)
         # Add basic info if LLM didn't get it or if it's the source file name
         document_metadata['source_file'] = file.filename
         document_metadata['upload_date'] = datetime.now().isoformat()
@@ -57,9 +61,22 @@ async def ingest_document(file: UploadFile) -> Dict[str, Any]:
                 "original_text_length": len(node.text)
             }
         
-        # Add nodes directly to the Qdrant vector store (async)
+        # Add nodes directly to the configured vector store (async)
         try:
-            await case_law_vector_store.aadd(nodes)
+            embedding_model = await aget_embedding_model()
+            vector_indexes = await aget_vector_indexes()
+
+            # Vector stores expect embedded nodes; compute them off the event loop
+            embeddings = await asyncio.to_thread(
+                embedding_model.get_text_embedding_batch,
+                [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+            )
+            for node, embedding in zip(nodes, embeddings):
+                node.embedding = embedding
+
+            await vector_indexes.case_law_vector_store.async_add(nodes)
+            # New nodes can change results for any cached query on this collection
+            retrieval_cache.invalidate_collection(settings.QDRANT_CASE_COLLECTION)
         except Exception as e:
             print(f"Warning: Could not add nodes to vector store: {e}")
             # Continue without vector storage for now
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import google.generativeai as genai
+from llama_index.core.prompts import PromptTemplate
+
+from backend.ai_court.core.config import settings
+from backend.ai_court.core.llm import get_gemini_model
+from backend.ai_court.core.state_manager import state_manager
+from backend.ai_court.services.case_manager import case_manager
+from backend.llm_gateway import llm_gateway
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SUMMARY_PROMPT = PromptTemplate(
+    """
+    You are the court clerk keeping a running record of a practice courtroom debate.
+    Update the record with the new exchanges below. Keep every fact, allegation, argument,
+    exhibit, objection and ruling that later arguments may rely on, and who made it.
+    Drop greetings and repetition. Write concise third-person notes, under {max_words} words.
+
+    RECORD SO FAR:
+    {summary}
+
+    NEW EXCHANGES:
+    {turns}
+
+    Updated record:
+    """
+)
+
+NO_SUMMARY_YET = "Nothing recorded yet."
+
+def format_turns(turns: List[Dict[str, str]]) -> str:
+    return "\n".join(f"{turn['role'].capitalize()}: {turn['content']}" for turn in turns)
+
+class HistorySummarizer:
+    """
+    Rolling summary of a debate's older turns.
+
+    The newest `verbatim_turns` turns always go to the prompts word for word;
+    once at least `batch_turns` more have fallen out of that window they are
+    folded into the session's summary by a background Gemini call, so prompt
+    size stops growing with the length of the session. At most one update
+    runs per session; turns that arrive meanwhile are picked up next time.
+    """
+    def __init__(self, verbatim_turns: int, batch_turns: int, max_tokens: int):
+        self.verbatim_turns = verbatim_turns
+        self.batch_turns = max(batch_turns, 1)
+        self.max_tokens = max_tokens
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def turns_to_fold(self, history_length: int, summarized_turns: int) -> int:
+        """How many turns after `summarized_turns` should be folded in now (0 = not yet)"""
+        foldable = history_length - self.verbatim_turns - summarized_turns
+        return foldable if foldable >= self.batch_turns else 0
+
+    async def summarize(self, summary: Optional[str], turns: List[Dict[str, str]]) -> str:
+        """Returns the summary updated with the given turns"""
+        prompt = HISTORY_SUMMARY_PROMPT.format(
+            max_words=int(self.max_tokens * 0.75),
+            summary=summary or NO_SUMMARY_YET,
+            turns=format_turns(turns)
+        )
+        response = await llm_gateway.generate(
+            get_gemini_model(),
+            prompt,
+            caller="history_summary",
+            generation_config=genai.types.GenerationConfig(
+                temperature=0.1,
+                max_output_tokens=self.max_tokens
+            )
+        )
+        return response.text.strip()
+
+    def _schedule(self, key: str, job: Callable[[], Awaitable[None]]) -> Optional[asyncio.Task]:
+        running = self._tasks.get(key)
+        if running is not None and not running.done():
+            return None
+        try:
+            task = asyncio.get_running_loop().create_task(job())
+        except RuntimeError:
+            # No event loop (e.g. a synchronous caller); the next turn will catch up
+            return None
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._on_done(key, t))
+        return task
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"History summary update for {key} failed: {task.exception()}")
+
+    async def _update_case_session(self, session_id: str):
+        session = case_manager.get_session(session_id)
+        if not session:
+            return
+        start = session.summarizedTurns
+        count = self.turns_to_fold(len(session.debateHistory), start)
+        if not count:
+            return
+        summary = await self.summarize(session.historySummary, session.debateHistory[start:start + count])
+        case_manager.update_session_summary(session_id, summary, start + count)
+
+    async def _update_debate_state(self, session_id: str):
+        state = state_manager.get_session(session_id)
+        if not state:
+            return
+        start = state.summarized_turns
+        count = self.turns_to_fold(len(state.debate_history), start)
+        if not count:
+            return
+        summary = await self.summarize(state.history_summary, state.debate_history[start:start + count])
+        state_manager.update_session(session_id, {"history_summary": summary, "summarized_turns": start + count})
+
+    def schedule_case_session(self, session_id: str) -> Optional[asyncio.Task]:
+        """Folds old turns of a case session (CaseSession) into its summary in the background"""
+        session = case_manager.get_session(session_id)
+        if not session or not self.turns_to_fold(len(session.debateHistory), session.summarizedTurns):
+            return None
+        return self._schedule(f"case:{session_id}", lambda: self._update_case_session(session_id))
+
+    def schedule_debate_state(self, session_id: str) -> Optional[asyncio.Task]:
+        """Folds old turns of a turn-based debate (DebateState) into its summary in the background"""
+        state = state_manager.get_session(session_id)
+        if not state or not self.turns_to_fold(len(state.debate_history), state.summarized_turns):
+            return None
+        return self._schedule(f"state:{session_id}", lambda: self._update_debate_state(session_id))
+
+    async def wait_idle(self):
+        """Waits for in-flight summary updates (used on shutdown)"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+# Global instance
+history_summarizer = HistorySummarizer(
+    verbatim_turns=settings.HISTORY_VERBATIM_TURNS,
+    batch_turns=settings.HISTORY_SUMMARY_BATCH_TURNS,
+    max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS
+)
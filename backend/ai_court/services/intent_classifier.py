@@ -0,0 +1,180 @@
+import re
+from typing import Dict, FrozenSet, List
+from pydantic import BaseModel
+
+# Indicator phrases per routing flag. Matching is plain substring matching on
+# the lowercased input (so "court" also matches "courtroom"), exactly like the
+# original any(indicator in text) checks in the debate orchestrator.
+INDICATORS: Dict[str, List[str]] = {
+    "is_addressing_judge": [
+        'your honour', 'your honor', 'judge', 'court', 'your lordship',
+        'your worship', 'may it please the court', 'if it please the court'
+    ],
+    "is_addressing_opposition": [
+        'counsel', 'opposition', 'defense', 'defence', 'prosecution',
+        'my learned friend', 'learned counsel', 'opposing counsel'
+    ],
+    "requires_opposition_response": [
+        'case', 'plaintiff', 'defendant', 'prove', 'allegations', 'claims',
+        'matter', 'proceedings', 'will prove', 'allege', 'demonstrate',
+        'discrimination', 'retaliation', 'violation', 'breach', 'damages',
+        'evidence', 'witness', 'testimony', 'argument'
+    ],
+    "is_procedural_request": [
+        'objection', 'sustain', 'overrule', 'strike', 'withdraw', 'rephrase',
+        'clarification', 'recess', 'adjourn', 'continue', 'proceed', 'may i approach',
+        'permission to', 'request for', 'ruling', 'decision', 'order'
+    ],
+    "is_evidence_submission": [
+        'submit', 'introduce', 'exhibit', 'evidence', 'document', 'file', 'attached',
+        'present', 'offer', 'produce', 'tender', 'mark as exhibit', 'admit into evidence'
+    ],
+    "is_document_attachment": [
+        'attached', 'uploaded', 'upload', 'file', 'document', 'pdf', 'doc', 'txt'
+    ],
+    "states_evidence_purpose": [
+        'as evidence', 'supporting', 'showing', 'demonstrating', 'proving',
+        'establishing', 'corroborating', 'confirming', 'verifying'
+    ],
+    "is_case_start": [
+        'represent', 'case', 'plaintiff', 'defendant', 'your honor', 'court',
+        'prove', 'allegations', 'claims', 'matter', 'proceedings'
+    ],
+    "is_judge_addressed": [
+        'your honor', 'judge', 'court', 'your lordship', 'your worship'
+    ],
+    "is_judge_greeting": [
+        'hello judge', 'hi judge', 'good morning judge', 'good afternoon judge'
+    ],
+}
+
+# Exact (whole input) matches rather than substrings
+SIMPLE_GREETINGS = frozenset(['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening'])
+
+class CourtroomIntent(BaseModel):
+    """Routing flags for one human statement in a debate turn"""
+    is_greeting: bool = False
+    is_addressing_judge: bool = False
+    is_addressing_opposition: bool = False
+    requires_opposition_response: bool = False
+    is_procedural_request: bool = False
+    is_evidence_submission: bool = False
+    is_document_attachment: bool = False
+    proper_document_introduction: bool = False
+    is_case_start: bool = False
+    is_judge_addressed: bool = False
+    is_judge_greeting: bool = False
+
+    # Who should answer, following courtroom procedure
+    ai_lawyer_should_respond: bool = True
+    judge_should_respond: bool = False
+
+def _trie_pattern(phrases: List[str]) -> str:
+    """
+    Regex matching any of the phrases, factored into a prefix trie so the
+    engine follows at most one branch per character. Optional groups are
+    greedy, so the longest phrase at a position wins.
+    """
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A phrase ends here; longer phrases are optional continuations
+            return "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+class IntentClassifier:
+    """
+    Classifies a statement against every indicator set in a single scan.
+
+    All phrases are compiled into one regex, (?=(trie)), that finds the
+    longest phrase starting at each position. Any other phrase starting at
+    the same position is a prefix of that one, so each phrase carries the
+    flags of all its indicator prefixes and the result is identical to
+    checking every list separately.
+    """
+    def __init__(self, indicators: Dict[str, List[str]]):
+        self.flags = list(indicators)
+        bits = {flag: 1 << i for i, flag in enumerate(self.flags)}
+
+        phrase_bits: Dict[str, int] = {}
+        for flag, phrases in indicators.items():
+            for phrase in phrases:
+                phrase_bits[phrase] = phrase_bits.get(phrase, 0) | bits[flag]
+
+        # Flags of a phrase plus those of every indicator that is a prefix of it
+        self.phrase_bits: Dict[str, int] = {}
+        for phrase in phrase_bits:
+            mask = 0
+            for other, other_mask in phrase_bits.items():
+                if phrase.startswith(other):
+                    mask |= other_mask
+            self.phrase_bits[phrase] = mask
+
+        self.pattern = re.compile("(?=(" + _trie_pattern(list(self.phrase_bits)) + "))")
+        self.all_bits = (1 << len(self.flags)) - 1
+
+    def matched_flags(self, text: str) -> FrozenSet[str]:
+        """Every indicator flag present in the (already lowercased) text"""
+        mask = 0
+        for match in self.pattern.finditer(text):
+            mask |= self.phrase_bits[match.group(1)]
+            if mask == self.all_bits:
+                break
+        return frozenset(flag for i, flag in enumerate(self.flags) if mask >> i & 1)
+
+    def classify(self, human_input: str) -> CourtroomIntent:
+        text = human_input.lower()
+        flags = self.matched_flags(text)
+
+        intent = CourtroomIntent(
+            is_greeting=text.strip() in SIMPLE_GREETINGS,
+            is_addressing_judge="is_addressing_judge" in flags,
+            is_addressing_opposition="is_addressing_opposition" in flags,
+            requires_opposition_response="requires_opposition_response" in flags,
+            is_procedural_request="is_procedural_request" in flags,
+            is_evidence_submission="is_evidence_submission" in flags,
+            is_document_attachment="is_document_attachment" in flags,
+            proper_document_introduction=(
+                "is_evidence_submission" in flags and "states_evidence_purpose" in flags
+            ),
+            is_case_start="is_case_start" in flags,
+            is_judge_addressed="is_judge_addressed" in flags,
+            is_judge_greeting="is_judge_greeting" in flags,
+        )
+
+        # Determine who should respond based on courtroom procedure
+        if intent.is_addressing_judge or intent.is_procedural_request:
+            # Judge should respond, AI Lawyer should NOT respond
+            judge_responds = True
+        elif intent.is_evidence_submission or (intent.is_document_attachment and not intent.proper_document_introduction):
+            # Evidence submission requires judge oversight first
+            judge_responds = True
+        else:
+            # AI Lawyer responds to the opposition and to general statements
+            judge_responds = False
+
+        # A simple greeting goes to whoever is being addressed
+        if intent.is_greeting:
+            judge_responds = intent.is_addressing_judge
+
+        intent.judge_should_respond = judge_responds
+        intent.ai_lawyer_should_respond = not judge_responds
+        return intent
+
+intent_classifier = IntentClassifier(INDICATORS)
+
+def classify_intent(human_input: str) -> CourtroomIntent:
+    """Classifies a human lawyer's statement for debate turn routing"""
+    return intent_classifier.classify(human_input)
@@ -2,20 +2,23 @@ import re
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 # If you decide to use LLMs for extraction
-from backend.ai_court.core.llm import gemini_model
+from backend.ai_court.core.llm import get_gemini_model
+from backend.llm_gateway import llm_gateway
 from google.generativeai.types import GenerationConfig
 import json # For JSON mode output
 
 # Load environment variables at the very beginning
 load_dotenv()
 
-def extract_metadata_from_text_llm(text: str) -> Dict[str, Any]:
+async def extract_metadata_from_text_llm(text: str) -> Dict[str, Any]:
     """
     Extracts structured metadata from a legal text using an LLM in JSON mode.
     This is the recommended "expert" way for robustness.
     """
-    if gemini_model is None:
-        print("Warning: Gemini model not initialized for metadata extraction. Falling back to simple default.")
+    try:
+        gemini_model = get_gemini_model()
+    except Exception as e:
+        print(f"Warning: Gemini model not initialized for metadata extraction ({e}). Falling back to simple default.")
         return {}
 
     prompt = f"""
@@ -52,8 +55,10 @@ def extract_metadata_from_text_llm(text: str) -> Dict[str, Any]:
     
     try:
         # Use generate_content with a specific format instruction for JSON
-        response = gemini_model.generate_content(
+        response = await llm_gateway.generate(
+            gemini_model,
             prompt,
+            caller="metadata_extraction",
             generation_config=GenerationConfig(
                 response_mime_type="application/json", # Use JSON mode if available and stable
                 temperature=0.1, # Keep low for factual extraction
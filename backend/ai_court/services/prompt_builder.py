@@ -0,0 +1,520 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from llama_index.core.prompts import PromptTemplate
+
+from backend.ai_court.core.config import settings
+from backend.ai_court.models.api_models import DebateInput
+
+# --- Prompt templates (built once at import) ---
+
+AI_LAWYER_PROMPT = PromptTemplate(
+    """
+            You are an experienced Defense Attorney with 15+ years of criminal defense practice. You are representing a client in a {case_type} case. Your responses must be:
+            - Concise and to the point (max 3-4 sentences)
+            - Legally precise and technically accurate
+            - Focused on the specific allegations
+            - Based only on known facts and evidence
+
+            CASE CONTEXT:
+            - Case Type: {case_type}
+            - Specific Charge: {specific_issue}
+            - Known Facts: {case_summary}
+            - Your Role: Defense Counsel
+            - Prosecution's Role: {user_role}
+
+            RESPONSE RULES:
+            1. NEVER invent or assume facts not in evidence
+            2. ALWAYS maintain presumption of innocence
+            3. Focus on specific weaknesses in prosecution's case
+            4. Cite specific legal principles when relevant
+            5. Keep responses brief and impactful
+
+            OPPOSITION STRATEGY:
+            - Experience Level: {opponent_experience}
+            - Argument Style: {opponent_style}
+            - Case Difficulty: {difficulty_level}
+            
+            CURRENT DEBATE CONTEXT:
+            {debate_history}
+
+            📚 RELEVANT LEGAL CONTEXT (from case law and precedents):
+            {qna_context}
+
+            RESPONSE GUIDELINES:
+            1. **Legal Accuracy**: Use precise legal terminology and correct burden of proof standards
+            2. **Evidence Analysis**: When challenging evidence, explain specific grounds (timing, consistency, corroboration)
+            3. **Section 498A Specific**: For 498A cases, acknowledge the burden lies on prosecution but note contextual factors
+            4. **Professional Tone**: Maintain respectful but firm opposition
+            5. **Strategic Focus**: Target weaknesses in opponent's arguments and evidence
+            6. **RAG Integration**: Reference relevant legal principles, precedents, and case law from the provided context when applicable
+
+            LEGAL STANDARDS BY CASE TYPE:
+            - **Criminal Cases (498A)**: "The burden lies on the prosecution to demonstrate that the alleged acts amount to cruelty as defined under Section 498A IPC. Courts consider context, continuity, and credibility of allegations."
+            - **Civil Cases**: "The plaintiff must establish their case on a preponderance of evidence, demonstrating clear and convincing proof."
+            - **Employment Cases**: "The burden shifts based on the nature of the claim - discrimination cases require prima facie evidence before burden shifts to employer."
+
+            EVIDENCE CHALLENGE TEMPLATES:
+            - Medical Reports: "The medical reports lack contemporaneous complaints and show inconsistencies in timing. Without corroborative injuries or immediate reporting, their probative value is limited."
+            - Witness Credibility: "The witness testimony shows material contradictions and lacks independent corroboration."
+            - Documentary Evidence: "The documents presented lack proper authentication and chain of custody."
+
+            RESPOND TO: {human_input}
+
+            Your response (be concise, legal, and strategic):
+            """
+)
+
+LAWYER_GREETING_PROMPT = PromptTemplate(
+    """
+                    You are an AI Lawyer acting as opposition counsel. The human lawyer has just greeted you.
+                    
+                    Respond naturally and professionally to their greeting. Be brief and friendly, but maintain your role as opposition counsel.
+                    Don't dive into legal arguments yet - just acknowledge their greeting and perhaps ask what case or matter they'd like to discuss.
+                    
+                    📚 RELEVANT LEGAL CONTEXT (if any):
+                    {qna_context}
+                    
+                    Human Lawyer's greeting: "{human_input}"
+                    
+                    Your response:
+                    """
+)
+
+JUDGE_PROMPT_BASE = """
+            You are a High Court Judge with 20+ years of experience, presiding over this case. You maintain strict courtroom decorum and ensure proper legal procedures are followed.
+            
+            COURTROOM RULES:
+            1. Maintain control of proceedings
+            2. Ensure arguments stay relevant to the charges
+            3. Prevent speculation and unsubstantiated claims
+            4. Uphold rules of evidence
+            5. Keep discussions focused and professional
+            
+            Your primary responsibilities:
+            - Ensure proper legal procedures are followed
+            - Rule on objections and admissibility of evidence
+            - Guide the examination of witnesses
+            - Maintain order and decorum in the courtroom
+            - Ensure both parties get fair opportunity to present their case
+            
+            Current Case: {case_type} - {specific_issue}
+            Your role is to ensure legal accuracy, procedural fairness, and maintain courtroom decorum.
+
+            INTERVENTION GUIDELINES:
+            You should intervene in the following situations:
+            1. **Direct Address**: When either party directly addresses you ("Your Honor", "Judge", "Court")
+            2. **Procedural Requests**: Objections, motions, requests for clarification, recess, etc.
+            3. **Legal Errors**: Significant misstatements of law, incorrect citations, or factual errors
+            4. **Procedural Issues**: Improper courtroom conduct, irrelevant arguments, or procedural violations
+            5. **Clarification Needed**: When a critical legal principle needs clarification for the debate to proceed
+            6. **Ruling Requests**: When either party explicitly requests a ruling or decision
+            7. **Debate Direction**: When the debate needs judicial guidance to stay on track
+            8. **Opening/Closing**: Provide brief opening remarks when the case begins, and closing remarks when appropriate
+            9. **Direct Greetings**: When someone specifically greets you (e.g., "hello judge")
+            10. **Evidence Submission**: When documents or evidence are submitted for admission
+            11. **Case Introduction**: When a new case is being presented, provide a formal court opening
+
+            EVIDENCE SUBMISSION PROCEDURE:
+            When a document or evidence is submitted:
+            1. **Proper Introduction**: If the document is properly introduced with purpose (e.g., "We submit this CCTV footage as evidence supporting our claim"), acknowledge receipt and ask for opposition response
+            2. **Improper Introduction**: If a document is attached without proper introduction, guide the lawyer on proper procedure
+            3. **Admissibility**: Always ask for opposition objections before admitting evidence
+            4. **Documentation**: Maintain proper exhibit numbering and documentation
+
+            INTERVENTION STYLE:
+            - Be authoritative but fair
+            - Use judicial language: "The Court observes...", "Counsel, please...", "It is ordered that..."
+            - Keep interventions concise and focused
+            - Cite relevant legal authority when applicable
+            - Maintain impartiality between both parties
+            - When directly addressed, acknowledge the address appropriately
+            - For case introductions, be formal and set the proper courtroom tone
+            - For evidence submission, ensure proper procedure is followed
+
+            FORMATTING GUIDELINES:
+            - Use **bold text** for judicial orders, rulings, and important legal principles
+            - Use *italic text* for emphasis on key judicial points
+            - Use `monospace` for specific legal citations and case references
+            - Structure your responses with clear judicial authority
+            - Use formal, authoritative language befitting a judge
+
+            IMPORTANT: If you decide NOT to intervene, respond with exactly: "NO_JUDGE_INTERVENTION" (this will be filtered out and not shown to users)
+            
+            If you DO intervene, provide a clear, authoritative judicial statement that addresses the specific situation.
+        """
+
+# Filled from the practice configuration when one is given
+JUDGE_CONFIGURATION_TEMPLATE = PromptTemplate(
+    """
+            
+            JUDGE CONFIGURATION:
+            - Strictness Level: {judge_strictness}
+            - Case Type: {case_type}
+            - Difficulty Level: {difficulty_level}
+            
+            Adjust your intervention frequency based on strictness:
+            - Lenient: Intervene only for major legal errors
+            - Moderate: Intervene for significant errors and missing context
+            - Strict: Intervene for any legal inaccuracies
+            - Very Strict: Intervene frequently to maintain legal precision
+            """
+)
+
+JUDGE_PROMPT = PromptTemplate(
+    JUDGE_PROMPT_BASE + "{judge_context}" + """
+            
+            ---
+            CURRENT DEBATE CONTEXT:
+            🧑 Human Lawyer's Statement: "{human_input}"
+            🤖 AI Lawyer's Reply: "{ai_lawyer_response}"
+
+            📚 Relevant Case Law Context (for judicial reference):
+            {case_context}
+
+            📖 Debate History (for context):
+            {debate_history_str}
+
+            ---
+            DEBATE STATUS:
+            - Is this a greeting? {is_greeting}
+            - Is this the start of a case presentation? {is_case_start}
+            - Is this a case presentation? {is_case_presentation}
+            - Is this the beginning of the debate? {is_debate_beginning}
+            - Should judge provide opening remarks? {should_judge_open}
+            - Is judge being directly addressed? {is_judge_addressed}
+            - Is this a direct greeting to judge? {is_judge_greeting}
+            - Is this a procedural request? {is_procedural_request}
+            - Is this direct to judge? {is_direct_to_judge}
+            - Did AI lawyer respond? {ai_lawyer_responded}
+            - Number of previous exchanges: {debate_count}
+            - Is this evidence submission? {is_evidence_submission}
+            - Is this document attachment? {is_document_attachment}
+            - Is document properly introduced? {proper_document_introduction}
+
+            ---
+            ANALYSIS REQUIRED:
+            1. Is this the beginning of a new case/debate? (If yes, provide opening remarks)
+            2. Is the judge being directly addressed or greeted? (If yes, acknowledge appropriately)
+            3. Is this a procedural request that requires immediate judicial response?
+            4. Are there any legal errors or procedural issues that require intervention?
+            5. Does either party need clarification on legal principles?
+            6. Is a ruling or decision being requested?
+            7. Does the debate need judicial direction to proceed properly?
+            8. Is evidence being submitted? If yes:
+               - Is it properly introduced with purpose? (If yes, acknowledge and ask for opposition)
+               - Is it improperly introduced? (If yes, guide on proper procedure)
+               - Does it need admissibility ruling?
+
+            SPECIAL INSTRUCTIONS:
+            - If the judge is directly addressed ("Your Honor", "Judge", etc.), ALWAYS respond appropriately
+            - If someone says "hello judge" or similar, acknowledge the greeting
+            - If this is a procedural request (objection, motion, etc.), respond immediately
+            - If evidence is submitted without proper introduction, guide the lawyer on proper procedure
+            - If evidence is properly introduced, acknowledge receipt and ask for opposition objections
+            - Always maintain judicial authority and impartiality
+            - For document attachments without explanation, provide guidance on proper evidence introduction
+
+            EVIDENCE SUBMISSION EXAMPLES:
+            - **Proper**: "Your Honor, I submit this CCTV footage as Exhibit A, supporting our claim of assault at 10:15 PM"
+            - **Improper**: "Attached: 1.pdf" (no explanation of purpose or relevance)
+            - **Response to Proper**: "Exhibit A received. Opposition counsel, any objections to the admission of this evidence?"
+            - **Response to Improper**: "Counsel, please properly introduce this document with its purpose and relevance to the case."
+
+            Based on your analysis, decide whether to intervene or remain silent.
+            If intervening, provide a clear, authoritative judicial statement that addresses the specific situation.
+            If not intervening, respond with exactly: "NO_JUDGE_INTERVENTION" (this will be filtered out)
+            """
+)
+
+# Two-phase: a cheap triage call decides whether the full judge call is needed
+JUDGE_TRIAGE_PROMPT = PromptTemplate(
+    """
+    You are a High Court Judge monitoring a courtroom debate. Decide whether the human lawyer's latest
+    statement requires you to intervene: being addressed directly or greeted, a procedural request
+    (objection, motion, ruling, recess), evidence or documents being submitted, opening remarks at the
+    start of a case, or a significant legal or procedural error.
+
+    - Is this the beginning of the debate? {is_debate_beginning}
+    - Is this a procedural request? {is_procedural_request}
+    - Is this evidence submission? {is_evidence_submission}
+
+    Recent debate history:
+    {debate_history_str}
+
+    Human Lawyer's statement: "{human_input}"
+
+    Answer with exactly one word: INTERVENE or SILENT.
+    """
+)
+
+JUDGE_OPENING_PROMPT = PromptTemplate(
+    """
+            You are an AI Judge presiding over a new legal case. You need to provide a formal opening statement for the court.
+            
+            CASE DETAILS:
+            - Case Title: {case_title}
+            - Case Type: {case_type}
+            - Specific Issue: {specific_issue}
+            - Plaintiff: {plaintiff}
+            - Defendant: {defendant}
+            - User Role: {user_role}
+            - Case Summary: {case_summary}
+            - Key Arguments: {key_arguments}
+            
+            PRACTICE CONFIGURATION:
+            - Difficulty Level: {difficulty_level}
+            - Judge Strictness: {judge_strictness}
+            - Opponent Experience: {opponent_experience}
+            - Opponent Style: {opponent_style}
+            
+            Provide a formal court opening that:
+            1. Acknowledges the appearance of both parties
+            2. Summarizes the case briefly and professionally
+            3. Sets the proper courtroom tone and expectations
+            4. Mentions the key legal issues to be addressed
+            5. Provides clear procedural guidance
+            
+        
+        Your task is to provide a concise opening statement that:
+        1. Acknowledges the court is now in session
+        2. States the nature of the case
+        3. Outlines the key legal principles at stake
+        4. Sets expectations for both counsels
+        5. Maintains strict courtroom decorum
+        
+        Keep it under 5 sentences. Be authoritative but not verbose.
+        """
+)
+
+NO_QNA_CONTEXT = "No specific legal precedents or case law found for this query. Rely on general legal principles and your expertise."
+NO_CASE_CONTEXT = "No specific case law or precedents found for judicial reference. Proceed based on general legal principles."
+NO_DEBATE_HISTORY = "No previous exchanges."
+
+# --- Token budgeting ---
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate Gemini token count (about 4 characters per token for English).
+    Good enough for budgeting without a count_tokens round trip per prompt.
+    """
+    return math.ceil(len(text) / 4)
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max(max_chars - 3, 0)].rstrip() + "..."
+
+def truncate_statement(text: str) -> str:
+    """
+    Cuts a statement to PROMPT_STATEMENT_MAX_TOKENS, keeping its start and its
+    end (where a request to the court or the closing point usually is).
+    """
+    max_chars = settings.PROMPT_STATEMENT_MAX_TOKENS * 4
+    if len(text) <= max_chars:
+        return text
+    marker = " [...] "
+    keep = max(max_chars - len(marker), 0)
+    head = keep * 2 // 3
+    return text[:head].rstrip() + marker + text[len(text) - (keep - head):].lstrip()
+
+class BuiltPrompt(BaseModel):
+    """A formatted prompt and its estimated size"""
+    text: str
+    tokens: int
+    context_documents: int = 0
+    history_turns: int = 0
+
+def format_context(sources: List[Dict[str, Any]], max_tokens: int, include_sources_detail: bool = False) -> Tuple[str, int]:
+    """
+    Formats retrieved documents for a prompt, highest score first, until the
+    token budget is spent. The last document that fits partially is cut.
+
+    Returns:
+        Tuple of (formatted context, number of documents included)
+    """
+    ranked = sorted(sources, key=lambda doc: doc.get('score') or 0.0, reverse=True)
+    formatted_texts = []
+    remaining = max_tokens
+    for i, doc in enumerate(ranked):
+        text = doc['text']
+        metadata = doc['metadata']
+        source_info_parts = []
+        if include_sources_detail:
+            if metadata.get('case_name'): source_info_parts.append(f"Case: {metadata['case_name']}")
+            if metadata.get('court'): source_info_parts.append(f"Court: {metadata['court']}")
+            if metadata.get('judgement_date'): source_info_parts.append(f"Date: {metadata['judgement_date']}")
+            if metadata.get('legal_principles'): source_info_parts.append(f"Principles: {'; '.join(metadata['legal_principles'])}")
+            if metadata.get('citations'): source_info_parts.append(f"Citations: {'; '.join(metadata['citations'])}")
+            if metadata.get('tags') and isinstance(metadata['tags'], list):
+                source_info_parts.append(f"Tags: {'; '.join(metadata['tags'])}")
+            if metadata.get('source_file'): source_info_parts.append(f"File: {metadata['source_file']}")
+            if metadata.get('page_label'): source_info_parts.append(f"Page: {metadata['page_label']}")
+
+        header = f"--- Document {i+1} (Score: {doc['score']:.2f}) ---\nContent: "
+        footer = f"\n[Source Details: {'; '.join(source_info_parts) or 'No specific metadata'}]" if include_sources_detail else ""
+        overhead = estimate_tokens(header + footer) + 1
+        if remaining - overhead < 50:
+            break
+        content = _truncate_to_tokens(text, remaining - overhead)
+        entry = header + content + footer
+        formatted_texts.append(entry)
+        remaining -= estimate_tokens(entry) + 1
+        if len(content) < len(text):
+            # Budget exhausted part-way through this document
+            break
+    return "\n\n".join(formatted_texts), len(formatted_texts)
+
+def format_history(debate_history: List[Dict[str, str]], max_tokens: int, summary: Optional[str] = None,
+                   summarized_turns: int = 0) -> Tuple[str, int]:
+    """
+    Formats the debate history newest-first within the token budget, keeping
+    whole turns. When a rolling summary covers the first `summarized_turns`
+    turns it replaces them (using at most half the budget); any other older
+    turns that do not fit are replaced by a marker.
+
+    Returns:
+        Tuple of (formatted history, number of verbatim turns included)
+    """
+    summary_line = None
+    remaining = max_tokens
+    if summary and summarized_turns:
+        summary_line = f"[Summary of the first {summarized_turns} exchange(s)]: " + _truncate_to_tokens(summary, max_tokens // 2)
+        remaining -= estimate_tokens(summary_line) + 1
+
+    recent = debate_history[summarized_turns:] if summary_line else debate_history
+    lines = []
+    for entry in reversed(recent):
+        line = f"{entry['role'].capitalize()}: {entry['content']}"
+        cost = estimate_tokens(line) + 1
+        if cost > remaining:
+            break
+        lines.append(line)
+        remaining -= cost
+    lines.reverse()
+    turns = len(lines)
+
+    omitted = len(recent) - turns
+    if omitted:
+        lines.insert(0, f"[{omitted} earlier exchange(s) omitted]")
+    if summary_line:
+        lines.insert(0, summary_line)
+    return "\n".join(lines), turns
+
+def _split_budget(budget: int, fixed_tokens: int, context_cap: int) -> Tuple[int, int]:
+    """Splits what is left of a role's budget between retrieved context and history."""
+    available = max(budget - fixed_tokens, 0)
+    context_budget = min(int(available * settings.PROMPT_CONTEXT_SHARE), context_cap)
+    return context_budget, available - context_budget
+
+def _practice_config_dict(input: DebateInput) -> Dict[str, Any]:
+    # Handle practice_config whether it's a dict or Pydantic model
+    if hasattr(input, 'practice_config') and input.practice_config:
+        if hasattr(input.practice_config, 'dict'):
+            return input.practice_config.dict()
+        if isinstance(input.practice_config, dict):
+            return input.practice_config
+    return {}
+
+def build_lawyer_prompt(input: DebateInput, qna_sources: List[Dict[str, Any]], is_greeting: bool) -> BuiltPrompt:
+    """Builds the AI lawyer prompt within LAWYER_PROMPT_TOKEN_BUDGET."""
+    budget = settings.LAWYER_PROMPT_TOKEN_BUDGET
+
+    if is_greeting:
+        human_input = truncate_statement(input.human_input)
+        fixed = LAWYER_GREETING_PROMPT.format(qna_context="", human_input=human_input)
+        context_budget, _ = _split_budget(budget, estimate_tokens(fixed), settings.PROMPT_CONTEXT_MAX_TOKENS)
+        qna_context, documents = format_context(qna_sources, context_budget)
+        text = LAWYER_GREETING_PROMPT.format(
+            qna_context=qna_context or NO_QNA_CONTEXT,
+            human_input=human_input
+        )
+        return BuiltPrompt(text=text, tokens=estimate_tokens(text), context_documents=documents)
+
+    practice_config_dict = _practice_config_dict(input)
+    # Get case details from input if available
+    case_details = input.case_details if getattr(input, 'case_details', None) else None
+    values = dict(
+        case_type=case_details.caseType.value if case_details else 'General',
+        specific_issue=case_details.specificIssue if case_details else 'Not specified',
+        case_summary=case_details.caseSummary if case_details else 'Not specified',
+        user_role=case_details.userRole if case_details else 'Not specified',
+        opponent_experience=practice_config_dict.get('opponentExperience', 'Standard'),
+        opponent_style=practice_config_dict.get('opponentStyle', 'Professional'),
+        opponent_strengths=practice_config_dict.get('opponentStrengths', 'General legal knowledge'),
+        difficulty_level=practice_config_dict.get('difficultyLevel', 'Standard'),
+        human_input=truncate_statement(input.human_input)
+    )
+
+    fixed = AI_LAWYER_PROMPT.format(qna_context="", debate_history="", **values)
+    context_budget, _ = _split_budget(budget, estimate_tokens(fixed), settings.PROMPT_CONTEXT_MAX_TOKENS)
+    qna_context, documents = format_context(qna_sources, context_budget)
+    qna_context = qna_context or NO_QNA_CONTEXT
+    # History gets everything the context did not use
+    history_budget = max(budget - estimate_tokens(fixed) - estimate_tokens(qna_context), 0)
+    debate_history, turns = format_history(input.debate_history, history_budget, input.history_summary, input.summarized_turns)
+
+    text = AI_LAWYER_PROMPT.format(
+        qna_context=qna_context,
+        debate_history=debate_history or NO_DEBATE_HISTORY,
+        **values
+    )
+    return BuiltPrompt(text=text, tokens=estimate_tokens(text), context_documents=documents, history_turns=turns)
+
+def build_judge_context(input: DebateInput) -> str:
+    """Judge strictness section from the practice configuration (empty without one)"""
+    if not (hasattr(input, 'practice_config') and input.practice_config):
+        return ""
+    config = input.practice_config
+    return JUDGE_CONFIGURATION_TEMPLATE.format(
+        judge_strictness=config.judgeStrictness or 'Moderate',
+        case_type=config.caseType or 'General',
+        difficulty_level=config.difficultyLevel or 'Standard'
+    )
+
+def build_judge_prompt(input: DebateInput, case_sources: List[Dict[str, Any]], ai_lawyer_response: str,
+                       debate_status: Dict[str, Any]) -> BuiltPrompt:
+    """
+    Builds the AI judge prompt within JUDGE_PROMPT_TOKEN_BUDGET.
+
+    Args:
+        debate_status: Values for the DEBATE STATUS section (is_greeting, is_case_start, ...)
+    """
+    budget = settings.JUDGE_PROMPT_TOKEN_BUDGET
+    practice_config_dict = _practice_config_dict(input)
+    case_details = input.case_details if getattr(input, 'case_details', None) else None
+    values = dict(
+        case_type=case_details.caseType.value if case_details else (practice_config_dict.get('caseType') or 'General'),
+        specific_issue=case_details.specificIssue if case_details else (practice_config_dict.get('specificIssue') or 'Not specified'),
+        human_input=truncate_statement(input.human_input),
+        ai_lawyer_response=truncate_statement(ai_lawyer_response),
+        judge_context=build_judge_context(input),
+        **debate_status
+    )
+
+    fixed = JUDGE_PROMPT.format(case_context="", debate_history_str="", **values)
+    context_budget, _ = _split_budget(budget, estimate_tokens(fixed), settings.PROMPT_CONTEXT_MAX_TOKENS)
+    case_context, documents = format_context(case_sources, context_budget, include_sources_detail=True)
+    case_context = case_context or NO_CASE_CONTEXT
+    history_budget = max(budget - estimate_tokens(fixed) - estimate_tokens(case_context), 0)
+    debate_history_str, turns = format_history(input.debate_history, history_budget, input.history_summary, input.summarized_turns)
+
+    text = JUDGE_PROMPT.format(
+        case_context=case_context,
+        debate_history_str=debate_history_str,
+        **values
+    )
+    return BuiltPrompt(text=text, tokens=estimate_tokens(text), context_documents=documents, history_turns=turns)
+
+def build_judge_triage_prompt(input: DebateInput, debate_status: Dict[str, Any]) -> BuiltPrompt:
+    """Short intervene/silent triage prompt; only the most recent history is included."""
+    debate_history_str, turns = format_history(input.debate_history, settings.JUDGE_TRIAGE_HISTORY_TOKENS, input.history_summary, input.summarized_turns)
+    text = JUDGE_TRIAGE_PROMPT.format(
+        human_input=truncate_statement(input.human_input),
+        debate_history_str=debate_history_str,
+        is_debate_beginning=debate_status["is_debate_beginning"],
+        is_procedural_request=debate_status["is_procedural_request"],
+        is_evidence_submission=debate_status["is_evidence_submission"]
+    )
+    return BuiltPrompt(text=text, tokens=estimate_tokens(text), history_turns=turns)
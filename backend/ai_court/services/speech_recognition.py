@@ -4,9 +4,10 @@ import asyncio
 import aiohttp
 from typing import Dict, Any, Tuple, List, Optional
 from fastapi import UploadFile, HTTPException, status
-from faster_whisper import WhisperModel
 from dotenv import load_dotenv
 
+from backend.ai_court.core.startup import startup_registry, STATUS_FAILED
+
 # Load environment variables
 load_dotenv()
 
@@ -16,13 +17,15 @@ DEEPGRAM_API_URL = "https://api.deepgram.com/v1/listen?model=nova-2"  # Using No
 
 class SpeechRecognitionService:
     def __init__(self):
-        # Initialize Whisper as fallback
-        self.whisper_model = None
+        # Whisper is only a fallback, so it is loaded in the background at
+        # startup (or on first use) rather than when this module is imported
         self.whisper_model_name = None
-        self._init_whisper_fallback()
+        startup_registry.register("whisper", self._init_whisper_fallback, critical=False)
 
     def _init_whisper_fallback(self):
         """Initialize Whisper model as fallback"""
+        from faster_whisper import WhisperModel
+
         # Try different model sizes in order of preference
         model_options = [
             ("base", "base"),  # Fastest, smallest
@@ -33,15 +36,25 @@ class SpeechRecognitionService:
         for model_name, model_id in model_options:
             try:
                 print(f"🔄 Attempting to load Whisper fallback model: {model_name}")
-                self.whisper_model = WhisperModel(model_id, device="cpu", compute_type="int8")
+                whisper_model = WhisperModel(model_id, device="cpu", compute_type="int8")
                 self.whisper_model_name = model_name
                 print(f"✅ Whisper {model_name} fallback model loaded successfully")
-                break
+                return whisper_model
             except Exception as e:
                 print(f"❌ Failed to load Whisper {model_name} model: {e}")
 
-        if not self.whisper_model:
-            print("⚠️ Warning: No Whisper model could be loaded. Speech recognition will fail if Deepgram is unavailable.")
+        print("⚠️ Warning: No Whisper model could be loaded. Speech recognition will fail if Deepgram is unavailable.")
+        raise RuntimeError("No Whisper model could be loaded")
+
+    @property
+    def whisper_model(self):
+        """The Whisper model if it has finished loading, otherwise None"""
+        return startup_registry.components["whisper"].value
+
+    @property
+    def whisper_available(self) -> bool:
+        """False only once loading Whisper has been attempted and failed"""
+        return startup_registry.status("whisper") != STATUS_FAILED
 
     async def _transcribe_with_deepgram(self, audio_data: bytes) -> Tuple[bool, str]:
         """Transcribe audio using Deepgram API"""
@@ -75,7 +88,11 @@ class SpeechRecognitionService:
 
     async def _transcribe_with_whisper(self, audio_data: bytes) -> Dict[str, Any]:
         """Transcribe audio using Whisper (fallback)"""
-        if not self.whisper_model:
+        try:
+            whisper_model = await startup_registry.aget("whisper")
+        except RuntimeError:
+            whisper_model = None
+        if not whisper_model:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="No speech recognition service is available"
@@ -95,7 +112,7 @@ class SpeechRecognitionService:
         try:
             # Transcribe the audio file using Whisper
             segments, info = await asyncio.to_thread(
-                self.whisper_model.transcribe,
+                whisper_model.transcribe,
                 temp_audio_path,
                 beam_size=5,
                 language="en"
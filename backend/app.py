@@ -2,16 +2,16 @@ from fastapi import FastAPI, HTTPException, Depends, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from pydantic import BaseModel, validator
 from datetime import datetime, timedelta
 from typing import Optional, List
-from backend.chat import chat_with_law_agent
+from backend.chat import chat_with_law_agent, close_chat_runtime, stream_chat_with_law_agent
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from backend.auth import (
     User, UserCreate, UserResponse, Token,
-    get_db, get_password_hash, verify_password,
+    get_db, password_hasher, token_claims, user_cache,
     create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user
 )
 from backend.routers import documents as documents_router
@@ -21,12 +21,36 @@ from backend.routers import portia_admin_rag as portia_rag_router
 from backend.routers import portia_appointments as portia_appointments_router
 from backend.routers import portia_evidence as portia_evidence_router
 from backend.routers import portia_compliance as portia_compliance_router
+from backend.ai_court.core.startup import startup_registry
+from backend.ai_court.core.state_manager import state_manager
+from backend.ai_court.services.history_summarizer import history_summarizer
+from backend.ai_court.services.case_manager import case_manager
+from backend.loop_monitor import loop_monitor
+from backend.sse import sse_event
+from contextlib import asynccontextmanager
 import logging
 import os
 
 load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy models and clients load in the background so the server accepts
+    # connections immediately; /ai-court/api/ready reports when they are up.
+    startup_registry.start_background_warmup()
+    case_manager.start_write_behind()
+    state_manager.start_session_sweeper()
+    loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+    await startup_registry.shutdown()
+    await close_chat_runtime()
+    # Let in-flight debate summaries reach the session store
+    await history_summarizer.wait_idle()
+    await state_manager.shutdown()
+    await case_manager.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -43,6 +67,7 @@ logger = logging.getLogger(__name__)
 
 class ChatMessage(BaseModel):
     message: str  # Standardized on 'message' field
+    language: Optional[str] = None  # e.g. "en", "hi"; keys the chat answer cache
     
     def get_text(self) -> str:
         """Get the message text."""
@@ -78,7 +103,7 @@ async def signup(user: UserCreate, db: Session = Depends(get_db)):
         db_user = User(
             email=user.email,
             username=user.username,
-            hashed_password=get_password_hash(user.password),
+            hashed_password=await password_hasher.hash(user.password),
             role=user.role,
             specialization=user.specialization if user.role == 'lawyer' else None,
             license_number=user.license_number if user.role == 'lawyer' else None,
@@ -260,23 +285,26 @@ async def signin(
             )
         
         # Verify password
-        if not verify_password(password, user.hashed_password):
+        valid, new_hash = await password_hasher.verify(password, user.hashed_password)
+        if not valid:
             raise HTTPException(
                 status_code=401,
                 detail="Incorrect username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        if new_hash is not None:
+            # Stored with another cost factor: keep the new hash (the login works either way)
+            try:
+                user.hashed_password = new_hash
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Could not store rehashed password for {user.username}: {e}")
         
         # Create access token with role and extra fields
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={
-                "sub": user.username,
-                "role": user.role,
-                "specialization": user.specialization,
-                "license_number": user.license_number,
-                "profile_image": user.profile_image
-            },
+            data=token_claims(user),
             expires_delta=access_token_expires
         )
         return {
@@ -293,10 +321,57 @@ async def signin(
         print(f"Signin error: {e}")  # Print error for debugging
         raise HTTPException(status_code=500, detail=str(e))
 
-async def handle_chat_message(request: Request):
+@app.get("/api/auth/stats")
+async def auth_stats():
+    """Password hashing pool (queue depth, rejections, bcrypt timings) and the token -> user cache"""
+    return {
+        "password_hashing": password_hasher.stats(),
+        "user_cache": user_cache.stats()
+    }
+
+def chat_event_stream(message_text: str, session_id: str, language: Optional[str]) -> StreamingResponse:
+    """
+    The answer as server-sent events: `delta` events with the next piece of
+    the formatted text, `reset` when the pieces so far should be discarded
+    (the model called a tool before answering), and finally `done` with the
+    ChatResponse, whose id and text are the canonical message. Failures are
+    sent as an `error` event.
+    """
+    async def event_stream():
+        try:
+            async for event, text in stream_chat_with_law_agent(message_text, session_id=session_id, language=language):
+                if event == "done":
+                    if not text:
+                        logger.error("Received empty response from stream_chat_with_law_agent")
+                        yield sse_event("error", {"status_code": 500, "detail": "Received empty response from the AI model"})
+                        return
+                    logger.info(f"Streamed response (first 100 chars): {text[:100]}")
+                    response = ChatResponse(
+                        id=str(int(datetime.now().timestamp() * 1000)),
+                        text=text,
+                        isUser=False,
+                        timestamp=datetime.now()
+                    )
+                    yield sse_event("done", response.model_dump())
+                elif event == "delta":
+                    yield sse_event("delta", {"text": text})
+                else:
+                    yield sse_event(event, {})
+        except Exception as e:
+            logger.error(f"Unexpected error in chat stream: {str(e)}", exc_info=True)
+            yield sse_event("error", {"status_code": 500, "detail": "An unexpected error occurred while processing your request"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def handle_chat_message(request: Request, stream: bool = False):
     """
     Handle incoming chat messages from the frontend.
     Expects a JSON body with a 'message' field.
+    With stream=True the answer is sent as server-sent events (chat_event_stream).
     """
     try:
         # Log the raw request data
@@ -333,9 +408,12 @@ async def handle_chat_message(request: Request):
         
         # Get session ID from headers or use a default
         session_id = request.headers.get('X-Session-ID', 'default')
+
+        if stream:
+            return chat_event_stream(message_text, session_id, message.language)
         
         # Get response from the AI model with session ID
-        response_text = await chat_with_law_agent(message_text, session_id=session_id)
+        response_text = await chat_with_law_agent(message_text, session_id=session_id, language=message.language)
         
         if not response_text:
             logger.error("Received empty response from chat_with_law_agent")
@@ -371,14 +449,15 @@ async def handle_chat_message(request: Request):
         )
 
 # Original chat endpoint
+# ?stream=true sends the answer as server-sent events as it is generated
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: Request):
-    return await handle_chat_message(request)
+async def chat(request: Request, stream: bool = False):
+    return await handle_chat_message(request, stream)
 
 # New endpoint to match frontend expectation
 @app.post("/api/chat/message", response_model=ChatResponse)
-async def chat_message(request: Request):
-    return await handle_chat_message(request)
+async def chat_message(request: Request, stream: bool = False):
+    return await handle_chat_message(request, stream)
 
 # --- Include Routers ---
 app.include_router(documents_router.router, prefix="/api")
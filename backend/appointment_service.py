@@ -1,11 +1,16 @@
 import os
+import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Dict, Optional, Tuple
 import google.generativeai as genai
 from pydantic import BaseModel, Field, validator
 from fastapi import HTTPException, status
 
+from backend.llm_gateway import llm_gateway
+from backend.shared_state import ConcurrentUpdateError, SharedMap, shared_state
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -65,12 +70,69 @@ class Appointment(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     timezone: str = "UTC"
 
+class AppointmentDay(BaseModel):
+    """Time ranges booked on one calendar day, by appointment ID"""
+    slots: Dict[str, Tuple[datetime, datetime]] = Field(default_factory=dict)
+
+class UserAppointments(BaseModel):
+    """IDs of one user's appointments, in booking order"""
+    appointment_ids: List[str] = Field(default_factory=list)
+
+class AppointmentBook(BaseModel):
+    """Earlier layout, with every appointment in one document; split up on startup"""
+    appointments: Dict[str, Appointment] = Field(default_factory=dict)
+    next_id: int = 1
+
 class AppointmentManager:
     """Manages appointment scheduling and interactions with Gemini API"""
     
+    # Key of the earlier single appointment book
+    BOOK_KEY = "book"
+    
     def __init__(self):
         self.model = model
-        self.appointments: Dict[str, Appointment] = {}
+        # Shared across workers when SHARED_STATE_URL is set. Each appointment has its own key,
+        # and is indexed by the days it covers and by its user: a booking compare-and-sets only
+        # the days it touches (so two workers cannot book the same slot, while bookings on
+        # other days never contend), and a listing reads only one user's appointments
+        self._appointments = SharedMap(shared_state, "appointment_records", Appointment)
+        self._days = SharedMap(shared_state, "appointment_days", AppointmentDay)
+        self._user_index = SharedMap(shared_state, "user_appointments", UserAppointments)
+        self._migrate_book()
+    
+    @staticmethod
+    def _days_of(start_time: datetime, end_time: datetime) -> List[str]:
+        """Keys of the calendar days an appointment covers (an end at midnight stays on the day before)"""
+        first: date = start_time.date()
+        last: date = max((end_time - timedelta(microseconds=1)).date(), first)
+        return [(first + timedelta(days=offset)).isoformat() for offset in range((last - first).days + 1)]
+    
+    def _index(self, appointment: Appointment):
+        """Add an appointment to its day and user indexes (idempotent)"""
+        def add_slot(day: AppointmentDay):
+            day.slots[appointment.id] = (appointment.start_time, appointment.end_time)
+        def add_id(index: UserAppointments):
+            if appointment.id in index.appointment_ids:
+                return False
+            index.appointment_ids.append(appointment.id)
+        for day in self._days_of(appointment.start_time, appointment.end_time):
+            self._days.update(day, add_slot, default=AppointmentDay)
+        self._user_index.update(appointment.user_id, add_id, default=UserAppointments)
+    
+    def _migrate_book(self):
+        """Split an appointment book written by an earlier version into per-appointment keys"""
+        books = SharedMap(shared_state, "appointments", AppointmentBook)
+        book = books.get(self.BOOK_KEY)
+        if book is None:
+            return
+        for appointment in book.appointments.values():
+            try:
+                self._appointments.put_if_version(appointment.id, appointment, 0)
+            except ConcurrentUpdateError:
+                pass  # Another worker migrated it first
+            self._index(appointment)
+        books.pop(self.BOOK_KEY, None)
+        logger.info(f"Migrated {len(book.appointments)} appointments to per-appointment keys")
     
     async def suggest_available_slots(
         self, 
@@ -88,7 +150,7 @@ class AppointmentManager:
             prompt = self._create_scheduling_prompt(context)
             
             # Get AI response
-            response = self.model.generate_content(prompt)
+            response = await llm_gateway.generate(self.model, prompt, caller="appointments")
             
             # Parse the AI response to get suggested slots
             suggested_slots = self._parse_ai_response(response.text)
@@ -217,30 +279,10 @@ class AppointmentManager:
         Book a new appointment
         """
         try:
-            # Check for conflicts
-            if self._has_scheduling_conflict(start_time, end_time):
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="The selected time slot is no longer available"
-                )
-            
-            # Create new appointment
-            appointment_id = f"apt_{len(self.appointments) + 1}"
-            new_appointment = Appointment(
-                id=appointment_id,
-                user_id=user_id,
-                title=title,
-                description=description,
-                start_time=start_time,
-                end_time=end_time,
-                timezone=timezone
+            return await asyncio.to_thread(
+                self._book, user_id, title, description, start_time, end_time, timezone
             )
             
-            # Store the appointment (in a real app, this would be in a database)
-            self.appointments[appointment_id] = new_appointment
-            
-            return new_appointment
-            
         except Exception as e:
             logger.error(f"Error booking appointment: {str(e)}")
             if isinstance(e, HTTPException):
@@ -250,40 +292,87 @@ class AppointmentManager:
                 detail=f"Error booking appointment: {str(e)}"
             )
     
-    def _has_scheduling_conflict(self, start_time: datetime, end_time: datetime) -> bool:
-        """Check if the requested time slot conflicts with existing appointments"""
-        for appointment in self.appointments.values():
+    def _book(self, user_id: str, title: str, description: str, start_time: datetime,
+              end_time: datetime, timezone: str) -> Appointment:
+        appointment_id = f"apt_{uuid.uuid4().hex[:12]}"
+        
+        def reserve(day: AppointmentDay):
+            # Check for conflicts; re-run on the latest day if another booking lands first
+            if self._has_scheduling_conflict(day.slots.values(), start_time, end_time):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="The selected time slot is no longer available"
+                )
+            day.slots[appointment_id] = (start_time, end_time)
+        
+        def release(day: AppointmentDay):
+            if day.slots.pop(appointment_id, None) is None:
+                return False
+        
+        reserved: List[str] = []
+        try:
+            for day in self._days_of(start_time, end_time):
+                self._days.update(day, reserve, default=AppointmentDay)
+                reserved.append(day)
+        except Exception:
+            # Spans several days and one of them is taken: give back the others
+            for day in reserved:
+                self._days.update(day, release)
+            raise
+        
+        # Create new appointment
+        appointment = Appointment(
+            id=appointment_id,
+            user_id=user_id,
+            title=title,
+            description=description,
+            start_time=start_time,
+            end_time=end_time,
+            timezone=timezone
+        )
+        self._appointments[appointment_id] = appointment
+        self._index(appointment)
+        return appointment
+    
+    @staticmethod
+    def _has_scheduling_conflict(booked: Iterable[Tuple[datetime, datetime]], start_time: datetime, end_time: datetime) -> bool:
+        """Check if the requested time slot conflicts with booked (start, end) ranges"""
+        for booked_start, booked_end in booked:
             if (
-                (start_time < appointment.end_time) and 
-                (end_time > appointment.start_time)
+                (start_time < booked_end) and 
+                (end_time > booked_start)
             ):
                 return True
         return False
     
     async def get_user_appointments(self, user_id: str) -> List[Appointment]:
         """Get all appointments for a specific user"""
-        return [
-            appt for appt in self.appointments.values() 
-            if appt.user_id == user_id
-        ]
+        return await asyncio.to_thread(self._user_appointments, user_id)
+    
+    def _user_appointments(self, user_id: str) -> List[Appointment]:
+        index = self._user_index.get(user_id)
+        if index is None:
+            return []
+        appointments = (self._appointments.get(appointment_id) for appointment_id in index.appointment_ids)
+        return [appt for appt in appointments if appt is not None]
     
     async def cancel_appointment(self, appointment_id: str, user_id: str) -> bool:
         """Cancel an existing appointment"""
-        if appointment_id not in self.appointments:
+        def cancel(appointment: Appointment):
+            if appointment.user_id != user_id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Not authorized to cancel this appointment"
+                )
+                
+            appointment.status = "cancelled"
+            appointment.updated_at = datetime.utcnow()
+        
+        if await asyncio.to_thread(self._appointments.update, appointment_id, cancel) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Appointment not found"
             )
-            
-        appointment = self.appointments[appointment_id]
-        if appointment.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to cancel this appointment"
-            )
-            
-        appointment.status = "cancelled"
-        appointment.updated_at = datetime.utcnow()
         return True
 
 # Initialize appointment manager
@@ -1,6 +1,12 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from sqlalchemy import create_engine, Column, Integer, String, DateTime
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from passlib.context import CryptContext
@@ -13,6 +19,11 @@ from fastapi.security import OAuth2PasswordBearer
 SECRET_KEY = "your-secret-key-keep-it-secret"  # In production, use environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# How long a verified token's user is reused before the database is asked again
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "10000"))
+# Let read-only routes take the user from the token's claims without a database lookup
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "true").lower() in {"1", "true", "yes"}
 
 # Database Configuration
 SQLALCHEMY_DATABASE_URL = "sqlite:///./my_agent_data.db"
@@ -21,7 +32,17 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 # Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=12)
+# bcrypt cost factor; each step doubles the CPU time of a login (12 is ~250 ms)
+BCRYPT_ROUNDS = int(os.getenv("AUTH_BCRYPT_ROUNDS", "12"))
+# Rehash a password with BCRYPT_ROUNDS when its user logs in and it was hashed with another cost
+AUTH_REHASH_ON_LOGIN = os.getenv("AUTH_REHASH_ON_LOGIN", "true").lower() in {"1", "true", "yes"}
+# Hashes computed at once; bcrypt releases the GIL, so up to one per core runs in parallel
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+# Hashes waiting for a worker before new logins are turned away with 503
+AUTH_HASH_MAX_QUEUE = int(os.getenv("AUTH_HASH_MAX_QUEUE", "64"))
+
+_rounds_policy = {"bcrypt__min_rounds": BCRYPT_ROUNDS, "bcrypt__max_rounds": BCRYPT_ROUNDS} if AUTH_REHASH_ON_LOGIN else {}
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=BCRYPT_ROUNDS, **_rounds_policy)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 # Models
@@ -79,6 +100,96 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+T = TypeVar("T")
+
+class PasswordHasher:
+    """
+    Runs bcrypt (~250 ms of CPU per hash at cost 12) on a bounded thread
+    pool, so async routes await it instead of blocking the event loop, and a
+    login storm queues behind `max_workers` hashes instead of taking every
+    thread. When more than `max_queue` hashes are waiting, new ones are
+    rejected with 503.
+    """
+    # Timings kept for percentiles
+    WINDOW = 1000
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 64):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="auth-hash")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.counts: Dict[str, int] = {"hash": 0, "verify": 0, "rehashed": 0, "rejected": 0}
+        self.hash_seconds: Deque[float] = deque(maxlen=self.WINDOW)
+        self.wait_seconds: Deque[float] = deque(maxlen=self.WINDOW)
+
+    def _timed(self, fn: Callable[[], T], submitted: float) -> T:
+        started = time.monotonic()
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.wait_seconds.append(started - submitted)
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.hash_seconds.append(time.monotonic() - started)
+
+    async def _run(self, operation: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.counts["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many logins at once, please try again",
+                    headers={"Retry-After": "1"},
+                )
+            self.queued += 1
+            self.counts[operation] += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._timed, fn, time.monotonic())
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", lambda: pwd_context.hash(password))
+
+    async def verify(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Checks a password. Returns (valid, new hash): the new hash is set when
+        the stored one used another cost factor than BCRYPT_ROUNDS and should
+        replace it.
+        """
+        valid, new_hash = await self._run(
+            "verify", lambda: pwd_context.verify_and_update(plain_password, hashed_password)
+        )
+        if new_hash is not None:
+            with self._lock:
+                self.counts["rehashed"] += 1
+        return valid, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            def percentile_ms(samples: Deque[float], p: float) -> Optional[float]:
+                ordered = sorted(samples)
+                return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1) if ordered else None
+
+            return {
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+                "rehash_on_login": AUTH_REHASH_ON_LOGIN,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                **self.counts,
+                "hash_p50_ms": percentile_ms(self.hash_seconds, 0.5),
+                "hash_p95_ms": percentile_ms(self.hash_seconds, 0.95),
+                "queue_wait_p50_ms": percentile_ms(self.wait_seconds, 0.5),
+                "queue_wait_p95_ms": percentile_ms(self.wait_seconds, 0.95),
+            }
+
+password_hasher = PasswordHasher(max_workers=AUTH_HASH_WORKERS, max_queue=AUTH_HASH_MAX_QUEUE)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -89,25 +200,153 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+# Fields of a user that routes see as `current_user`
+PRINCIPAL_FIELDS = ("id", "email", "username", "role", "specialization", "license_number", "profile_image")
+
+def user_principal(user: User) -> Dict[str, Any]:
+    return {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+
+def token_claims(user: User) -> Dict[str, Any]:
+    """Claims of an access token for this user; with them, claim-based routes need no lookup"""
+    claims = {field: getattr(user, field) for field in PRINCIPAL_FIELDS if field != "username"}
+    claims["sub"] = user.username
+    return claims
+
+class UserCache:
+    """
+    Verified access tokens -> the user principal they resolved to, so a
+    repeated request skips both the JWT check and the database lookup.
+    Entries live `ttl_seconds` (never past the token's expiry) and are
+    dropped when the user changes (invalidate_user, called on every ORM
+    update of a User). Per process: another worker may serve its copy for
+    up to `ttl_seconds` after a change.
+    """
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # token -> (principal, expires at), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._tokens_by_user: Dict[Any, set] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _remove(self, token: str):
+        principal, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal["id"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal["id"]]
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return dict(entry[0])
+            if entry is not None:
+                self._remove(token)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, principal: Dict[str, Any], token_expires: Optional[float] = None):
+        """Caches a principal; token_expires is the token's `exp` (Unix time)"""
+        ttl = self.ttl_seconds
+        if token_expires is not None:
+            ttl = min(ttl, token_expires - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (dict(principal), time.monotonic() + ttl)
+            self._tokens_by_user.setdefault(principal["id"], set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: Any):
+        """Forgets every cached token of a user (call when the user changes)"""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "trust_token_claims": AUTH_TRUST_TOKEN_CLAIMS
+            }
+
+user_cache = UserCache(ttl_seconds=AUTH_USER_CACHE_TTL_SECONDS, max_entries=AUTH_USER_CACHE_MAX_ENTRIES)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate_user(target.id)
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """The claims of a valid token; raises 401 otherwise"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_db)) -> Dict[str, Any]:
+    """The user a token belongs to, as a dict of PRINCIPAL_FIELDS"""
+    principal = user_cache.get(token)
+    if principal is not None:
+        return principal
+
+    payload = decode_access_token(token)
+    token_data = TokenData(username=payload["sub"])
     user = db.query(User).filter(User.username == token_data.username).first()
     if user is None:
         raise credentials_exception
-    return user
+    principal = user_principal(user)
+    user_cache.put(token, principal, payload.get("exp"))
+    return principal
+
+async def get_current_user_from_claims(token: str = Depends(oauth2_scheme), db = Depends(get_db)) -> Dict[str, Any]:
+    """
+    get_current_user for read-only routes: the user is taken from the
+    token's claims (token_claims), so no database lookup is needed. Claims
+    can be up to ACCESS_TOKEN_EXPIRE_MINUTES old, and a deleted user keeps
+    access until the token expires, so routes that change data should use
+    get_current_user. Older tokens without the claims, or
+    AUTH_TRUST_TOKEN_CLAIMS=false, fall back to get_current_user.
+    """
+    if AUTH_TRUST_TOKEN_CLAIMS:
+        payload = decode_access_token(token)
+        if all(field in payload for field in PRINCIPAL_FIELDS if field != "username"):
+            principal = {field: payload.get(field) for field in PRINCIPAL_FIELDS if field != "username"}
+            principal["username"] = payload["sub"]
+            return principal
+    return await get_current_user(token, db)
 
 # Create tables
 Base.metadata.create_all(bind=engine) 
\ No newline at end of file
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmarks per-request chat latency with a session service and Runner built
+for every message (the original chat_with_law_agent) against the shared
+ChatRuntime.
+
+By default only the per-request overhead is timed: building the ADK objects
+and getting a session, against a scratch SQLite database. With --live each
+request also runs the agent (needs GOOGLE_API_KEY and network), which shows
+the same difference against real end-to-end latency.
+
+Usage: python backend/bench_chat.py [--requests 200] [--live] [--db-url URL]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add the repository root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService
+from google.genai.types import Content, Part
+
+from backend.chat import ChatRuntime
+from backend.core_agent.agent import root_agent
+
+QUESTION = "What is Section 420 IPC?"
+
+async def run_agent(runner: Runner, user_id: str, session_id: str):
+    message = Content(role="user", parts=[Part(text=QUESTION)])
+    async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=message):
+        pass
+
+async def per_request_runtime(db_url: str, live: bool):
+    """The original request path: new session service and Runner for every message"""
+    session_service = DatabaseSessionService(db_url=db_url)
+    session = await session_service.create_session(app_name="my_agent_app", user_id="user123")
+    runner = Runner(agent=root_agent, app_name="my_agent_app", session_service=session_service)
+    if live:
+        await run_agent(runner, "user123", session.id)
+
+async def shared_runtime(runtime: ChatRuntime, live: bool):
+    session = await runtime.get_or_create_session()
+    if live:
+        await run_agent(runtime.runner, runtime.user_id, session.id)
+
+async def measure(label: str, request, count: int):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await request()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+
+    def percentile_ms(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    print(f"{label:<34} p50 {percentile_ms(0.5):8.2f} ms   p99 {percentile_ms(0.99):8.2f} ms")
+    return percentile_ms(0.5)
+
+async def main(count: int, live: bool, db_url: str):
+    with tempfile.TemporaryDirectory() as scratch:
+        db_url = db_url.format(scratch=scratch)
+        # Create the database and schema up front so neither variant pays for them
+        warmup = ChatRuntime(db_url)
+        await warmup.get_or_create_session()
+        await warmup.close()
+
+        before = await measure("Runtime per request (original)", lambda: per_request_runtime(db_url, live), count)
+        runtime = ChatRuntime(db_url)
+        after = await measure("Shared ChatRuntime", lambda: shared_runtime(runtime, live), count)
+        await runtime.close()
+        print(f"p50 speedup: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per variant")
+    parser.add_argument("--live", action="store_true", help="also run the agent (calls Gemini)")
+    parser.add_argument("--db-url", default="sqlite:///{scratch}/bench_chat.db",
+                        help="session database; {scratch} is a temporary directory (newer ADK versions "
+                             "need an async driver, e.g. sqlite+aiosqlite:///{scratch}/bench_chat.db)")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.live, args.db_url))
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Checks and benchmarks the chat answer formatter (backend/chat_formatter.py).
+
+Compares format_response with golden outputs, and with the original
+replace-pass formatter from chat_with_law_agent on generated answers, both
+whole and fed to StreamingFormatter in random pieces. Then times both
+formatters on multi-kilobyte answers: the cost per KB should stay flat as
+answers grow.
+
+Usage: python backend/bench_chat_formatter.py
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.chat_formatter import SECTION_MARKERS, StreamingFormatter, format_response
+
+# (name, agent answer, formatted answer)
+GOLDENS = [
+    ('plain',
+     'Cheating is punishable under the Indian Penal Code.',
+     'Cheating is punishable under the Indian Penal Code.'),
+    ('paragraphs',
+     'First paragraph.\n\nSecond paragraph.\n\n\nThird after three newlines.',
+     'First paragraph.\nSecond paragraph.\n\nThird after three newlines.'),
+    ('bullets',
+     'Key points:\n• Dishonest intention\n- Deception of a person\n* Delivery of property\nThat is the offence.',
+     'Key points:\n\n- Dishonest intention\n- Deception of a person\n- Delivery of property\n\nThat is the offence.'),
+    ('numbered',
+     'Steps to file an FIR:\n1. Visit the police station\n2. Give your statement\n3. Get a copy\nKeep the copy safe.',
+     'Steps to file an FIR:\n\n1. Visit the police station\n2. Give your statement\n3. Get a copy\n\nKeep the copy safe.'),
+    ('sections',
+     'Section 420 IPC deals with cheating. Article 21 protects life. Clause 3 of the agreement applies.',
+     '## 420 IPC deals with cheating. \n\n\n### 21 protects life. \n\n\n#### 3 of the agreement applies.'),
+    ('callouts',
+     'Note the deadline. Important dates matter. Warning signs of fraud include pressure to pay.',
+     '> **Note:** the deadline. \n\n> **Important:** dates matter. \n\n> **Warning:** signs of fraud include pressure to pay.'),
+    ('example',
+     'Example A sells a fake gold chain to B.',
+     '#### Example A sells a fake gold chain to B.'),
+    ('heading_lines',
+     '# Summary\nThe court held:\n## Ratio\nIntent is required.',
+     '# Summary\nThe court held:\n\n## Ratio\nIntent is required.'),
+    ('whitespace',
+     '\n\n  Answer with padding.  \n- item one\n\n',
+     'Answer with padding.  \n\n- item one'),
+    ('mixed',
+     'Under Section 138 of the NI Act:\n\n- The cheque must bounce\n- Notice within 30 days\n\nNote you can also claim interest.\n1. File a complaint\n2. Attend the hearing',
+     'Under \n\n\n## 138 of the NI Act:\n\n- The cheque must bounce\n- Notice within 30 days\n\n\n\n> **Note:** you can also claim interest.\n\n1. File a complaint\n2. Attend the hearing'),
+]
+
+def legacy_format(response_text: str) -> str:
+    """The formatter as originally written in chat_with_law_agent"""
+    response_text = response_text.replace('\n\n', '\n')
+    formatted_lines = []
+    in_list = False
+    for line in response_text.split('\n'):
+        if line.strip().startswith(('•', '-', '*')):
+            if not in_list:
+                formatted_lines.append('')
+                in_list = True
+            line = f"- {line.lstrip('•-* ')}"
+        elif line.strip() and line.strip()[0].isdigit() and '. ' in line:
+            if not in_list:
+                formatted_lines.append('')
+                in_list = True
+        else:
+            if in_list and line.strip():
+                formatted_lines.append('')
+            in_list = False
+        formatted_lines.append(line)
+    formatted_text = '\n'.join(formatted_lines)
+    for keyword, replacement in SECTION_MARKERS.items():
+        if keyword + ' ' in formatted_text:
+            formatted_text = formatted_text.replace(f"{keyword} ", f"\n\n{replacement} ")
+    formatted_text = formatted_text.replace('\n#', '\n\n#')
+    return formatted_text.strip()
+
+def streamed(text: str, rng: random.Random, max_piece: int = 20) -> str:
+    """format_response through StreamingFormatter, in pieces of 1 to max_piece characters"""
+    formatter = StreamingFormatter()
+    pieces = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, max_piece)
+        pieces.append(formatter.feed(text[position:position + size]))
+        position += size
+    pieces.append(formatter.finish())
+    return "".join(pieces)
+
+def generated_answer(size: int, rng: random.Random) -> str:
+    """A legal answer of about `size` characters: paragraphs, lists and section keywords"""
+    sentences = [
+        "Section 420 IPC punishes cheating and dishonestly inducing delivery of property.",
+        "Article 21 guarantees the protection of life and personal liberty.",
+        "Note the limitation period for filing the complaint.",
+        "Important documents include the FIR copy and the medical report.",
+        "Warning signs of fraud include pressure to pay in advance.",
+        "Example A promises B a job abroad and takes a fee.",
+        "Clause 7 of the agreement provides for arbitration.",
+        "The court looks at intention at the time of the promise.",
+    ]
+    items = ["• Keep all receipts", "- File the complaint promptly", "* Consult a lawyer",
+             "1. Visit the police station", "2. Record your statement", "3. Collect the FIR copy"]
+    parts = []
+    length = 0
+    while length < size:
+        choice = rng.random()
+        if choice < 0.5:
+            part = " ".join(rng.choice(sentences) for _ in range(rng.randint(1, 4)))
+        elif choice < 0.8:
+            part = "\n".join(rng.choice(items) for _ in range(rng.randint(1, 5)))
+        else:
+            part = "## " + rng.choice(["Summary", "Remedies", "Procedure"])
+        parts.append(part)
+        parts.append(rng.choice(["\n", "\n\n", "\n\n\n"]))
+        length += len(part) + 2
+    return "".join(parts)
+
+def check_goldens() -> int:
+    rng = random.Random(7)
+    failures = 0
+    for name, text, expected in GOLDENS:
+        for label, actual in (("whole", format_response(text)), ("streamed", streamed(text, rng))):
+            if actual != expected:
+                failures += 1
+                print(f"❌ {name} ({label}): expected {expected!r}, got {actual!r}")
+    print(f"Golden outputs: {len(GOLDENS) * 2 - failures}/{len(GOLDENS) * 2} passed")
+    return failures
+
+def check_equivalence(count: int = 500) -> int:
+    rng = random.Random(11)
+    failures = 0
+    for _ in range(count):
+        text = generated_answer(rng.randint(0, 3000), rng)
+        expected = legacy_format(text.strip())
+        if format_response(text) != expected or streamed(text, rng) != expected:
+            failures += 1
+            if failures <= 5:
+                print(f"❌ differs from the original formatter on {text[:80]!r}...")
+    print(f"Equivalence with the original formatter: {count - failures}/{count} identical")
+    return failures
+
+def benchmark(sizes=(4_000, 16_000, 64_000, 256_000), rounds: int = 5):
+    rng = random.Random(3)
+    for size in sizes:
+        text = generated_answer(size, rng)
+
+        def best_of(fn):
+            best = float("inf")
+            for _ in range(rounds):
+                started = time.perf_counter()
+                fn(text)
+                best = min(best, time.perf_counter() - started)
+            return best / (len(text) / 1000) * 1e6
+
+        legacy_us = best_of(legacy_format)
+        single_pass_us = best_of(format_response)
+        streamed_us = best_of(lambda text: streamed(text, random.Random(1), max_piece=200))
+        print(f"{len(text) // 1000:>4} KB answer: original {legacy_us:6.1f} µs/KB, "
+              f"single pass {single_pass_us:6.1f} µs/KB, streamed (≤200 chars/piece) {streamed_us:6.1f} µs/KB")
+
+if __name__ == "__main__":
+    failures = check_goldens() + check_equivalence()
+    benchmark()
+    sys.exit(1 if failures else 0)
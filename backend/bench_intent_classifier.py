@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Checks and benchmarks the courtroom intent classifier.
+
+Runs a labelled fixture set through the classifier, compares every flag with
+the original keyword-list routing on fixtures and generated statements, and
+times both implementations.
+
+Usage: python backend/bench_intent_classifier.py
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ai_court.services.intent_classifier import classify_intent, INDICATORS, SIMPLE_GREETINGS
+
+# (statement, who should respond, flags that must be set)
+LABELLED_FIXTURES = [
+    ("Hello", "ai_lawyer", ["is_greeting"]),
+    ("good morning", "ai_lawyer", ["is_greeting"]),
+    ("Hello judge", "judge", ["is_judge_greeting", "is_judge_addressed"]),
+    ("Your Honour, may I approach the bench?", "judge", ["is_addressing_judge", "is_procedural_request"]),
+    ("May it please the court, I represent the plaintiff.", "judge", ["is_addressing_judge", "is_case_start"]),
+    ("Objection! Leading the witness.", "judge", ["is_procedural_request", "requires_opposition_response"]),
+    ("I request a short recess.", "judge", ["is_procedural_request"]),
+    ("We submit this CCTV footage as evidence supporting our claim.", "judge",
+     ["is_evidence_submission", "proper_document_introduction"]),
+    ("Attached: 1.pdf", "judge", ["is_document_attachment", "is_evidence_submission"]),
+    ("I have uploaded the medical report.", "judge", ["is_document_attachment"]),  # no stated purpose
+    ("My learned friend has misread the statute.", "ai_lawyer", ["is_addressing_opposition"]),
+    ("The defendant breached the contract and owes damages.", "ai_lawyer",
+     ["requires_opposition_response", "is_case_start"]),
+    ("We will prove the allegations beyond reasonable doubt.", "ai_lawyer",
+     ["requires_opposition_response", "is_case_start"]),
+    ("Opposing counsel has no answer to the testimony.", "ai_lawyer",
+     ["is_addressing_opposition", "requires_opposition_response"]),
+    ("The dowry demands began in 2019.", "ai_lawyer", []),
+    ("Section 498A requires proof of cruelty.", "ai_lawyer", []),  # 'proof' is not 'prove'
+    ("Please proceed.", "judge", ["is_procedural_request"]),
+    ("The border dispute is the real issue.", "judge", ["is_procedural_request"]),  # 'order' is a substring match
+    ("I tender exhibit P-3 showing the bank transfer.", "judge",
+     ["is_evidence_submission", "proper_document_introduction"]),
+    ("The doctor's note says nothing about injuries.", "judge", ["is_document_attachment"]),  # 'doc' is a substring match
+]
+
+def legacy_intent(human_input: str) -> dict:
+    """The routing flags as originally computed in conduct_debate_turn"""
+    text = human_input.lower()
+    flags = {flag: any(phrase in text for phrase in phrases) for flag, phrases in INDICATORS.items()}
+    states_purpose = flags.pop("states_evidence_purpose")
+    flags["proper_document_introduction"] = flags["is_evidence_submission"] and states_purpose
+    flags["is_greeting"] = text.strip() in SIMPLE_GREETINGS
+
+    if flags["is_addressing_judge"] or flags["is_procedural_request"]:
+        ai_lawyer_should_respond, judge_should_respond = False, True
+    elif flags["is_evidence_submission"] or (flags["is_document_attachment"] and not flags["proper_document_introduction"]):
+        ai_lawyer_should_respond, judge_should_respond = False, True
+    else:
+        ai_lawyer_should_respond, judge_should_respond = True, False
+    if flags["is_greeting"]:
+        judge_should_respond = flags["is_addressing_judge"]
+        ai_lawyer_should_respond = not judge_should_respond
+
+    flags["ai_lawyer_should_respond"] = ai_lawyer_should_respond
+    flags["judge_should_respond"] = judge_should_respond
+    return flags
+
+# Lists evaluated a second time further down the original function
+REPEATED_FLAGS = ["is_case_start", "is_judge_addressed", "is_judge_greeting"]
+
+def original_routing(human_input: str) -> None:
+    """Timing baseline: the original cost shape, lowercasing the input for
+    every check and evaluating the greeting, case-start and judge-address
+    lists twice"""
+    for phrases in list(INDICATORS.values()) + [INDICATORS[flag] for flag in REPEATED_FLAGS]:
+        any(phrase in human_input.lower() for phrase in phrases)
+    for _ in range(2):
+        human_input.lower().strip() in SIMPLE_GREETINGS
+
+def generated_statements(count: int, seed: int = 7) -> list:
+    """Random statements mixing indicator phrases with filler words"""
+    rng = random.Random(seed)
+    phrases = sorted({phrase for phrases in INDICATORS.values() for phrase in phrases} | SIMPLE_GREETINGS)
+    filler = ["the", "accused", "on", "that", "night", "was", "not", "present", "at", "home", "and",
+              "Your", "HONOR", "Mr.", "Sharma", "respectfully", "submits", "", "  "]
+    statements = []
+    for _ in range(count):
+        words = [rng.choice(filler) for _ in range(rng.randint(0, 25))]
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randint(0, len(words)), rng.choice(phrases))
+        statements.append(" ".join(words) if rng.random() > 0.05 else rng.choice(phrases))
+    return statements
+
+def check_fixtures() -> int:
+    failures = 0
+    for text, responder, expected_flags in LABELLED_FIXTURES:
+        intent = classify_intent(text)
+        actual_responder = "judge" if intent.judge_should_respond else "ai_lawyer"
+        missing = [flag for flag in expected_flags if not getattr(intent, flag)]
+        if actual_responder != responder or missing:
+            failures += 1
+            print(f"❌ {text!r}: expected {responder} {expected_flags}, got {actual_responder}, missing {missing}")
+    print(f"Labelled fixtures: {len(LABELLED_FIXTURES) - failures}/{len(LABELLED_FIXTURES)} passed")
+    return failures
+
+def check_equivalence(statements: list) -> int:
+    failures = 0
+    for text in statements:
+        expected = legacy_intent(text)
+        actual = classify_intent(text).model_dump()
+        if actual != expected:
+            failures += 1
+            if failures <= 10:
+                diff = {k: (expected[k], actual[k]) for k in expected if expected[k] != actual[k]}
+                print(f"❌ {text!r}: (legacy, classifier) {diff}")
+    print(f"Equivalence with legacy routing: {len(statements) - failures}/{len(statements)} identical")
+    return failures
+
+def benchmark(statements: list, rounds: int = 5):
+    def best_of(fn):
+        best = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for text in statements:
+                fn(text)
+            best = min(best, time.perf_counter() - started)
+        return best / len(statements) * 1e6
+
+    original_us = best_of(original_routing)
+    legacy_us = best_of(legacy_intent)
+    classifier_us = best_of(classify_intent)
+    print(f"Original routing code:          {original_us:.1f} µs/statement")
+    print(f"Keyword lists, each once:       {legacy_us:.1f} µs/statement")
+    print(f"Intent classifier (single pass): {classifier_us:.1f} µs/statement "
+          f"({original_us / classifier_us:.1f}x vs original)")
+
+if __name__ == "__main__":
+    statements = [text for text, _, _ in LABELLED_FIXTURES] + generated_statements(5000)
+    failures = check_fixtures() + check_equivalence(statements)
+    benchmark(statements)
+    sys.exit(1 if failures else 0)
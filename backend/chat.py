@@ -1,116 +1,175 @@
+import inspect
 import os
 import google.generativeai as genai
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
 from google.adk.sessions import DatabaseSessionService
 from google.adk.runners import Runner
 from backend.core_agent.agent import root_agent
 from google.genai.types import Content, Part
+from backend.ai_court.core.config import settings
+from backend.ai_court.core.startup import STATUS_READY, startup_registry
+from backend.chat_cache import chat_cache, detect_language
+from backend.chat_formatter import StreamingFormatter, format_response
+from backend.llm_gateway import estimate_tokens, llm_gateway
 
 # Set the Google API key for the ADK agent
 GOOGLE_API_KEY = ""
 os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
 genai.configure(api_key=GOOGLE_API_KEY)
-async def chat_with_law_agent(user_message, session_id=None):
-    app_name = "my_agent_app"
-    user_id = "user123"
-    db_url = "sqlite:///./my_agent_data.db"
 
-    session_service = DatabaseSessionService(db_url=db_url)
+CHAT_DB_URL = "sqlite:///./my_agent_data.db"
 
-    # Get or create session properly with keywords
-    if session_id is not None:
-        session = await session_service.get_session(
+class ChatRuntime:
+    """
+    The ADK session service (which owns the SQLAlchemy engine and its
+    connection pool) and the Runner, built once per process and shared by
+    every chat request, so a request only pays for the agent call itself.
+    """
+    def __init__(self, db_url: str, app_name: str = "my_agent_app", user_id: str = "user123"):
+        self.app_name = app_name
+        self.user_id = user_id
+        self.session_service = DatabaseSessionService(db_url=db_url)
+        self.runner = Runner(
+            agent=root_agent,
             app_name=app_name,
-            user_id=user_id,
-            session_id=session_id
+            session_service=self.session_service
         )
-        if session is None:
-            session = await session_service.create_session(
-                app_name=app_name,
-                user_id=user_id
+
+    async def get_or_create_session(self, session_id=None):
+        """The session with this ID, or a new one if there is none"""
+        if session_id is not None:
+            session = await self.session_service.get_session(
+                app_name=self.app_name,
+                user_id=self.user_id,
+                session_id=session_id
             )
-    else:
-        session = await session_service.create_session(
-            app_name=app_name,
-            user_id=user_id
+            if session is not None:
+                return session
+        return await self.session_service.create_session(
+            app_name=self.app_name,
+            user_id=self.user_id
+        )
+
+    async def close(self):
+        # Not every ADK version has these
+        for close in (getattr(self.runner, "close", None), getattr(self.session_service, "close", None)):
+            if close is not None:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+
+def _load_chat_runtime() -> ChatRuntime:
+    return ChatRuntime(db_url=CHAT_DB_URL)
+
+# The courtroom does not need the chat agent, so it does not gate readiness
+startup_registry.register("chat_runtime", _load_chat_runtime, critical=False)
+
+async def get_chat_runtime() -> ChatRuntime:
+    """Returns the chat runtime, building it off the event loop on first use"""
+    return await startup_registry.aget("chat_runtime")
+
+async def close_chat_runtime():
+    """Releases the runtime's database connections (call on shutdown)"""
+    if startup_registry.status("chat_runtime") == STATUS_READY:
+        await (await get_chat_runtime()).close()
+
+async def _record_cached_turn(session_service, session, user_content, answer):
+    """Adds a turn answered from the cache to the agent session, so follow-up questions see it"""
+    try:
+        await session_service.append_event(session, Event(author="user", content=user_content))
+        await session_service.append_event(
+            session,
+            Event(author=root_agent.name, content=Content(role="model", parts=[Part(text=answer)]))
         )
+    except Exception as e:
+        print(f"Error recording cached chat turn: {e}")
 
-    runner = Runner(
-        agent=root_agent,
-        app_name=app_name,
-        session_service=session_service
-    )
+async def stream_chat_with_law_agent(user_message, session_id=None, language=None, streaming=True):
+    """
+    Runs the agent on a message, yielding (event, text) pairs:
+
+        ("delta", text)  more of the formatted answer, as the model writes it
+        ("reset", "")    discard the deltas so far: they were the model's text
+                         before a tool call, not the answer
+        ("done", text)   the complete formatted answer (None if the agent gave
+                         none); always last
+
+    With streaming=False the model is not asked for partial responses and
+    only "done" is yielded.
+    """
+    runtime = await get_chat_runtime()
+    session = await runtime.get_or_create_session(session_id)
 
     user_content = Content(role='user', parts=[Part(text=user_message)])
-    final_response = None
 
-    async for event in runner.run_async(
-        user_id=user_id,
-        session_id=session.id,
-        new_message=user_content
+    # Answers only depend on the question when there is no earlier conversation to refer to
+    cacheable = settings.CHAT_CACHE_ENABLED and not session.events
+    cache_language = language or detect_language(user_message)
+    question_embedding = None
+    if cacheable:
+        cached_response, question_embedding = await chat_cache.get(user_message, cache_language)
+        if cached_response is not None:
+            await _record_cached_turn(runtime.session_service, session, user_content, cached_response)
+            if streaming:
+                yield "delta", cached_response
+            yield "done", cached_response
+            return
+    elif settings.CHAT_CACHE_ENABLED:
+        chat_cache.record_bypass()
+
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE)
+    formatter = StreamingFormatter()
+    streamed = False
+    response_text = None
+    # The agent run (which may call the model more than once for tools) takes one gateway
+    # slot; it is not retried since the agent's session already recorded the message
+    async for event in llm_gateway.iterate(
+        "chat", root_agent.model,
+        lambda: runtime.runner.run_async(
+            user_id=runtime.user_id,
+            session_id=session.id,
+            new_message=user_content,
+            run_config=run_config
+        ),
+        tokens=estimate_tokens(user_message)
     ):
-        if event.is_final_response():
-            parts = getattr(event.content, "parts", [])
+        parts = getattr(event.content, "parts", None) or []
+        if event.partial:
+            delta = formatter.feed(''.join(part.text for part in parts if part.text and not part.thought))
+            if delta:
+                streamed = True
+                yield "delta", delta
+        elif event.is_final_response():
             if parts and hasattr(parts[0], "text") and parts[0].text:
                 # Get the raw response text
                 response_text = parts[0].text.strip()
-                
-                try:
-                    # Format the response with markdown
-                    # 1. Add newlines after headings and lists
-                    response_text = response_text.replace('\n\n', '\n')
-                    
-                    # 2. Format lists with proper markdown
-                    lines = response_text.split('\n')
-                    formatted_lines = []
-                    in_list = False
-                    
-                    for line in lines:
-                        # Format bullet points
-                        if line.strip().startswith(('•', '-', '*')):
-                            if not in_list:
-                                formatted_lines.append('')
-                                in_list = True
-                            line = f"- {line.lstrip('•-* ')}"
-                        # Format numbered lists
-                        elif line.strip() and line.strip()[0].isdigit() and '. ' in line:
-                            if not in_list:
-                                formatted_lines.append('')
-                                in_list = True
-                        else:
-                            if in_list and line.strip():
-                                formatted_lines.append('')
-                            in_list = False
-                        
-                        # Add the line
-                        formatted_lines.append(line)
-                    
-                    # Join the lines back together
-                    formatted_text = '\n'.join(formatted_lines)
-                    
-                    # Add section headers
-                    sections = {
-                        'Section': '##',
-                        'Article': '###',
-                        'Clause': '####',
-                        'Example': '#### Example',
-                        'Note': '> **Note:**',
-                        'Important': '> **Important:**',
-                        'Warning': '> **Warning:**',
-                    }
-                    
-                    for keyword, replacement in sections.items():
-                        if keyword + ' ' in formatted_text:
-                            formatted_text = formatted_text.replace(
-                                f"{keyword} ", 
-                                f"\n\n{replacement} "
-                            )
-                    
-                    # Ensure proper spacing around headings
-                    formatted_text = formatted_text.replace('\n#', '\n\n#')
-                    
-                    final_response = formatted_text.strip()
-                except Exception as e:
-                    print(f"Error formatting response: {e}")
-                    final_response = response_text
+        else:
+            # A tool call ends this model turn; the answer comes in a later one
+            formatter = StreamingFormatter()
+            if streamed:
+                streamed = False
+                yield "reset", ""
 
+    final_response = None
+    if response_text:
+        try:
+            final_response = format_response(response_text)
+        except Exception as e:
+            print(f"Error formatting response: {e}")
+            final_response = response_text
+        if streamed:
+            tail = formatter.finish()
+            if tail:
+                yield "delta", tail
+
+    if cacheable and final_response:
+        await chat_cache.put(user_message, cache_language, final_response, question_embedding)
+    yield "done", final_response
+
+async def chat_with_law_agent(user_message, session_id=None, language=None):
+    final_response = None
+    async for event, text in stream_chat_with_law_agent(user_message, session_id, language, streaming=False):
+        if event == "done":
+            final_response = text
     return final_response
@@ -0,0 +1,229 @@
+"""
+Semantic cache of chat agent answers.
+
+Common legal questions ("What is Section 420 IPC?") come in many phrasings.
+A question without prior conversation context is embedded and compared with
+the questions answered before in the same language; if one is at least
+`similarity_threshold` cosine-similar (and mentions the same numbers, so
+"Section 420" never matches "Section 421"), its formatted answer is served
+without running the agent. Exact repeats (up to case and spacing) are found
+without computing an embedding.
+
+Entries expire `ttl_seconds` after they were stored; each language keeps at
+most `max_entries`, dropping the least recently used. The cache is per
+process.
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.ai_court.core.config import settings
+from backend.ai_court.core.embedding_cache import get_query_embedding, normalize_query
+
+_NUMBER = re.compile(r"\d+[a-z]?", re.IGNORECASE)
+
+def question_numbers(question: str) -> Tuple[str, ...]:
+    """Section, article and year numbers in a question; cached answers must cite the same ones"""
+    return tuple(sorted(number.lower() for number in _NUMBER.findall(question)))
+
+def detect_language(text: str) -> str:
+    """Namespace for a question without a declared language: its dominant script (e.g. "latin", "devanagari")"""
+    scripts = Counter(
+        unicodedata.name(char, "UNKNOWN").split(" ")[0].lower()
+        for char in text if char.isalpha()
+    )
+    return scripts.most_common(1)[0][0] if scripts else "unknown"
+
+class _Entry:
+    def __init__(self, question: str, numbers: Tuple[str, ...], answer: str, expires_at: float, row: int):
+        self.question = question
+        self.numbers = numbers
+        self.answer = answer
+        self.expires_at = expires_at
+        self.row = row
+
+class _Namespace:
+    """
+    Questions of one language. Embeddings are rows of a preallocated matrix
+    so a lookup is one matrix-vector product; removed rows are zeroed (they
+    score 0) and compacted away once they make up half the matrix.
+    """
+    def __init__(self):
+        # Normalized question -> entry, least recently used first
+        self.entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.rows: Optional[np.ndarray] = None
+        self.row_keys: List[Optional[str]] = []
+        self.dead_rows = 0
+
+    def add(self, key: str, question: str, numbers: Tuple[str, ...], embedding: np.ndarray,
+            answer: str, expires_at: float):
+        if key in self.entries:
+            row = self.entries[key].row
+        else:
+            row = len(self.row_keys)
+            if self.rows is None:
+                self.rows = np.zeros((64, len(embedding)), dtype=np.float32)
+            elif row == len(self.rows):
+                self.rows = np.concatenate([self.rows, np.zeros_like(self.rows)])
+            self.row_keys.append(key)
+        self.rows[row] = embedding
+        self.entries[key] = _Entry(question, numbers, answer, expires_at, row)
+        self.entries.move_to_end(key)
+
+    def remove(self, key: str):
+        entry = self.entries.pop(key)
+        self.rows[entry.row] = 0
+        self.row_keys[entry.row] = None
+        self.dead_rows += 1
+        if self.dead_rows * 2 > len(self.row_keys):
+            self._compact()
+
+    def _compact(self):
+        live = [(key, self.entries[key].row) for key in self.row_keys if key is not None]
+        rows = np.zeros((max(64, len(live) * 2), self.rows.shape[1]), dtype=np.float32)
+        for new_row, (key, old_row) in enumerate(live):
+            rows[new_row] = self.rows[old_row]
+            self.entries[key].row = new_row
+        self.rows = rows
+        self.row_keys = [key for key, _ in live]
+        self.dead_rows = 0
+
+    def scores(self, embedding: np.ndarray) -> np.ndarray:
+        if self.rows is None:
+            return np.zeros(0, dtype=np.float32)
+        return self.rows[:len(self.row_keys)] @ embedding
+
+class SemanticChatCache:
+    def __init__(self, similarity_threshold: float = 0.95, ttl_seconds: float = 86400, max_entries: int = 5000):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.errors = 0
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _namespace(self, language: str) -> _Namespace:
+        if language not in self._namespaces:
+            self._namespaces[language] = _Namespace()
+        return self._namespaces[language]
+
+    def _lookup_exact(self, language: str, key: str) -> Optional[str]:
+        with self._lock:
+            namespace = self._namespace(language)
+            entry = namespace.entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                namespace.remove(key)
+                return None
+            namespace.entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry.answer
+
+    def _lookup_similar(self, language: str, question: str, embedding: np.ndarray) -> Optional[str]:
+        numbers = question_numbers(question)
+        with self._lock:
+            namespace = self._namespace(language)
+            scores = namespace.scores(embedding)
+            candidates = np.flatnonzero(scores >= self.similarity_threshold)
+            now = time.monotonic()
+            expired = []
+            answer = None
+            for row in candidates[np.argsort(-scores[candidates])]:
+                key = namespace.row_keys[row]
+                entry = namespace.entries[key]
+                if entry.expires_at <= now:
+                    expired.append(key)
+                elif entry.numbers == numbers:
+                    namespace.entries.move_to_end(key)
+                    self.semantic_hits += 1
+                    answer = entry.answer
+                    break
+            for key in expired:
+                namespace.remove(key)
+            return answer
+
+    async def get(self, question: str, language: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Returns (cached answer or None, question embedding). Pass the
+        embedding back to put() after a miss so it is not computed twice.
+        """
+        key = normalize_query(question)
+        answer = self._lookup_exact(language, key)
+        if answer is not None:
+            return answer, None
+        try:
+            embedding = self._unit(await get_query_embedding(key))
+        except Exception as e:
+            self.errors += 1
+            print(f"Chat cache embedding failed, skipping lookup: {e}")
+            return None, None
+        answer = self._lookup_similar(language, question, embedding)
+        if answer is None:
+            self.misses += 1
+        return answer, embedding
+
+    async def put(self, question: str, language: str, answer: str, embedding: Optional[np.ndarray] = None):
+        """Caches the answer to a context-free question"""
+        key = normalize_query(question)
+        if embedding is None:
+            try:
+                embedding = self._unit(await get_query_embedding(key))
+            except Exception as e:
+                self.errors += 1
+                print(f"Chat cache embedding failed, not caching: {e}")
+                return
+        with self._lock:
+            namespace = self._namespace(language)
+            namespace.add(
+                key, question, question_numbers(question), embedding, answer, time.monotonic() + self.ttl_seconds
+            )
+            while len(namespace.entries) > self.max_entries:
+                namespace.remove(next(iter(namespace.entries)))
+
+    def record_bypass(self):
+        """Counts a question answered without the cache (it had conversation context)"""
+        self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            self._namespaces.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "entries": {language: len(namespace.entries) for language, namespace in self._namespaces.items()},
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "similarity_threshold": self.similarity_threshold,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "bypassed": self.bypassed,
+                "errors": self.errors
+            }
+
+chat_cache = SemanticChatCache(
+    similarity_threshold=settings.CHAT_CACHE_SIMILARITY_THRESHOLD,
+    ttl_seconds=settings.CHAT_CACHE_TTL_SECONDS,
+    max_entries=settings.CHAT_CACHE_MAX_ENTRIES
+)
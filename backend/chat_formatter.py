@@ -0,0 +1,115 @@
+"""
+Markdown formatting of chat agent answers.
+
+Bullet and numbered lists are set off by blank lines, and keywords such as
+"Section " or "Note " start a heading or callout (SECTION_MARKERS). Doubled
+newlines in the answer are collapsed first.
+
+The answer is formatted in one pass over its lines, then one regex pass
+marks every keyword; the spacing that used to take extra passes over the
+whole text is emitted with each line. So the cost grows linearly with
+the answer, and an answer arriving in pieces (StreamingFormatter) gets
+exactly the same formatting as a complete one (format_response).
+"""
+import re
+
+# Markdown headings and callouts that keywords in the answer are turned into
+SECTION_MARKERS = {
+    'Section': '##',
+    'Article': '###',
+    'Clause': '####',
+    'Example': '#### Example',
+    'Note': '> **Note:**',
+    'Important': '> **Important:**',
+    'Warning': '> **Warning:**',
+}
+
+_KEYWORD = re.compile("(" + "|".join(re.escape(keyword) for keyword in SECTION_MARKERS) + ") ")
+# Each marker starts a new paragraph; headings get one more newline, like every '#' after a line break
+_MARKER_TEXT = {
+    keyword: ("\n\n\n" if marker.startswith('#') else "\n\n") + marker + " "
+    for keyword, marker in SECTION_MARKERS.items()
+}
+
+def _mark_sections(text: str) -> str:
+    return _KEYWORD.sub(lambda match: _MARKER_TEXT[match.group(1)], text)
+
+class StreamingFormatter:
+    """
+    Formats an answer that arrives in pieces: feed() returns the formatted
+    text that can no longer change, finish() the rest.
+
+    A line is formatted once the newlines after it and the start of the
+    next line have arrived (both affect how it is formatted), so the output
+    trails the input by about a line.
+    """
+    def __init__(self):
+        self.pending = ''
+        self.in_list = False
+        self.lines_out = 0
+        self.text_out = False
+        # Trailing whitespace is held back until more text follows, since the answer is stripped
+        self.held_whitespace = ''
+
+    def _format_lines(self, lines) -> str:
+        out = [self.held_whitespace]
+        append = out.append
+        in_list = self.in_list
+        lines_out = self.lines_out
+        for line in lines:
+            stripped = line.strip()
+            if stripped.startswith(('•', '-', '*')):
+                # Bullet points
+                line = f"- {line.lstrip('•-* ')}"
+                opens_block = not in_list
+                in_list = True
+            elif stripped and stripped[0].isdigit() and '. ' in line:
+                # Numbered lists
+                opens_block = not in_list
+                in_list = True
+            else:
+                opens_block = in_list and bool(stripped)
+                in_list = False
+            if opens_block:
+                # Blank line before and after a list
+                if lines_out:
+                    append('\n')
+                lines_out += 1
+            if lines_out:
+                # A line starting with a keyword starts with a newline once marked, so
+                # this is the same as asking the marked line
+                append('\n\n' if line.startswith('#') else '\n')
+            append(line)
+            lines_out += 1
+        self.in_list = in_list
+        self.lines_out = lines_out
+
+        # Keywords never span lines, so they are marked in all the lines at once
+        text = _mark_sections(''.join(out))
+        if not self.text_out:
+            text = text.lstrip()
+        visible = text.rstrip()
+        self.held_whitespace = text[len(visible):]
+        self.text_out = self.text_out or bool(visible)
+        return visible
+
+    def feed(self, text: str) -> str:
+        if not self.text_out and not self.pending:
+            text = text.lstrip()
+        self.pending += text
+        # Lines are complete once a newline and some text (not just whitespace) follow them
+        cut = self.pending.rstrip().rfind('\n')
+        if cut == -1:
+            return ''
+        ready, self.pending = self.pending[:cut + 1], self.pending[cut + 1:]
+        # The newline runs in ready are complete, so collapsing pairs gives the same as on the whole answer
+        return self._format_lines(ready.replace('\n\n', '\n').split('\n')[:-1])
+
+    def finish(self) -> str:
+        remainder, self.pending = self.pending.rstrip(), ''
+        return self._format_lines([remainder]) if remainder else ''
+
+def format_response(response_text: str) -> str:
+    """Formats an agent answer as markdown (lists, section headings, callouts)"""
+    formatter = StreamingFormatter()
+    return formatter.feed(response_text) + formatter.finish()
@@ -5,6 +5,8 @@ import google.generativeai as genai
 from fastapi import HTTPException, UploadFile
 from pydantic import BaseModel
 
+from backend.llm_gateway import LLMOverloaded, llm_gateway
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,7 +30,7 @@ class DocumentSummary(BaseModel):
     key_points: list[str]
     timestamp: str
 
-def summarize_text(text: str, max_length: int = 1000) -> dict:
+async def summarize_text(text: str, max_length: int = 1000) -> dict:
     """
     Generate a summary and key points from the given text using Gemini API
     """
@@ -42,7 +44,7 @@ def summarize_text(text: str, max_length: int = 1000) -> dict:
         
         Summary and key points:"""
         
-        response = model.generate_content(prompt)
+        response = await llm_gateway.generate(model, prompt, caller="document_summary")
         result = response.text.strip().split("\n\n", 1)
         
         if len(result) == 2:
@@ -59,6 +61,9 @@ def summarize_text(text: str, max_length: int = 1000) -> dict:
             "summary_length": len(summary)
         }
         
+    except LLMOverloaded as e:
+        logger.warning(f"Text summarization shed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Summarization is temporarily unavailable, please retry shortly")
     except Exception as e:
         logger.error(f"Error in text summarization: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
@@ -108,12 +113,12 @@ async def _extract_text_from_pdf(content: bytes) -> str:
         logger.error(f"Error extracting text from PDF: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error extracting text from PDF: {str(e)}")
 
-def generate_document_summary(document_text: str) -> DocumentSummary:
+async def generate_document_summary(document_text: str) -> DocumentSummary:
     """
     Generate a comprehensive document summary with key points
     """
     try:
-        summary_result = summarize_text(document_text)
+        summary_result = await summarize_text(document_text)
         
         return DocumentSummary(
             content=document_text[:1000] + ("..." if len(document_text) > 1000 else ""),
@@ -122,6 +127,8 @@ def generate_document_summary(document_text: str) -> DocumentSummary:
             timestamp=datetime.utcnow().isoformat()
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in document summarization: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating document summary: {str(e)}")
@@ -10,11 +10,21 @@ Safe to import anywhere; if SDK or env not present, functions will no-op with cl
 """
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, Optional
 
+from backend.llm_gateway import estimate_tokens, llm_gateway
+
 PORTIA_ENABLED = os.getenv("PORTIA_ENABLED", "false").lower() in {"1", "true", "yes"}
 PORTIA_DEFAULT_MODEL = os.getenv("PORTIA_DEFAULT_MODEL", "gemini-2.5-flash")
+PORTIA_MAX_WORKERS = int(os.getenv("PORTIA_MAX_WORKERS", "4"))
+
+# The SDK is synchronous: async routes run plans on this bounded pool, which
+# keeps them off the event loop and out of the default executor
+_executor = ThreadPoolExecutor(max_workers=PORTIA_MAX_WORKERS, thread_name_prefix="portia")
 
 # Best-effort import; guard at runtime
 try:
@@ -78,7 +88,22 @@ def execute_plan(plan: Any, **kwargs: Any) -> Any:
         return client.run(plan)
 
 
-def run_one_shot(query: str, context: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
-    """Convenience helper: generate + execute a plan in one call."""
-    plan = generate_plan(query, context=context, **kwargs)
-    return execute_plan(plan, **kwargs)
+def run_one_shot(query: str, context: Optional[Dict[str, Any]] = None, caller: str = "portia", **kwargs: Any) -> Any:
+    """Convenience helper: generate + execute a plan in one call.
+
+    The whole plan run takes one slot of the LLM gateway under `caller`, so
+    it is prioritised (and shed) like the app's other Gemini calls.
+    """
+    _ensure_available()
+
+    def run() -> Any:
+        plan = generate_plan(query, context=context, **kwargs)
+        return execute_plan(plan, **kwargs)
+
+    return llm_gateway.call_sync(caller, PORTIA_DEFAULT_MODEL, run, tokens=estimate_tokens(query), retry=False)
+
+
+async def arun_one_shot(query: str, context: Optional[Dict[str, Any]] = None, caller: str = "portia", **kwargs: Any) -> Any:
+    """run_one_shot on the Portia thread pool, for async routes."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(run_one_shot, query, context, caller, **kwargs))
@@ -0,0 +1,706 @@
+"""
+One gateway for every Gemini call in the app (courtroom, chat, IVR,
+summarization, metadata extraction, appointments).
+
+Per model it enforces:
+    - a concurrency limit (slots shared by async and threaded callers),
+    - token-bucket rate limits on requests and prompt tokens per minute;
+and per call:
+    - a deadline covering queueing, retries and the call itself,
+    - retries with full-jitter exponential backoff on 429 and 5xx errors.
+Latency, token and error counters are kept per caller (see metrics()).
+
+Every caller belongs to a priority class (CALLER_PRIORITIES): live voice
+calls > courtroom turns > chat > summarization > ingestion. Queued calls are
+served most urgent first. The background classes (summarization, ingestion)
+may only hold part of a model's slots, and are shed with LLMOverloaded
+instead of queued while interactive calls are waiting, their queue is full
+or the rate limit would hold them back too long.
+
+Limits come from the environment:
+    LLM_MAX_CONCURRENCY        concurrent calls per model (default 8)
+    LLM_REQUESTS_PER_MINUTE    per model, 0 = unlimited (default 0)
+    LLM_TOKENS_PER_MINUTE      prompt tokens per model, 0 = unlimited (default 0)
+    LLM_BACKGROUND_SHARE       share of the slots background calls may hold (default 0.5)
+    LLM_MAX_QUEUE              queued calls per model (default 64)
+    LLM_BACKGROUND_MAX_QUEUE   queued background calls per model (default 8)
+    LLM_BACKGROUND_MAX_RATE_WAIT_SECONDS
+                               longest rate limit wait for background calls (default 5)
+    LLM_MODEL_LIMITS           JSON overrides per model, e.g.
+                               {"gemini-pro": {"max_concurrency": 4, "requests_per_minute": 60}}
+    LLM_MAX_RETRIES            retries after the first attempt (default 3)
+    LLM_TIMEOUT_SECONDS        default deadline per call (default 60)
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: rate limited, or a transient server error
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class LLMDeadlineExceeded(TimeoutError):
+    """The call could not finish (including queueing and retries) before its deadline"""
+
+class LLMOverloaded(RuntimeError):
+    """The call was shed to keep model capacity for more urgent work"""
+
+class Priority(IntEnum):
+    """Classes of LLM work, most urgent first"""
+    VOICE = 0
+    COURTROOM = 1
+    CHAT = 2
+    SUMMARIZATION = 3
+    INGESTION = 4
+
+# Classes from here down are background work: capped and shed under pressure
+BACKGROUND = Priority.SUMMARIZATION
+
+# Class of each caller name; unknown callers count as chat
+CALLER_PRIORITIES: Dict[str, Priority] = {
+    "ivr": Priority.VOICE,
+    "judge_opening": Priority.COURTROOM,
+    "ai_lawyer": Priority.COURTROOM,
+    "judge": Priority.COURTROOM,
+    "judge_triage": Priority.COURTROOM,
+    "chat": Priority.CHAT,
+    "appointments": Priority.CHAT,
+    "portia": Priority.CHAT,
+    "history_summary": Priority.SUMMARIZATION,
+    "document_summary": Priority.SUMMARIZATION,
+    "metadata_extraction": Priority.INGESTION,
+    "portia_rag_ingestion": Priority.INGESTION,
+}
+
+def caller_priority(caller: str) -> Priority:
+    return CALLER_PRIORITIES.get(caller, Priority.CHAT)
+
+class ModelLimits(BaseModel):
+    max_concurrency: int = 8
+    requests_per_minute: float = 0  # 0 = unlimited
+    tokens_per_minute: float = 0  # 0 = unlimited
+    background_share: float = 0.5
+    max_queue: int = 64
+    background_max_queue: int = 8
+    background_max_rate_wait_seconds: float = 5
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+def prompt_tokens(prompt: Any) -> int:
+    """Estimated tokens of a prompt given as text or as a list of Gemini messages"""
+    if isinstance(prompt, str):
+        return estimate_tokens(prompt)
+    if isinstance(prompt, list):
+        return sum(
+            prompt_tokens(part)
+            for message in prompt
+            for part in (message.get("parts", []) if isinstance(message, dict) else [message])
+        )
+    return 0
+
+def response_tokens(response: Any) -> int:
+    """Output tokens reported by Gemini, or estimated from the text"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "candidates_token_count", None):
+        return usage.candidates_token_count
+    try:
+        return estimate_tokens(response.text if hasattr(response, "text") else str(response or ""))
+    except ValueError:
+        return 0  # No text (e.g. blocked by safety filters)
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed call may succeed if repeated (429, 5xx, dropped connection)"""
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+        return True
+    return isinstance(error, ConnectionError)
+
+class _Waiter:
+    def __init__(self, priority: Priority, future: Optional[asyncio.Future] = None):
+        self.priority = priority
+        self.future = future
+        # Threads wait on an event; coroutines on the future
+        self.event = threading.Event() if future is None else None
+        self.shed = False
+
+class _Slots:
+    """
+    Concurrency slots that coroutines and threads can both wait for. Waiters
+    are served by priority class, then first come, first served.
+
+    Background classes may hold at most `background_size` slots, so
+    interactive calls keep headroom. A background call is shed rather than
+    queued while an interactive call is waiting or the background queue is
+    full; when the whole queue is full, a newcomer displaces the last queued
+    call of a less urgent class, or is shed itself.
+    """
+    def __init__(self, size: int, background_size: int, max_queue: int, background_max_queue: int):
+        self.size = size
+        self.background_size = background_size
+        self.max_queue = max_queue
+        self.background_max_queue = background_max_queue
+        self.in_use_by_class: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.shed_by_class: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[int, int, _Waiter]] = []  # Heap of (priority, arrival, waiter)
+        self._arrivals = itertools.count()
+
+    @property
+    def in_use(self) -> int:
+        return sum(self.in_use_by_class.values())
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def waiting_by_class(self) -> Dict[Priority, int]:
+        with self._lock:
+            counts = {priority: 0 for priority in Priority}
+            for priority, _, _ in self._waiters:
+                counts[priority] += 1
+            return counts
+
+    def _can_run(self, priority: Priority) -> bool:
+        if self.in_use >= self.size:
+            return False
+        if priority < BACKGROUND:
+            return True
+        return sum(n for p, n in self.in_use_by_class.items() if p >= BACKGROUND) < self.background_size
+
+    def _admit(self, priority: Priority) -> bool:
+        """
+        Takes a slot if one is free for the class (True), or makes room to
+        queue (False). Raises LLMOverloaded if the call is shed. Lock held.
+        """
+        if self._can_run(priority) and (not self._waiters or self._waiters[0][0] > priority):
+            self.in_use_by_class[priority] += 1
+            return True
+        if priority >= BACKGROUND:
+            interactive_waiting = bool(self._waiters) and self._waiters[0][0] < BACKGROUND
+            background_waiting = sum(1 for p, _, _ in self._waiters if p >= BACKGROUND)
+            if interactive_waiting or background_waiting >= self.background_max_queue:
+                self._shed(priority)
+        if len(self._waiters) >= self.max_queue:
+            # Latest arrival of the least urgent class
+            last = max(self._waiters, key=lambda entry: (entry[0], entry[1]))
+            if last[0] <= priority:
+                self._shed(priority)
+            self._waiters.remove(last)
+            heapq.heapify(self._waiters)
+            self._drop(last[2])
+        return False
+
+    def _shed(self, priority: Priority):
+        self.shed_by_class[priority] += 1
+        raise LLMOverloaded(f"LLM queue is full; {priority.name.lower()} call shed")
+
+    def _drop(self, waiter: _Waiter):
+        """Sheds a queued waiter. Lock held."""
+        self.shed_by_class[waiter.priority] += 1
+        waiter.shed = True
+        if waiter.event is not None:
+            waiter.event.set()
+        else:
+            waiter.future.get_loop().call_soon_threadsafe(self._fail, waiter.future)
+
+    @staticmethod
+    def _fail(future: asyncio.Future):
+        if not future.done():
+            future.set_exception(LLMOverloaded("LLM queue is full; call displaced by more urgent work"))
+
+    def _remove(self, waiter: _Waiter) -> bool:
+        """Removes a waiter that gave up; False if it was already granted or shed. Lock held."""
+        for i, entry in enumerate(self._waiters):
+            if entry[2] is waiter:
+                self._waiters.pop(i)
+                heapq.heapify(self._waiters)
+                return True
+        return False
+
+    async def acquire(self, priority: Priority):
+        with self._lock:
+            if self._admit(priority):
+                return
+            waiter = _Waiter(priority, asyncio.get_running_loop().create_future())
+            heapq.heappush(self._waiters, (priority, next(self._arrivals), waiter))
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if self._remove(waiter):
+                    raise
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                self.release(priority)  # Granted just as we were cancelled
+            # Otherwise the pending grant sees the cancellation and passes the slot on
+            raise
+
+    def acquire_sync(self, priority: Priority, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._admit(priority):
+                return True
+            waiter = _Waiter(priority)
+            heapq.heappush(self._waiters, (priority, next(self._arrivals), waiter))
+        if not waiter.event.wait(timeout):
+            with self._lock:
+                if self._remove(waiter):
+                    return False
+            # Granted or shed just as the wait timed out
+        if waiter.shed:
+            raise LLMOverloaded("LLM queue is full; call displaced by more urgent work")
+        return True
+
+    def release(self, priority: Priority):
+        with self._lock:
+            self.in_use_by_class[priority] -= 1
+            # The slot passes straight to the next waiters that may run
+            while self._waiters and self._can_run(self._waiters[0][0]):
+                _, _, waiter = heapq.heappop(self._waiters)
+                if waiter.event is not None:
+                    self.in_use_by_class[waiter.priority] += 1
+                    waiter.event.set()
+                elif not waiter.future.done():
+                    self.in_use_by_class[waiter.priority] += 1
+                    waiter.future.get_loop().call_soon_threadsafe(self._grant, waiter)
+
+    def _grant(self, waiter: _Waiter):
+        if waiter.future.done():
+            self.release(waiter.priority)  # Cancelled after it was picked; pass the slot on
+        else:
+            waiter.future.set_result(None)
+
+class _TokenBucket:
+    """
+    Rate limit of `per_minute` units. A call takes its units at once, going
+    into debt if the bucket is short, and waits until the debt is repaid; so
+    concurrent callers queue up in arrival order instead of polling.
+    """
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Takes `amount` units; returns how many seconds to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # A request bigger than the bucket would otherwise never fit
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount: float):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+class _ModelState:
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self.slots = _Slots(
+            limits.max_concurrency,
+            background_size=max(1, int(limits.max_concurrency * limits.background_share)),
+            max_queue=limits.max_queue,
+            background_max_queue=limits.background_max_queue
+        )
+        self.requests = _TokenBucket(limits.requests_per_minute) if limits.requests_per_minute else None
+        self.tokens = _TokenBucket(limits.tokens_per_minute) if limits.tokens_per_minute else None
+
+class _CallerStats:
+    # Latencies kept for percentiles
+    WINDOW = 1000
+
+    def __init__(self, priority: Priority):
+        self.priority = priority
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.deadline_exceeded = 0
+        self.shed = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.queued_seconds = 0.0
+        self.latencies: Deque[float] = deque(maxlen=self.WINDOW)
+
+    def report(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+
+        return {
+            "priority": self.priority.name.lower(),
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "deadline_exceeded": self.deadline_exceeded,
+            "shed": self.shed,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "queued_seconds": round(self.queued_seconds, 3),
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": round(latencies[-1], 3) if latencies else None
+        }
+
+class LLMGateway:
+    def __init__(self, default_limits: ModelLimits, model_limits: Optional[Dict[str, ModelLimits]] = None,
+                 max_retries: int = 3, timeout_seconds: float = 60,
+                 backoff_base_seconds: float = 0.5, backoff_max_seconds: float = 8):
+        self.default_limits = default_limits
+        self.model_limits = model_limits or {}
+        self.max_retries = max_retries
+        self.timeout_seconds = timeout_seconds
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._models: Dict[str, _ModelState] = {}
+        self._callers: Dict[str, _CallerStats] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def model_name(model: Any) -> str:
+        """Name a model object (or model name) is limited under, e.g. "gemini-pro" """
+        name = model if isinstance(model, str) else getattr(model, "model_name", None) or type(model).__name__
+        return name[len("models/"):] if name.startswith("models/") else name
+
+    def _model(self, name: str) -> _ModelState:
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = _ModelState(self.model_limits.get(name, self.default_limits))
+            return self._models[name]
+
+    def _stats(self, caller: str) -> _CallerStats:
+        with self._lock:
+            if caller not in self._callers:
+                self._callers[caller] = _CallerStats(caller_priority(caller))
+            return self._callers[caller]
+
+    def _retry_after(self, error: BaseException, attempt: int, deadline: float) -> Optional[float]:
+        """Seconds to back off before retrying after `error`, or None to give up"""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        # Full jitter: spreads out callers that were throttled at the same moment
+        backoff = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+        return backoff if time.monotonic() + backoff < deadline else None
+
+    def _rate_wait(self, state: _ModelState, stats: _CallerStats, tokens: int, deadline: float) -> float:
+        """Reserves rate budget for one call; returns how long to wait for it"""
+        wait = 0.0
+        if state.requests:
+            wait = state.requests.reserve(1)
+        if state.tokens and tokens:
+            wait = max(wait, state.tokens.reserve(tokens))
+        shed = stats.priority >= BACKGROUND and wait > state.limits.background_max_rate_wait_seconds
+        if shed or time.monotonic() + wait > deadline:
+            if state.requests:
+                state.requests.refund(1)
+            if state.tokens and tokens:
+                state.tokens.refund(tokens)
+            if shed:
+                state.slots.shed_by_class[stats.priority] += 1
+                raise LLMOverloaded(f"Rate limit wait of {wait:.1f}s is too long for background work")
+            raise LLMDeadlineExceeded(f"Rate limit wait of {wait:.1f}s exceeds the deadline")
+        return wait
+
+    # --- Async calls ---
+
+    async def _admit(self, state: _ModelState, stats: _CallerStats, tokens: int, deadline: float):
+        """Waits for rate budget and a concurrency slot"""
+        started = time.monotonic()
+        try:
+            wait = self._rate_wait(state, stats, tokens, deadline)
+            if wait:
+                await asyncio.sleep(wait)
+            await asyncio.wait_for(state.slots.acquire(stats.priority), max(0.0, deadline - time.monotonic()))
+        except LLMDeadlineExceeded:
+            # Before the TimeoutError handler, which would also catch it (it is a TimeoutError)
+            stats.deadline_exceeded += 1
+            raise
+        except asyncio.TimeoutError:
+            stats.deadline_exceeded += 1
+            raise LLMDeadlineExceeded("No model slot became free before the deadline")
+        except LLMOverloaded:
+            stats.shed += 1
+            raise
+        finally:
+            stats.queued_seconds += time.monotonic() - started
+
+    async def call(self, caller: str, model: Any, fn: Callable[[], Awaitable[T]], *, tokens: int = 0,
+                   timeout: Optional[float] = None, retry: bool = True,
+                   count_output: Callable[[Any], int] = response_tokens) -> T:
+        """
+        Runs fn() (one LLM request) under the model's limits.
+
+        Args:
+            caller: Name the call is counted under in metrics(); also picks its
+                priority class (CALLER_PRIORITIES)
+            model: Model object or name the limits apply to
+            tokens: Estimated prompt tokens, for the token rate limit
+            timeout: Deadline in seconds, including queueing and retries
+            retry: Whether fn may be repeated after a retryable error
+
+        Raises:
+            LLMDeadlineExceeded: The deadline passed
+            LLMOverloaded: The call was shed in favour of more urgent work
+        """
+        state, stats = self._model(self.model_name(model)), self._stats(caller)
+        deadline = time.monotonic() + (timeout or self.timeout_seconds)
+        attempt = 0
+        while True:
+            await self._admit(state, stats, tokens, deadline)
+            started = time.monotonic()
+            retry_after = None
+            try:
+                result = await asyncio.wait_for(fn(), max(0.0, deadline - started))
+            except asyncio.TimeoutError:
+                stats.deadline_exceeded += 1
+                raise LLMDeadlineExceeded(f"{caller} call to {self.model_name(model)} timed out")
+            except Exception as e:
+                retry_after = self._retry_after(e, attempt, deadline) if retry else None
+                if retry_after is None:
+                    stats.errors += 1
+                    raise
+            finally:
+                state.slots.release(stats.priority)
+            if retry_after is None:
+                stats.calls += 1
+                stats.latencies.append(time.monotonic() - started)
+                stats.prompt_tokens += tokens
+                stats.output_tokens += count_output(result)
+                return result
+            stats.retries += 1
+            attempt += 1
+            await asyncio.sleep(retry_after)
+
+    async def generate(self, model: Any, prompt: Any, *, caller: str, timeout: Optional[float] = None, **kwargs) -> Any:
+        """model.generate_content_async(prompt, **kwargs) through the gateway"""
+        return await self.call(
+            caller, model, lambda: model.generate_content_async(prompt, **kwargs),
+            tokens=prompt_tokens(prompt), timeout=timeout
+        )
+
+    async def stream(self, model: Any, prompt: Any, *, caller: str, timeout: Optional[float] = None,
+                     **kwargs) -> AsyncIterator[Any]:
+        """
+        Streams the chunks of model.generate_content_async(prompt, stream=True).
+        The model slot is held until the stream ends; a retryable error is
+        retried only before the first chunk arrived.
+        """
+        state, stats = self._model(self.model_name(model)), self._stats(caller)
+        tokens = prompt_tokens(prompt)
+        deadline = time.monotonic() + (timeout or self.timeout_seconds)
+        attempt = 0
+        while True:
+            await self._admit(state, stats, tokens, deadline)
+            started = time.monotonic()
+            received = 0
+            retry_after = None
+            try:
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt, stream=True, **kwargs), max(0.0, deadline - started)
+                )
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, deadline - time.monotonic()))
+                    except StopAsyncIteration:
+                        break
+                    received += 1
+                    stats.output_tokens += response_tokens(chunk)
+                    yield chunk
+            except asyncio.TimeoutError:
+                stats.deadline_exceeded += 1
+                raise LLMDeadlineExceeded(f"{caller} stream from {self.model_name(model)} timed out")
+            except Exception as e:
+                retry_after = None if received else self._retry_after(e, attempt, deadline)
+                if retry_after is None:
+                    stats.errors += 1
+                    raise
+            finally:
+                state.slots.release(stats.priority)
+            if retry_after is None:
+                stats.calls += 1
+                stats.latencies.append(time.monotonic() - started)
+                stats.prompt_tokens += tokens
+                return
+            stats.retries += 1
+            attempt += 1
+            await asyncio.sleep(retry_after)
+
+    async def iterate(self, caller: str, model: Any, items: Callable[[], AsyncIterator[T]], *, tokens: int = 0,
+                      timeout: Optional[float] = None) -> AsyncIterator[T]:
+        """
+        Yields what items() yields (e.g. the events of an agent run, which may
+        call the model several times) under the model's limits, holding one
+        slot until it ends. Not retried, since part of it may already have
+        been used.
+
+        items() runs in a task of its own and hands its items over through a
+        queue, so the deadline can interrupt it without resuming the iterator
+        from different tasks.
+        """
+        state, stats = self._model(self.model_name(model)), self._stats(caller)
+        deadline = time.monotonic() + (timeout or self.timeout_seconds)
+        await self._admit(state, stats, tokens, deadline)
+        started = time.monotonic()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def produce():
+            try:
+                async for item in items():
+                    queue.put_nowait((item, None))
+                queue.put_nowait((done, None))
+            except Exception as e:
+                queue.put_nowait((done, e))
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item, error = await asyncio.wait_for(queue.get(), max(0.0, deadline - time.monotonic()))
+                if error is not None:
+                    raise error
+                if item is done:
+                    break
+                yield item
+        except LLMDeadlineExceeded:
+            # Raised by items() itself, e.g. a nested gateway call; passed on as it is
+            stats.deadline_exceeded += 1
+            raise
+        except asyncio.TimeoutError:
+            stats.deadline_exceeded += 1
+            raise LLMDeadlineExceeded(f"{caller} run on {self.model_name(model)} timed out")
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            if not producer.done():
+                producer.cancel()
+            state.slots.release(stats.priority)
+        stats.calls += 1
+        stats.latencies.append(time.monotonic() - started)
+        stats.prompt_tokens += tokens
+
+    # --- Blocking calls (sync code and worker threads) ---
+
+    def call_sync(self, caller: str, model: Any, fn: Callable[[], T], *, tokens: int = 0,
+                  timeout: Optional[float] = None, retry: bool = True,
+                  count_output: Callable[[Any], int] = response_tokens) -> T:
+        """
+        Blocking version of call(). The deadline bounds queueing and retries;
+        a request already sent cannot be interrupted, so give the client its
+        own timeout where it has one.
+        """
+        state, stats = self._model(self.model_name(model)), self._stats(caller)
+        deadline = time.monotonic() + (timeout or self.timeout_seconds)
+        attempt = 0
+        while True:
+            queued = time.monotonic()
+            try:
+                wait = self._rate_wait(state, stats, tokens, deadline)
+                if wait:
+                    time.sleep(wait)
+                if not state.slots.acquire_sync(stats.priority, max(0.0, deadline - time.monotonic())):
+                    raise LLMDeadlineExceeded("No model slot became free before the deadline")
+            except LLMDeadlineExceeded:
+                stats.deadline_exceeded += 1
+                raise
+            except LLMOverloaded:
+                stats.shed += 1
+                raise
+            finally:
+                stats.queued_seconds += time.monotonic() - queued
+            started = time.monotonic()
+            retry_after = None
+            try:
+                result = fn()
+            except Exception as e:
+                retry_after = self._retry_after(e, attempt, deadline) if retry else None
+                if retry_after is None:
+                    stats.errors += 1
+                    raise
+            finally:
+                state.slots.release(stats.priority)
+            if retry_after is None:
+                stats.calls += 1
+                stats.latencies.append(time.monotonic() - started)
+                stats.prompt_tokens += tokens
+                stats.output_tokens += count_output(result)
+                return result
+            stats.retries += 1
+            attempt += 1
+            time.sleep(retry_after)
+
+    def generate_sync(self, model: Any, prompt: Any, *, caller: str, timeout: Optional[float] = None, **kwargs) -> Any:
+        """model.generate_content(prompt, **kwargs) through the gateway"""
+        return self.call_sync(
+            caller, model, lambda: model.generate_content(prompt, **kwargs),
+            tokens=prompt_tokens(prompt), timeout=timeout
+        )
+
+    # --- Monitoring ---
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            models = dict(self._models)
+            callers = dict(self._callers)
+        return {
+            "models": {
+                name: {
+                    "in_flight": state.slots.in_use,
+                    "waiting": state.slots.waiting,
+                    "in_flight_by_class": _by_class(state.slots.in_use_by_class),
+                    "queue_depth": _by_class(state.slots.waiting_by_class()),
+                    "shed": _by_class(state.slots.shed_by_class),
+                    **state.limits.model_dump()
+                }
+                for name, state in models.items()
+            },
+            "callers": {caller: stats.report() for caller, stats in callers.items()}
+        }
+
+def _by_class(counts: Dict[Priority, int]) -> Dict[str, int]:
+    return {priority.name.lower(): count for priority, count in counts.items()}
+
+def _limits_from_env() -> Dict[str, ModelLimits]:
+    raw = os.getenv("LLM_MODEL_LIMITS")
+    if not raw:
+        return {}
+    default = _default_limits.model_dump()
+    return {name: ModelLimits(**{**default, **limits}) for name, limits in json.loads(raw).items()}
+
+_default_limits = ModelLimits(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+    tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+    background_share=float(os.getenv("LLM_BACKGROUND_SHARE", "0.5")),
+    max_queue=int(os.getenv("LLM_MAX_QUEUE", "64")),
+    background_max_queue=int(os.getenv("LLM_BACKGROUND_MAX_QUEUE", "8")),
+    background_max_rate_wait_seconds=float(os.getenv("LLM_BACKGROUND_MAX_RATE_WAIT_SECONDS", "5"))
+)
+
+# Process-wide gateway; every Gemini call goes through it
+llm_gateway = LLMGateway(
+    default_limits=_default_limits,
+    model_limits=_limits_from_env(),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+    timeout_seconds=float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+)
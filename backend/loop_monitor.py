@@ -0,0 +1,93 @@
+"""
+Event loop lag monitor.
+
+A background task asks to wake up every `interval_seconds` and records how
+late it actually woke. That lateness is time the loop could not run anything:
+a blocking call (synchronous LLM or HTTP client, file or database I/O, heavy
+CPU work) inside an async handler. Wake-ups later than
+`stall_threshold_seconds` count as stalls and are logged, so a regression
+shows up in the logs and in stats() (served at /loop_stats).
+
+Configured from the environment:
+    LOOP_MONITOR_INTERVAL_SECONDS    sampling interval (default 0.1)
+    LOOP_STALL_THRESHOLD_SECONDS     lag reported as a stall (default 0.1)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LoopMonitor:
+    # Lag samples kept for percentiles
+    WINDOW = 3000
+
+    def __init__(self, interval_seconds: float = 0.1, stall_threshold_seconds: float = 0.1):
+        self.interval_seconds = interval_seconds
+        self.stall_threshold_seconds = stall_threshold_seconds
+        self.lags: Deque[float] = deque(maxlen=self.WINDOW)
+        self.samples = 0
+        self.stalls = 0
+        self.blocked_seconds = 0.0
+        self.max_lag = 0.0
+        self.last_stall: Optional[float] = None  # Unix time
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, lag: float):
+        self.samples += 1
+        self.lags.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.stall_threshold_seconds:
+            self.stalls += 1
+            self.blocked_seconds += lag
+            self.last_stall = time.time()
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            self.record(max(0.0, loop.time() - expected))
+
+    def start(self) -> asyncio.Task:
+        """Starts sampling on the running loop (call from the app lifespan)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        lags = sorted(self.lags)
+
+        def percentile_ms(p: float) -> Optional[float]:
+            return round(lags[min(len(lags) - 1, int(p * len(lags)))] * 1000, 1) if lags else None
+
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "samples": self.samples,
+            "lag_p50_ms": percentile_ms(0.5),
+            "lag_p99_ms": percentile_ms(0.99),
+            "lag_max_ms": round(self.max_lag * 1000, 1),
+            "stalls": self.stalls,
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "stall_threshold_ms": self.stall_threshold_seconds * 1000,
+            "last_stall": self.last_stall
+        }
+
+loop_monitor = LoopMonitor(
+    interval_seconds=float(os.getenv("LOOP_MONITOR_INTERVAL_SECONDS", "0.1")),
+    stall_threshold_seconds=float(os.getenv("LOOP_STALL_THRESHOLD_SECONDS", "0.1"))
+)
@@ -10,7 +10,7 @@ from backend.appointment_service import (
     Appointment,
     appointment_manager
 )
-from backend.auth import get_current_user
+from backend.auth import get_current_user, get_current_user_from_claims
 
 router = APIRouter(prefix="/api/appointments", tags=["appointments"])
 
@@ -98,7 +98,7 @@ async def book_appointment(
 
 @router.get("/my-appointments", response_model=List[AppointmentResponse])
 async def get_my_appointments(
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user_from_claims),
     status_filter: Optional[str] = None
 ):
     """
@@ -4,7 +4,7 @@ from typing import List
 from datetime import datetime
 import logging
 from backend.document_summarizer import process_document, generate_document_summary, DocumentSummary
-from backend.auth import get_current_user
+from backend.auth import get_current_user, get_current_user_from_claims
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
 
@@ -27,7 +27,7 @@ async def summarize_text_endpoint(
                 detail="Text cannot be empty"
             )
             
-        summary = generate_document_summary(text)
+        summary = await generate_document_summary(text)
         return summary
         
     except HTTPException:
@@ -65,7 +65,7 @@ async def summarize_file_endpoint(
         document_text = await process_document(file)
         
         # Generate summary
-        summary = generate_document_summary(document_text)
+        summary = await generate_document_summary(document_text)
         
         # Log the summary generation
         logger.info(f"Generated summary for file: {file.filename} (User: {current_user.get('email')})")
@@ -83,7 +83,7 @@ async def summarize_file_endpoint(
 
 @router.get("/history", response_model=List[dict])
 async def get_summary_history(
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_from_claims)
 ):
     """
     Get user's summary history (placeholder - implement database storage as needed)
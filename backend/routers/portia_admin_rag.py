@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, HttpUrl
 from typing import List, Optional
-from backend.integrations.portia_client import run_one_shot, PortiaUnavailable
+from backend.integrations.portia_client import arun_one_shot, PortiaUnavailable
+from backend.llm_gateway import LLMOverloaded
 
 router = APIRouter(prefix="/portia/rag", tags=["portia-rag-admin"])
 
@@ -33,9 +34,11 @@ async def run_rag_plan(body: RunRagPlanBody):
             query_parts.append(f"Notes: {body.notes}")
 
         query = "\n".join(query_parts)
-        result = run_one_shot(query, context={"task": "rag_ingestion"})
+        result = await arun_one_shot(query, context={"task": "rag_ingestion"}, caller="portia_rag_ingestion")
         return {"ok": True, "data": str(result)}
     except PortiaUnavailable as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except LLMOverloaded as e:
+        raise HTTPException(status_code=503, detail=f"Ingestion deferred, LLM busy with interactive work: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Portia error: {e}")
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-from backend.integrations.portia_client import run_one_shot, PortiaUnavailable
+from backend.integrations.portia_client import arun_one_shot, PortiaUnavailable
 
 router = APIRouter(prefix="/portia/appointments", tags=["portia-appointments-triage"])
 
@@ -24,7 +24,7 @@ async def appointments_triage(body: TriageBody):
             "preferred_time_range": body.preferred_time_range,
             "location": body.location,
         }
-        result = run_one_shot(query, context=context)
+        result = await arun_one_shot(query, context=context)
         return {"ok": True, "data": str(result)}
     except PortiaUnavailable as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from backend.integrations.portia_client import run_one_shot, PortiaUnavailable
+from backend.integrations.portia_client import arun_one_shot, PortiaUnavailable
 
 router = APIRouter(prefix="/portia", tags=["portia-chatbot"])
 
@@ -11,7 +11,7 @@ class ChatBody(BaseModel):
 @router.post("/chat")
 async def portia_chat(body: ChatBody):
     try:
-        result = run_one_shot(body.message, context=body.context)
+        result = await arun_one_shot(body.message, context=body.context)
         # Portia returns a rich object; normalize to text if needed
         return {"ok": True, "data": str(result)}
     except PortiaUnavailable as e:
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List
-from backend.integrations.portia_client import run_one_shot, PortiaUnavailable
+from backend.integrations.portia_client import arun_one_shot, PortiaUnavailable
 
 router = APIRouter(prefix="/portia/evidence", tags=["portia-evidence-assistant"])
 
@@ -23,7 +23,7 @@ async def evidence_assistant(ctx: EvidenceContext):
             "Include: checklist items (with short rationale), suggested documents, potential sources, "
             "and any immediate deadlines. Return concise JSON fields: checklist, documents, sources, deadlines."
         )
-        result = run_one_shot(query, context=ctx.model_dump(exclude_none=True))
+        result = await arun_one_shot(query, context=ctx.model_dump(exclude_none=True))
         return {"ok": True, "data": str(result)}
     except PortiaUnavailable as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,581 @@
+"""
+Shared state for running several workers (processes or nodes) behind one app.
+
+A StateBackend stores versioned values and append-only lists under string
+keys. Every write bumps the value's version, and compare_and_set only
+writes if the version is still the one the caller read, raising
+ConcurrentUpdateError otherwise (optimistic concurrency).
+
+Backends are chosen by SHARED_STATE_URL:
+    memory://                  per-process dict (default; single worker)
+    sqlite:///data/state.db    SQLite file in WAL mode (workers on one machine)
+    redis://host:6379/0        Redis (any number of machines); needs redis-py
+    fakeredis://               in-process Redis fake (needs fakeredis), for
+                               exercising the Redis backend locally
+
+SharedMap and SharedLog wrap a backend with a key namespace and JSON or
+pydantic (de)serialization.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+load_dotenv()
+
+class ConcurrentUpdateError(Exception):
+    """A compare-and-set found a different version than expected"""
+    def __init__(self, key: str, expected_version: int, actual_version: int):
+        self.key = key
+        self.expected_version = expected_version
+        self.actual_version = actual_version
+        super().__init__(f"Concurrent update of {key}: expected version {expected_version}, found {actual_version}")
+
+class StateBackend:
+    """Versioned key-value and list storage. Version 0 means the key does not exist."""
+
+    # Whether state is visible to other processes
+    is_shared = False
+
+    def get(self, key: str) -> Optional[Tuple[str, int]]:
+        """Returns (value, version), or None if the key does not exist"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> int:
+        """Writes unconditionally; returns the new version"""
+        raise NotImplementedError
+
+    def compare_and_set(self, key: str, value: str, expected_version: int, ttl_seconds: Optional[float] = None) -> int:
+        """Writes only if the key is at expected_version (0 = must not exist); returns the new version"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def versions(self, prefix: str) -> Dict[str, int]:
+        """Version of every key (not list) starting with prefix"""
+        raise NotImplementedError
+
+    def append(self, key: str, item: str, ttl_seconds: Optional[float] = None) -> int:
+        """Appends to the list at key; returns the new length. The TTL restarts on every append."""
+        raise NotImplementedError
+
+    def get_list(self, key: str) -> List[str]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MemoryStateBackend(StateBackend):
+    """Process-local backend; the default, equivalent to the old module-level dicts"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[str, int, Optional[float]]] = {}
+        self._lists: Dict[str, Tuple[List[str], Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _expires_at(ttl_seconds: Optional[float]) -> Optional[float]:
+        return time.monotonic() + ttl_seconds if ttl_seconds else None
+
+    def _live(self, key: str) -> Optional[Tuple[str, int, Optional[float]]]:
+        entry = self._values.get(key)
+        if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+            del self._values[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            entry = self._live(key)
+            return (entry[0], entry[1]) if entry else None
+
+    def set(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> int:
+        with self._lock:
+            entry = self._live(key)
+            version = (entry[1] if entry else 0) + 1
+            self._values[key] = (value, version, self._expires_at(ttl_seconds))
+            return version
+
+    def compare_and_set(self, key: str, value: str, expected_version: int, ttl_seconds: Optional[float] = None) -> int:
+        with self._lock:
+            entry = self._live(key)
+            current = entry[1] if entry else 0
+            if current != expected_version:
+                raise ConcurrentUpdateError(key, expected_version, current)
+            self._values[key] = (value, current + 1, self._expires_at(ttl_seconds))
+            return current + 1
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            found = self._live(key) is not None
+            self._values.pop(key, None)
+            return self._lists.pop(key, None) is not None or found
+
+    def versions(self, prefix: str) -> Dict[str, int]:
+        with self._lock:
+            return {key: entry[1] for key in list(self._values) if key.startswith(prefix) and (entry := self._live(key))}
+
+    def append(self, key: str, item: str, ttl_seconds: Optional[float] = None) -> int:
+        with self._lock:
+            items = self._list(key)
+            items.append(item)
+            self._lists[key] = (items, self._expires_at(ttl_seconds))
+            return len(items)
+
+    def _list(self, key: str) -> List[str]:
+        entry = self._lists.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+            self._lists.pop(key, None)
+            return []
+        return entry[0]
+
+    def get_list(self, key: str) -> List[str]:
+        with self._lock:
+            return list(self._list(key))
+
+class SqliteStateBackend(StateBackend):
+    """SQLite file in WAL mode; every worker on the machine opens the same file"""
+
+    is_shared = True
+
+    # Expired rows are deleted every this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "version INTEGER NOT NULL, expires_at REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS list_items (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS list_items_key ON list_items (key, id)")
+
+    @staticmethod
+    def _expires_at(ttl_seconds: Optional[float]) -> Optional[float]:
+        # Wall clock, since expiry is compared across processes
+        return time.time() + ttl_seconds if ttl_seconds else None
+
+    def _current_version(self, key: str) -> int:
+        row = self.conn.execute(
+            "SELECT version FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            now = time.time()
+            self.conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            self.conn.execute("DELETE FROM list_items WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+    def _write(self, key: str, value: str, expected_version: Optional[int], ttl_seconds: Optional[float]) -> int:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so the version check and write are atomic across processes
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = self._current_version(key)
+                if expected_version is not None and current != expected_version:
+                    raise ConcurrentUpdateError(key, expected_version, current)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO kv (key, value, version, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, value, current + 1, self._expires_at(ttl_seconds))
+                )
+                self._wrote()
+                self.conn.execute("COMMIT")
+                return current + 1
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def get(self, key: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value, version FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+            ).fetchone()
+            return (row[0], row[1]) if row else None
+
+    def set(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> int:
+        return self._write(key, value, None, ttl_seconds)
+
+    def compare_and_set(self, key: str, value: str, expected_version: int, ttl_seconds: Optional[float] = None) -> int:
+        return self._write(key, value, expected_version, ttl_seconds)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            deleted = self.conn.execute("DELETE FROM kv WHERE key = ?", (key,)).rowcount
+            deleted += self.conn.execute("DELETE FROM list_items WHERE key = ?", (key,)).rowcount
+            return deleted > 0
+
+    def versions(self, prefix: str) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT key, version FROM kv WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at > ?)",
+                (prefix, prefix + "\uffff", time.time())
+            )
+            return dict(rows.fetchall())
+
+    def append(self, key: str, item: str, ttl_seconds: Optional[float] = None) -> int:
+        expires_at = self._expires_at(ttl_seconds)
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("INSERT INTO list_items (key, value, expires_at) VALUES (?, ?, ?)", (key, item, expires_at))
+                self.conn.execute("UPDATE list_items SET expires_at = ? WHERE key = ?", (expires_at, key))
+                length = self.conn.execute("SELECT COUNT(*) FROM list_items WHERE key = ?", (key,)).fetchone()[0]
+                self._wrote()
+                self.conn.execute("COMMIT")
+                return length
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def get_list(self, key: str) -> List[str]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT value FROM list_items WHERE key = ? AND (expires_at IS NULL OR expires_at > ?) ORDER BY id",
+                (key, time.time())
+            )
+            return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+class RedisStateBackend(StateBackend):
+    """
+    Redis backend. A value is a hash {value, version}; compare_and_set uses
+    WATCH/MULTI, so it also works against fakeredis without Lua support.
+    Lists are Redis lists.
+
+    Each namespace (a key up to its first ':') has an index hash mapping its
+    keys to "version:expires_at_ms", written in the same MULTI as the value,
+    so versions() is one HGETALL instead of a keyspace scan. Index entries of
+    expired values are skipped and cleaned up by versions().
+    """
+
+    is_shared = True
+
+    INDEX_PREFIX = "__versions__:"
+    # Set once the index covers keys written before it existed
+    INDEX_MARKER = "__versions_indexed__"
+
+    def __init__(self, client, key_prefix: str = "nyaysetu:"):
+        self.client = client
+        self.key_prefix = key_prefix
+        if not self.client.exists(self.key_prefix + self.INDEX_MARKER):
+            self.rebuild_index()
+
+    def _key(self, key: str) -> str:
+        return self.key_prefix + key
+
+    def _index_key(self, key: str) -> str:
+        return self.key_prefix + self.INDEX_PREFIX + key.split(":", 1)[0]
+
+    @staticmethod
+    def _index_entry(version: int, ttl_seconds: Optional[float]) -> str:
+        return f"{version}:{int((time.time() + ttl_seconds) * 1000) if ttl_seconds else 0}"
+
+    @staticmethod
+    def _text(value) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def rebuild_index(self, batch_size: int = 1000):
+        """
+        Indexes values written without an index (by an older version). Scans
+        the keyspace once, pipelining TYPE, then HGET and PTTL, per batch;
+        entries already indexed are left alone.
+        """
+        start = len(self.key_prefix)
+        internal = (self.key_prefix + self.INDEX_PREFIX, self.key_prefix + self.INDEX_MARKER)
+        keys = [
+            k for k in (self._text(k) for k in self.client.scan_iter(match=self.key_prefix + "*", count=batch_size))
+            if not k.startswith(internal)
+        ]
+        for first in range(0, len(keys), batch_size):
+            batch = keys[first:first + batch_size]
+            with self.client.pipeline(transaction=False) as pipe:
+                for k in batch:
+                    pipe.type(k)
+                types = pipe.execute()
+            hashes = [k for k, key_type in zip(batch, types) if self._text(key_type) == "hash"]
+            if not hashes:
+                continue
+            with self.client.pipeline(transaction=False) as pipe:
+                for k in hashes:
+                    pipe.hget(k, "version")
+                    pipe.pttl(k)
+                found = pipe.execute()
+            now_ms = int(time.time() * 1000)
+            with self.client.pipeline(transaction=False) as pipe:
+                for k, version, ttl_ms in zip(hashes, found[::2], found[1::2]):
+                    if version is None:
+                        continue
+                    key = k[start:]
+                    expires_at_ms = now_ms + ttl_ms if ttl_ms and ttl_ms > 0 else 0
+                    # HSETNX: a write since the scan already put the newer version there
+                    pipe.hsetnx(self._index_key(key), key, f"{int(version)}:{expires_at_ms}")
+                pipe.execute()
+        self.client.set(self.key_prefix + self.INDEX_MARKER, 1)
+
+    def get(self, key: str) -> Optional[Tuple[str, int]]:
+        value, version = self.client.hmget(self._key(key), "value", "version")
+        if value is None:
+            return None
+        return self._text(value), int(version)
+
+    def _write(self, key: str, value: str, expected_version: Optional[int], ttl_seconds: Optional[float]) -> int:
+        from redis.exceptions import WatchError
+
+        redis_key = self._key(key)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(redis_key)
+                current = int(pipe.hget(redis_key, "version") or 0)
+                if expected_version is not None and current != expected_version:
+                    raise ConcurrentUpdateError(key, expected_version, current)
+                pipe.multi()
+                pipe.hset(redis_key, mapping={"value": value, "version": current + 1})
+                if ttl_seconds:
+                    pipe.pexpire(redis_key, int(ttl_seconds * 1000))
+                else:
+                    pipe.persist(redis_key)
+                pipe.hset(self._index_key(key), key, self._index_entry(current + 1, ttl_seconds))
+                pipe.execute()
+                return current + 1
+            except WatchError:
+                # Someone else wrote the key between WATCH and EXEC
+                if expected_version is None:
+                    return self._write(key, value, None, ttl_seconds)
+                raise ConcurrentUpdateError(key, expected_version, -1)
+
+    def set(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> int:
+        return self._write(key, value, None, ttl_seconds)
+
+    def compare_and_set(self, key: str, value: str, expected_version: int, ttl_seconds: Optional[float] = None) -> int:
+        return self._write(key, value, expected_version, ttl_seconds)
+
+    def delete(self, key: str) -> bool:
+        with self.client.pipeline() as pipe:
+            pipe.delete(self._key(key))
+            pipe.hdel(self._index_key(key), key)
+            deleted, _ = pipe.execute()
+        return deleted > 0
+
+    def versions(self, prefix: str) -> Dict[str, int]:
+        if ":" in prefix:
+            index_keys = [self._index_key(prefix)]
+        else:
+            # The prefix may cover several namespaces (one index key each)
+            index_keys = list(self.client.scan_iter(match=self.key_prefix + self.INDEX_PREFIX + prefix + "*"))
+        if not index_keys:
+            return {}
+        with self.client.pipeline(transaction=False) as pipe:
+            for index_key in index_keys:
+                pipe.hgetall(index_key)
+            indexes = pipe.execute()
+
+        now_ms = time.time() * 1000
+        result: Dict[str, int] = {}
+        for index_key, entries in zip(index_keys, indexes):
+            expired = {}
+            for field, entry in entries.items():
+                key = self._text(field)
+                if not key.startswith(prefix):
+                    continue
+                version, expires_at_ms = self._text(entry).split(":")
+                if expires_at_ms != "0" and int(expires_at_ms) <= now_ms:
+                    expired[field] = entry
+                else:
+                    result[key] = int(version)
+            if expired:
+                self._prune_index(index_key, expired)
+        return result
+
+    def _prune_index(self, index_key, expired: Dict[Any, Any]):
+        """Removes index entries of expired values, unless they were rewritten meanwhile"""
+        from redis.exceptions import WatchError
+
+        fields = list(expired)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(index_key)
+                current = pipe.hmget(index_key, fields)
+                stale = [field for field, entry in zip(fields, current) if entry == expired[field]]
+                if stale:
+                    pipe.multi()
+                    pipe.hdel(index_key, *stale)
+                    pipe.execute()
+            except WatchError:
+                pass  # A write raced the cleanup; the next versions() call retries it
+
+    def append(self, key: str, item: str, ttl_seconds: Optional[float] = None) -> int:
+        redis_key = self._key(key)
+        with self.client.pipeline() as pipe:
+            pipe.rpush(redis_key, item)
+            if ttl_seconds:
+                pipe.pexpire(redis_key, int(ttl_seconds * 1000))
+            length = pipe.execute()[0]
+        return length
+
+    def get_list(self, key: str) -> List[str]:
+        return [self._text(item) for item in self.client.lrange(self._key(key), 0, -1)]
+
+    def close(self):
+        self.client.close()
+
+def create_state_backend(url: str) -> StateBackend:
+    """Creates a backend from a SHARED_STATE_URL (see module docstring)"""
+    if url.startswith("memory://"):
+        return MemoryStateBackend()
+    if url.startswith("sqlite:///"):
+        return SqliteStateBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("SHARED_STATE_URL is a Redis URL but the 'redis' package is not installed")
+        return RedisStateBackend(redis.Redis.from_url(url))
+    if url.startswith("fakeredis://"):
+        try:
+            import fakeredis
+        except ImportError:
+            raise RuntimeError("SHARED_STATE_URL is fakeredis:// but the 'fakeredis' package is not installed")
+        return RedisStateBackend(fakeredis.FakeRedis())
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+# --- Typed views ---
+
+class SharedMap(MutableMapping):
+    """
+    Dict-like view of one namespace of a backend. Values are pydantic models
+    (when `model` is given) or JSON values. Reads return fresh copies, so
+    changes to a value must be written back: assign it, or use update() for
+    a read-modify-write that retries on concurrent updates.
+    """
+    def __init__(self, backend: StateBackend, namespace: str, model: Optional[Type[BaseModel]] = None,
+                 ttl_seconds: Optional[float] = None, max_retries: int = 5):
+        self.backend = backend
+        self.prefix = namespace + ":"
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self.max_retries = max_retries
+
+    def _dump(self, value: Any) -> str:
+        return value.model_dump_json() if self.model else json.dumps(value, default=str)
+
+    def _load(self, raw: str) -> Any:
+        return self.model.model_validate_json(raw) if self.model else json.loads(raw)
+
+    def get_versioned(self, key: str) -> Tuple[Optional[Any], int]:
+        """Returns (value, version); (None, 0) if missing"""
+        found = self.backend.get(self.prefix + key)
+        if found is None:
+            return None, 0
+        return self._load(found[0]), found[1]
+
+    def put_if_version(self, key: str, value: Any, expected_version: int) -> int:
+        """Writes only if nobody else has since; raises ConcurrentUpdateError otherwise"""
+        return self.backend.compare_and_set(self.prefix + key, self._dump(value), expected_version, self.ttl_seconds)
+
+    def update(self, key: str, mutate: Callable[[Any], bool], default: Optional[Callable[[], Any]] = None) -> Optional[Any]:
+        """
+        Applies mutate to the current value and writes it back with
+        compare-and-set, retrying from a fresh read if another worker wrote in
+        between. mutate returns False to abort without writing. With
+        `default`, a missing key starts from default() instead.
+
+        Returns:
+            The written value, or None if the key is missing or mutate aborted
+        """
+        return self.update_versioned(key, mutate, default=default)[0]
+
+    def update_versioned(self, key: str, mutate: Callable[[Any], bool], expected_version: Optional[int] = None,
+                         default: Optional[Callable[[], Any]] = None) -> Tuple[Optional[Any], int]:
+        """
+        update() that also returns the version after the write. With
+        expected_version, the value must still be at the version the caller
+        read earlier: a conflict raises ConcurrentUpdateError instead of
+        being retried.
+
+        Returns:
+            (written value or None, version)
+        """
+        for _ in range(self.max_retries):
+            value, version = self.get_versioned(key)
+            if expected_version is not None and version != expected_version:
+                raise ConcurrentUpdateError(self.prefix + key, expected_version, version)
+            if value is None and default is not None:
+                value = default()
+            if value is None or mutate(value) is False:
+                return None, version
+            try:
+                return value, self.put_if_version(key, value, version)
+            except ConcurrentUpdateError:
+                if expected_version is not None:
+                    raise
+        raise ConcurrentUpdateError(self.prefix + key, version, -1)
+
+    def versions(self) -> Dict[str, int]:
+        start = len(self.prefix)
+        return {key[start:]: version for key, version in self.backend.versions(self.prefix).items()}
+
+    def __getitem__(self, key: str) -> Any:
+        value, _ = self.get_versioned(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self.backend.set(self.prefix + key, self._dump(value), self.ttl_seconds)
+
+    def __delitem__(self, key: str):
+        if not self.backend.delete(self.prefix + key):
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.backend.get(self.prefix + key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.versions())
+
+    def __len__(self) -> int:
+        return len(self.versions())
+
+class SharedLog:
+    """Append-only lists of JSON items, one per key, in one namespace of a backend"""
+
+    def __init__(self, backend: StateBackend, namespace: str, ttl_seconds: Optional[float] = None):
+        self.backend = backend
+        self.prefix = namespace + ":"
+        self.ttl_seconds = ttl_seconds
+
+    def append(self, key: str, item: Any) -> int:
+        return self.backend.append(self.prefix + key, json.dumps(item, default=str), self.ttl_seconds)
+
+    def get(self, key: str) -> List[Any]:
+        return [json.loads(item) for item in self.backend.get_list(self.prefix + key)]
+
+    def delete(self, key: str):
+        self.backend.delete(self.prefix + key)
+
+# Process-wide backend, shared by every component that opts in
+shared_state = create_state_backend(os.getenv("SHARED_STATE_URL", "memory://"))
@@ -0,0 +1,11 @@
+"""
+Server-sent events for the streaming endpoints (chat and debate turns).
+"""
+
+import json
+from typing import Any, Dict
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Formats a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"